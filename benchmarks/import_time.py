@@ -0,0 +1,62 @@
+"""Cold-start import benchmark for PyWrike.
+
+Runs each scenario in a fresh interpreter, reports the best wall time over
+--runs runs and fails (exit status 1) when a scenario exceeds its budget or
+loads one of the heavy optional dependencies it should not need.
+
+    python benchmarks/import_time.py [--runs 5] [--scale 1.0]
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+HEAVY_MODULES = ['pandas', 'numpy', 'openpyxl', 'bs4']
+
+# (name, statement, budget in seconds, heavy modules the statement may load)
+SCENARIOS = [
+    ('import package', 'import PyWrike', 0.05, []),
+    ('API-only call path', 'from PyWrike import create_task, get_client, OAuth2Gateway1', 0.5, []),
+    ('Excel export path', 'from PyWrike import process_space_data, read_config_from_excel', 0.5, []),
+]
+
+CHILD = '''
+import json, sys, time
+started = time.perf_counter()
+exec({statement!r})
+elapsed = time.perf_counter() - started
+print(json.dumps({{"elapsed": elapsed, "loaded": [name for name in {heavy!r} if name in sys.modules]}}))
+'''
+
+def run_scenario(statement, runs):
+    best = None
+    loaded = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', CHILD.format(statement=statement, heavy=HEAVY_MODULES)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if best is None or result['elapsed'] < best:
+            best = result['elapsed']
+        loaded = result['loaded']
+    return best, loaded
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--scale', type=float, default=1.0, help='multiply every budget, e.g. for slow CI machines')
+    args = parser.parse_args()
+
+    failed = False
+    for name, statement, budget, allowed in SCENARIOS:
+        elapsed, loaded = run_scenario(statement, args.runs)
+        unexpected = [module for module in loaded if module not in allowed]
+        ok = elapsed <= budget * args.scale and not unexpected
+        failed = failed or not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name:<22} {elapsed * 1000:8.1f} ms (budget {budget * args.scale * 1000:.0f} ms)"
+              + (f"  loaded {', '.join(unexpected)}" if unexpected else ''))
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
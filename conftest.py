@@ -0,0 +1,14 @@
+import importlib.util
+import os
+import sys
+
+# The package is imported as PyWrike but lives in pywrike/; make it importable
+# from a plain checkout (on case-sensitive file systems) without installing it.
+if importlib.util.find_spec('PyWrike') is None:
+    _package_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pywrike')
+    _spec = importlib.util.spec_from_file_location(
+        'PyWrike', os.path.join(_package_dir, '__init__.py'), submodule_search_locations=[_package_dir]
+    )
+    _module = importlib.util.module_from_spec(_spec)
+    sys.modules['PyWrike'] = _module
+    _spec.loader.exec_module(_module)
@@ -0,0 +1,260 @@
+import asyncio
+import json
+import time
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp is an optional dependency (pip install PyWrike[aio])
+    aiohttp = None
+
+from PyWrike.client import DEFAULT_PAGE_SIZE, WRIKE_API_URL
+from PyWrike.batch import chunked, unique_ids
+from PyWrike.ratelimit import get_rate_limiter
+from PyWrike.metrics import metrics
+
+TASK_FIELDS = [
+    "subTaskIds", "authorIds", "customItemTypeId", "responsibleIds",
+    "description", "hasAttachments", "dependencyIds", "superParentIds",
+    "superTaskIds", "metadata", "customFields", "parentIds", "sharedIds",
+    "recurrent", "briefDescription", "attachmentCount"
+]
+
+# Asyncio client for the Wrike REST API.
+#
+# All requests go through one aiohttp session and a semaphore that caps how
+# many requests are in flight at once. Requests take their tokens from the same
+# process-wide rate limiter as the synchronous WrikeClient, and a 429 from any
+# request pauses that limiter for every caller until Retry-After has passed.
+class AsyncWrikeClient(object):
+    def __init__(self, access_token, max_concurrency=16, base_url=WRIKE_API_URL, timeout=120, retries=5,
+                 rate_limiter=None):
+        if aiohttp is None:
+            raise ImportError("pywrike.aio requires aiohttp. Install it with 'pip install aiohttp'.")
+        self._access_token = access_token
+        self._base_url = base_url.rstrip('/')
+        self._timeout = timeout
+        self._retries = retries
+        self._max_concurrency = max_concurrency
+        self._semaphore = None
+        self._session = None
+        self._rate_limiter = rate_limiter or get_rate_limiter()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        if self._session is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+            self._session = aiohttp.ClientSession(
+                headers={
+                    'Authorization': f'Bearer {self._access_token}',
+                    'Accept': 'application/json',
+                    'Accept-Encoding': 'gzip, deflate'
+                },
+                timeout=aiohttp.ClientTimeout(total=self._timeout),
+                connector=aiohttp.TCPConnector(limit=self._max_concurrency)
+            )
+        return self
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def url(self, path):
+        if path.startswith('http://') or path.startswith('https://'):
+            return path
+        return self._base_url + '/' + path.lstrip('/')
+
+    # Function to send a request and return the decoded JSON body
+    async def request(self, method, path, params=None, json=None):
+        await self.open()
+        for attempt in range(self._retries + 1):
+            async with self._semaphore:
+                metrics.record_wait(method, path, await self._rate_limiter.acquire_async())
+                started = time.perf_counter()
+                try:
+                    async with self._session.request(method, self.url(path), params=params, json=json) as response:
+                        body = await response.read()
+                        # Request bytes are counted on the compact JSON encoding of the body
+                        metrics.record_request(
+                            method, path, response.status, time.perf_counter() - started,
+                            len(_json_dumps(json)) if json is not None else 0, len(body)
+                        )
+                        self._rate_limiter.update_from_response(response.status, response.headers)
+                        if response.status == 429 and attempt < self._retries:
+                            metrics.record_retry(method, path)
+                            continue
+                        response.raise_for_status()
+                        return await response.json(content_type=None)
+                except aiohttp.ClientError as e:
+                    if not isinstance(e, aiohttp.ClientResponseError):
+                        metrics.record_error(method, path)
+                    raise
+
+    async def get(self, path, params=None):
+        return await self.request('GET', path, params=params)
+
+    async def post(self, path, json=None, params=None):
+        return await self.request('POST', path, params=params, json=json)
+
+    async def put(self, path, json=None, params=None):
+        return await self.request('PUT', path, params=params, json=json)
+
+    async def delete(self, path, params=None):
+        return await self.request('DELETE', path, params=params)
+
+    # Function to run many coroutines concurrently, bounded by the client's semaphore
+    async def gather(self, coros):
+        return await asyncio.gather(*coros)
+
+    # Read API
+
+    async def get_spaces(self):
+        return (await self.get('/spaces'))['data']
+
+    async def get_folders_in_space(self, space_id):
+        return (await self.get(f'/spaces/{space_id}/folders'))['data']
+
+    async def get_subfolders(self, folder_id):
+        return (await self.get(f'/folders/{folder_id}/folders'))['data']
+
+    async def get_tasks_in_folder(self, folder_id, fields=TASK_FIELDS, page_size=DEFAULT_PAGE_SIZE):
+        params = {'fields': _json_dumps(fields)} if fields else {}
+        return [task async for task in self.iter_data(f'/folders/{folder_id}/tasks', params, page_size)]
+
+    # Async generator yielding every item of a listing page by page, following nextPageToken
+    async def iter_data(self, path, params=None, page_size=DEFAULT_PAGE_SIZE):
+        params = dict(params or {})
+        if page_size:
+            params['pageSize'] = page_size
+        while True:
+            body = await self.get(path, params=params)
+            for item in body.get('data', []):
+                yield item
+            next_page_token = body.get('nextPageToken')
+            if not next_page_token:
+                return
+            params['nextPageToken'] = next_page_token
+
+    async def get_task(self, task_id):
+        data = (await self.get(f'/tasks/{task_id}'))['data']
+        return data[0] if data else None
+
+    # Function to fetch tasks in batches of up to 100 IDs per request, in the order of the given IDs
+    async def get_tasks(self, task_ids):
+        return await self._get_batched('tasks', task_ids)
+
+    async def _get_batched(self, resource, ids):
+        ids = unique_ids(ids)
+        responses = await self.gather(self.get(f"/{resource}/{','.join(chunk)}") for chunk in chunked(ids))
+        fetched = {item['id']: item for response in responses for item in response['data']}
+        return [fetched[id_] for id_ in ids if id_ in fetched]
+
+    # Function to fetch subtasks recursively, nesting them under 'subtasks' like get_subtask_details_json
+    async def get_subtasks(self, subtask_ids):
+        subtasks = await self.get_tasks(subtask_ids)
+        return await self._attach_subtask_tree(subtasks)
+
+    async def _attach_subtask_tree(self, tasks):
+        expanded = set()
+        level = list(tasks)
+        while level:
+            level = [task for task in level if task.get('subTaskIds') and task['id'] not in expanded]
+            expanded.update(task['id'] for task in level)
+            children = await self.get_tasks(subtask_id for task in level for subtask_id in task['subTaskIds'])
+            children = {child['id']: child for child in children}
+            next_level = []
+            for task in level:
+                task['subtasks'] = [children[subtask_id] for subtask_id in task['subTaskIds'] if subtask_id in children]
+                next_level.extend(task['subtasks'])
+            level = next_level
+        return tasks
+
+    async def get_custom_fields(self, space_id=None):
+        custom_fields = (await self.get('/customfields'))['data']
+        if space_id:
+            custom_fields = [
+                field for field in custom_fields
+                if field.get('spaceId') == space_id or field.get('spaceId') is None
+            ]
+        return custom_fields
+
+    async def get_workflows(self):
+        return (await self.get('/workflows'))['data']
+
+    async def get_contacts(self):
+        return (await self.get('/contacts'))['data']
+
+    async def get_user(self, user_id):
+        data = (await self.get(f'/users/{user_id}'))['data']
+        return data[0] if data else None
+
+    # Users are fetched through /contacts, which (unlike /users) accepts multiple IDs
+    async def get_users(self, user_ids):
+        return await self._get_batched('contacts', user_ids)
+
+    # Function to get all tasks of a space, fetching every folder's task list concurrently
+    async def get_all_tasks_in_space(self, space_id, fields=TASK_FIELDS):
+        folders = await self.get_folders_in_space(space_id)
+        task_lists = await self.gather(self.get_tasks_in_folder(folder['id'], fields) for folder in folders)
+        all_tasks = {}
+        for tasks in task_lists:
+            for task in tasks:
+                all_tasks.setdefault(task['id'], task)
+        return list(all_tasks.values())
+
+    # Function to build the same structure as wrike.get_all_folders_json, concurrently
+    async def get_all_folders_json(self, workspace_id):
+        folders = await self.get_folders_in_space(workspace_id)
+        await self.gather(self._attach_folder_tasks(folder) for folder in folders)
+        return {'workspace_id': workspace_id, 'folders': folders}
+
+    async def _attach_folder_tasks(self, folder):
+        tasks = await self.get_tasks_in_folder(folder['id'])
+        folder['tasks'] = await self._attach_subtask_tree(tasks)
+
+    # Write API
+
+    async def create_folder(self, parent_id, title, project=None):
+        payload = {'title': title, 'shareds': []}
+        if project:
+            payload['project'] = project
+        return (await self.post(f'/folders/{parent_id}/folders', json=payload))['data'][0]
+
+    async def create_task(self, folder_id, payload):
+        return (await self.post(f'/folders/{folder_id}/tasks', json=payload))['data'][0]
+
+    async def create_subtask(self, parent_task_id, payload):
+        payload = dict(payload, superTasks=[parent_task_id])
+        return (await self.post('/tasks', json=payload))['data'][0]
+
+    async def update_task(self, task_id, payload):
+        return (await self.put(f'/tasks/{task_id}', json=payload))['data'][0]
+
+    async def delete_task(self, task_id):
+        return (await self.delete(f'/tasks/{task_id}'))['data']
+
+    async def delete_folder(self, folder_id):
+        return (await self.delete(f'/folders/{folder_id}'))['data']
+
+def _json_dumps(value):
+    return json.dumps(value, separators=(',', ':'))
+
+# Function to get all tasks in a space from synchronous code
+def get_all_tasks_in_space(space_id, access_token, max_concurrency=16):
+    async def run():
+        async with AsyncWrikeClient(access_token, max_concurrency=max_concurrency) as client:
+            return await client.get_all_tasks_in_space(space_id)
+    return asyncio.run(run())
+
+# Function to get all folders of a workspace with their tasks and subtasks from synchronous code
+def get_all_folders_json(workspace_id, access_token, max_concurrency=16):
+    async def run():
+        async with AsyncWrikeClient(access_token, max_concurrency=max_concurrency) as client:
+            return await client.get_all_folders_json(workspace_id)
+    return asyncio.run(run())
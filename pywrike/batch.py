@@ -0,0 +1,82 @@
+from PyWrike.client import get_client
+from PyWrike.log import http_log
+
+# The Wrike v4 API accepts up to 100 comma-separated IDs per request
+MAX_BATCH_SIZE = 100
+
+# Function to split a list of IDs into chunks of at most `size` IDs
+def chunked(ids, size=MAX_BATCH_SIZE):
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+# Function to de-duplicate IDs while keeping their original order
+def unique_ids(ids):
+    return list(dict.fromkeys(id_ for id_ in ids if id_))
+
+# Fetches tasks, folders and users by ID in batches of up to 100 IDs per request.
+#
+# Results are returned as dicts keyed by ID; IDs the API does not return
+# (deleted, no access) are simply missing from the result.
+class BatchFetcher(object):
+    def __init__(self, access_token, batch_size=MAX_BATCH_SIZE, client=None):
+        self._access_token = access_token
+        self._batch_size = min(batch_size, MAX_BATCH_SIZE)
+        self._client = client
+
+    def _fetch(self, resource, ids, params=None):
+        client = self._client or get_client()
+        results = {}
+        for chunk in chunked(unique_ids(ids), self._batch_size):
+            response = client.get(f"/{resource}/{','.join(chunk)}", self._access_token, params=params)
+            if response.status_code != 200:
+                http_log.error("Failed to get %s %s. Status Code: %s", resource, ', '.join(chunk), response.status_code)
+                continue
+            for item in response.json().get('data', []):
+                results[item['id']] = item
+        return results
+
+    def fetch_tasks(self, task_ids):
+        return self._fetch('tasks', task_ids)
+
+    def fetch_folders(self, folder_ids):
+        return self._fetch('folders', folder_ids)
+
+    # Users are resolved through /contacts, which (unlike /users) accepts multiple IDs
+    def fetch_users(self, user_ids):
+        return self._fetch('contacts', user_ids)
+
+    # Function to get tasks as a list in the order of the given IDs
+    def tasks(self, task_ids):
+        fetched = self.fetch_tasks(task_ids)
+        return [fetched[task_id] for task_id in task_ids if task_id in fetched]
+
+    # Function to fetch a whole subtask tree level by level, one request per 100 tasks per level
+    def fetch_task_tree(self, task_ids):
+        tasks = {}
+        level = unique_ids(task_ids)
+        while level:
+            fetched = self.fetch_tasks(level)
+            tasks.update(fetched)
+            level = unique_ids(
+                subtask_id
+                for task in fetched.values()
+                for subtask_id in task.get('subTaskIds', [])
+                if subtask_id not in tasks
+            )
+        return tasks
+
+# Function to nest subtasks under each task's 'subtasks' key, fetching each level in batches
+def attach_subtask_tree(tasks, fetcher):
+    expanded = set()
+    level = list(tasks)
+    while level:
+        level = [task for task in level if task.get('subTaskIds') and task['id'] not in expanded]
+        expanded.update(task['id'] for task in level)
+        children = fetcher.fetch_tasks(subtask_id for task in level for subtask_id in task['subTaskIds'])
+        next_level = []
+        for task in level:
+            task['subtasks'] = [children[subtask_id] for subtask_id in task['subTaskIds'] if subtask_id in children]
+            next_level.extend(task['subtasks'])
+        level = next_level
+    return tasks
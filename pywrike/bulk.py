@@ -0,0 +1,349 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from PyWrike.contacts import get_contact_directory
+from PyWrike.log import import_log
+from PyWrike.metrics import bind_phase, phase
+from PyWrike.paths import get_path_resolver
+from PyWrike.taskindex import TaskIndex, get_task_index, normalize_title
+from PyWrike.wrike import (
+    create_folders_by_paths,
+    create_subtask,
+    create_task,
+    get_custom_fields_by_space,
+    get_subtasks_by_task_id,
+    iter_tasks_by_folder_id,
+    iter_tasks_in_space,
+    update_subtask_with_parent,
+    update_task_with_tags,
+)
+
+# Task field -> spreadsheet column; pass columns={...} to bulk_import to override
+DEFAULT_COLUMNS = {
+    'path': 'Folder Path',
+    'parent': 'Parent Task',
+    'title': 'Title',
+    'first_names': 'First Name',
+    'last_names': 'Last Name',
+    'emails': 'Email',
+    'importance': 'Importance',
+    'description': 'Description',
+    'start_date': 'Start Date',
+    'end_date': 'End Date',
+}
+
+# Columns of the result table returned by bulk_import
+RESULT_COLUMNS = ['title', 'path', 'parent', 'folder_id', 'parent_task_id', 'task_id', 'status', 'message']
+
+# Function to read a cell, turning empty cells into None
+def _cell(row, column):
+    if column not in row:
+        return None
+    value = row[column]
+    if isinstance(value, (list, tuple)):
+        return value
+    return value if pd.notna(value) else None
+
+# Function to split a cell holding several comma-separated names or emails
+def _split_cell(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(item).strip() for item in value]
+    return [item.strip() for item in str(value).split(',')]
+
+# Imports a spreadsheet of tasks and subtasks into a space in separate phases.
+#
+# 1. every distinct folder path is resolved (and created) once,
+# 2. every distinct responsible is looked up once in the contact directory,
+# 3. the space's custom fields are loaded once and matched to the columns,
+# 4. the existing tasks of the target folders are indexed for duplicate checks,
+# 5. tasks are created level by level - top-level tasks first, then subtasks
+#    whose parents now exist - with the rows of a level created concurrently.
+#
+# Rows with the same title are always handled by the same worker in order, so
+# the duplicate rules of create_task_in_folder / create_subtask_in_parent_task
+# (reuse a task found elsewhere in the space instead of creating a copy) hold.
+class BulkImporter(object):
+    def __init__(self, space_id, access_token, columns=None, path_separator='\\', max_workers=8,
+                 create_folders=True, cached_tasks=None):
+        self.space_id = space_id
+        self.access_token = access_token
+        self.columns = dict(DEFAULT_COLUMNS, **(columns or {}))
+        self.path_separator = path_separator
+        self.max_workers = max_workers
+        self.create_folders = create_folders
+        self._cached_tasks = cached_tasks
+        self._lock = threading.Lock()
+        self.index = None
+        self.folder_ids = {}
+        self.responsible_ids = {}
+        self.custom_fields = {}
+
+    # Phase 1: resolve every distinct folder path once, creating missing folders level by level
+    def resolve_paths(self, paths):
+        paths = [path for path in dict.fromkeys(paths) if path not in self.folder_ids]
+        if self.create_folders:
+            self.folder_ids.update(create_folders_by_paths(
+                paths, self.space_id, self.access_token, path_separator=self.path_separator, max_workers=self.max_workers
+            ))
+        else:
+            resolver = get_path_resolver(self.access_token)
+            for path in paths:
+                self.folder_ids[path] = resolver.resolve(path, self.space_id, separator=self.path_separator)
+        for path in paths:
+            if not self.folder_ids.get(path):
+                import_log.warning("Folder path '%s' not found in space '%s'", path, self.space_id)
+        return self.folder_ids
+
+    # Phase 2: resolve every distinct (first name, last name, email) once, without prompting
+    def resolve_users(self, people):
+        directory = get_contact_directory(self.access_token)
+        for person in dict.fromkeys(people):
+            if person not in self.responsible_ids:
+                self.responsible_ids[person] = directory.find_id(*person) if directory is not None else None
+        return self.responsible_ids
+
+    # Phase 3: load the space's custom fields once; create_task and create_subtask reuse the cached list
+    def resolve_custom_fields(self, headings):
+        space_fields = get_custom_fields_by_space(self.access_token, self.space_id)
+        self.custom_fields = {
+            heading: space_fields[heading.strip()]['id']
+            for heading in headings
+            if isinstance(heading, str) and heading.strip() in space_fields
+        }
+        return self.custom_fields
+
+    # Phase 4: index the existing tasks of the space and of every target folder
+    def load_existing_tasks(self, folder_ids):
+        if self._cached_tasks is not None:
+            self.index = get_task_index(self._cached_tasks)
+        else:
+            self.index = TaskIndex(iter_tasks_in_space(self.space_id, self.access_token))
+
+        folder_ids = [folder_id for folder_id in dict.fromkeys(folder_ids)
+                      if folder_id and not self.index.is_folder_loaded(folder_id)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            listings = executor.map(bind_phase(lambda folder_id: list(iter_tasks_by_folder_id(folder_id, self.access_token))), folder_ids)
+            for folder_id, tasks in zip(folder_ids, listings):
+                self.index.load_folder(folder_id, tasks)
+        return self.index
+
+    def _task_data(self, row):
+        title = _cell(row, self.columns['title'])
+        task_data = {'title': str(title).strip() if title is not None else ''}
+        task_data['first_names'] = _split_cell(_cell(row, self.columns['first_names']))
+        task_data['last_names'] = _split_cell(_cell(row, self.columns['last_names']))
+        task_data['emails'] = _split_cell(_cell(row, self.columns['emails']))
+        for field in ('importance', 'description', 'start_date', 'end_date'):
+            value = _cell(row, self.columns[field])
+            if value is not None:
+                task_data[field] = value
+        for heading in self.custom_fields:
+            value = _cell(row, heading)
+            if value is not None:
+                task_data[heading] = value
+        return task_data
+
+    # Function to order the rows into levels: rows without a parent first, then their subtasks, and so on
+    def _levels(self, rows):
+        by_title = {}
+        for position, row in enumerate(rows):
+            by_title.setdefault((row['path'], normalize_title(row['task_data']['title'])), position)
+
+        depths = {}
+        for position, row in enumerate(rows):
+            chain = []
+            current = position
+            while current is not None and current not in depths and current not in chain:
+                chain.append(current)
+                parent = rows[current]['parent']
+                current = by_title.get((rows[current]['path'], normalize_title(parent))) if parent else None
+            depth = depths.get(current, -1) if current is not None and current not in chain else -1
+            for step in reversed(chain):
+                depth = depth + 1 if rows[step]['parent'] else 0
+                depths[step] = depth
+
+        levels = {}
+        for position, depth in depths.items():
+            levels.setdefault(depth, []).append(position)
+        return [sorted(levels[depth]) for depth in sorted(levels)]
+
+    def _find_parent(self, folder_id, parent_title):
+        with self._lock:
+            parent = self.index.find_in_folder(folder_id, parent_title) if folder_id else None
+            return parent or self.index.find(parent_title)
+
+    def _import_task(self, row, result):
+        folder_id = result['folder_id']
+        title = row['task_data']['title']
+        with self._lock:
+            existing = self.index.find_in_folder(folder_id, title)
+            if existing is None:
+                existing = self.index.find(title)
+                if existing is not None:
+                    self.index.add_folder(existing['id'], folder_id)
+                    result['status'] = 'linked'
+            else:
+                result['status'] = 'exists'
+        if existing is not None:
+            if result['status'] == 'linked':
+                update_task_with_tags(existing['id'], folder_id, self.access_token)
+            return existing['id']
+
+        new_task = create_task(folder_id, self.space_id, row['task_data'], row['responsible_ids'], self.access_token)
+        if not new_task or 'id' not in new_task:
+            return None
+        with self._lock:
+            self.index.add(new_task)
+            self.index.add_folder(new_task['id'], folder_id)
+        result['status'] = 'created'
+        return new_task['id']
+
+    def _import_subtask(self, row, result):
+        parent_task_id = result['parent_task_id']
+        title = row['task_data']['title']
+        with self._lock:
+            loaded = self.index.is_parent_loaded(parent_task_id)
+        if not loaded:
+            subtasks = get_subtasks_by_task_id(parent_task_id, self.access_token)
+            with self._lock:
+                self.index.load_parent(parent_task_id, subtasks)
+
+        with self._lock:
+            existing = self.index.find_in_parent(parent_task_id, title)
+            if existing is None:
+                existing = self.index.find_outside_parent(parent_task_id, title)
+                if existing is not None:
+                    self.index.add_parent(existing['id'], parent_task_id)
+                    result['status'] = 'linked'
+            else:
+                result['status'] = 'exists'
+        if existing is not None:
+            if result['status'] == 'linked':
+                update_subtask_with_parent(existing['id'], parent_task_id, self.access_token)
+            return existing['id']
+
+        new_subtask = create_subtask(parent_task_id, self.space_id, row['task_data'], row['responsible_ids'], self.access_token)
+        if not new_subtask or 'id' not in new_subtask:
+            return None
+        with self._lock:
+            self.index.add(new_subtask)
+            self.index.add_parent(new_subtask['id'], parent_task_id)
+        result['status'] = 'created'
+        return new_subtask['id']
+
+    def _import_row(self, row, result):
+        if not row['task_data']['title']:
+            result['status'] = 'failed'
+            result['message'] = "Missing task title"
+            return
+        if not result['folder_id']:
+            result['status'] = 'failed'
+            result['message'] = f"Folder path '{row['path']}' could not be resolved"
+            return
+        if row['parent']:
+            parent_task_id = row['parent_id']
+            if not parent_task_id:
+                parent = self._find_parent(result['folder_id'], row['parent'])
+                parent_task_id = parent['id'] if parent else None
+            result['parent_task_id'] = parent_task_id
+            if not parent_task_id:
+                result['status'] = 'failed'
+                result['message'] = f"Parent task '{row['parent']}' not found"
+                return
+            task_id = self._import_subtask(row, result)
+        else:
+            task_id = self._import_task(row, result)
+        result['task_id'] = task_id
+        if not task_id:
+            result['status'] = 'failed'
+            result['message'] = f"Failed to create task '{row['task_data']['title']}'"
+
+    # Function to import the rows of a dataframe and return one result row per input row
+    def run(self, dataframe):
+        columns = self.columns
+        rows = []
+        for _, record in dataframe.iterrows():
+            path = _cell(record, columns['path'])
+            parent = _cell(record, columns['parent'])
+            rows.append({
+                'path': str(path).strip() if path is not None else '',
+                'parent': str(parent).strip() if parent is not None else None,
+                'parent_id': None,
+            })
+        headings = [heading for heading in dataframe.columns if heading not in columns.values()]
+
+        import_log.debug("Resolving %s folder paths.", len(set(row['path'] for row in rows)))
+        self.resolve_paths(row['path'] for row in rows if row['path'])
+
+        import_log.debug("Loading custom fields of space '%s'.", self.space_id)
+        self.resolve_custom_fields(headings)
+
+        people = []
+        for row, (_, record) in zip(rows, dataframe.iterrows()):
+            row['task_data'] = self._task_data(record)
+            row['people'] = list(zip(row['task_data']['first_names'], row['task_data']['last_names'], row['task_data']['emails']))
+            people.extend(row['people'])
+        import_log.debug("Resolving %s responsible users.", len(set(people)))
+        self.resolve_users(people)
+
+        results = []
+        for row in rows:
+            row['responsible_ids'] = [self.responsible_ids[person] for person in row['people'] if self.responsible_ids.get(person)]
+            missing = [person[2] for person in row['people'] if not self.responsible_ids.get(person)]
+            results.append({
+                'title': row['task_data']['title'],
+                'path': row['path'],
+                'parent': row['parent'],
+                'folder_id': self.folder_ids.get(row['path']),
+                'parent_task_id': None,
+                'task_id': None,
+                'status': None,
+                'message': f"Responsible users not found: {', '.join(missing)}" if missing else None,
+            })
+
+        import_log.debug("Indexing existing tasks of %s folders.", len(set(self.folder_ids.values())))
+        self.load_existing_tasks(self.folder_ids.values())
+
+        # Rows created in this import, so subtasks find parents from the same spreadsheet
+        created = {}
+        for level in self._levels(rows):
+            for position in level:
+                row = rows[position]
+                if row['parent']:
+                    row['parent_id'] = created.get((row['path'], normalize_title(row['parent'])))
+
+            groups = {}
+            for position in level:
+                groups.setdefault(normalize_title(rows[position]['task_data']['title']), []).append(position)
+
+            def import_group(positions):
+                for position in positions:
+                    # A failing row must not abort the import: record it and go on
+                    try:
+                        self._import_row(rows[position], results[position])
+                    except Exception as e:
+                        import_log.error("Failed to import row '%s': %s", rows[position]['task_data']['title'], e)
+                        results[position]['status'] = 'failed'
+                        results[position]['message'] = str(e)
+
+            import_log.debug("Importing %s rows in %s groups.", len(level), len(groups))
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                list(executor.map(bind_phase(import_group), groups.values()))
+
+            for position in level:
+                if results[position]['task_id']:
+                    created.setdefault((rows[position]['path'], normalize_title(rows[position]['task_data']['title'])), results[position]['task_id'])
+
+        return pd.DataFrame(results, index=dataframe.index, columns=RESULT_COLUMNS)
+
+# Function to import a dataframe of tasks and subtasks into a space.
+# Returns a dataframe with the folder, parent task, task ID, status
+# ('created', 'exists', 'linked' or 'failed') and message of every row.
+@phase('bulk_import')
+def bulk_import(dataframe, space_id, access_token, columns=None, path_separator='\\', max_workers=8,
+                create_folders=True, cached_tasks=None):
+    importer = BulkImporter(space_id, access_token, columns=columns, path_separator=path_separator,
+                            max_workers=max_workers, create_folders=create_folders, cached_tasks=cached_tasks)
+    return importer.run(dataframe)
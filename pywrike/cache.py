@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+
+# Seconds an entry of each entity stays valid; anything not listed uses DEFAULT_TTL
+DEFAULT_TTLS = {
+    'customfields': 300,
+    'spaces': 600,
+    'workflows': 600,
+    'contacts': 900,
+    'folderpaths': 600,
+}
+DEFAULT_TTL = 300
+
+# Thread-safe TTL + LRU cache for rarely changing account metadata.
+#
+# Entries are keyed by (entity, key), where entity names the kind of data
+# ('customfields', 'spaces', 'workflows', ...) and key usually is the access
+# token, so different accounts never share entries. Each entity has its own
+# TTL, the least recently used entries are evicted beyond max_entries, and
+# concurrent misses for the same entry wait for a single load instead of all
+# hitting the API.
+class MetadataCache(object):
+    def __init__(self, ttls=None, default_ttl=DEFAULT_TTL, max_entries=256, clock=time.monotonic):
+        self._ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self._default_ttl = default_ttl
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+        self._hits = Counter()
+        self._misses = Counter()
+
+    def ttl(self, entity):
+        return self._ttls.get(entity, self._default_ttl)
+
+    def set_ttl(self, entity, seconds):
+        self._ttls[entity] = seconds
+
+    def _lookup(self, entity, key):
+        entry = self._entries.get((entity, key))
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[(entity, key)]
+            return False, None
+        self._entries.move_to_end((entity, key))
+        return True, value
+
+    def get(self, entity, key, default=None):
+        with self._lock:
+            found, value = self._lookup(entity, key)
+            if found:
+                self._hits[entity] += 1
+                return value
+            self._misses[entity] += 1
+            return default
+
+    def set(self, entity, key, value, ttl=None):
+        with self._lock:
+            expires_at = self._clock() + (self.ttl(entity) if ttl is None else ttl)
+            self._entries[(entity, key)] = (expires_at, value)
+            self._entries.move_to_end((entity, key))
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    # Function to return a cached value, calling loader() once to fill it on a miss.
+    # A loader result of None is returned but not cached, so failed loads are retried.
+    def get_or_load(self, entity, key, loader, ttl=None):
+        with self._lock:
+            found, value = self._lookup(entity, key)
+            if found:
+                self._hits[entity] += 1
+                return value
+            self._misses[entity] += 1
+            load_lock = self._loading.setdefault((entity, key), threading.Lock())
+
+        with load_lock:
+            # Another thread may have loaded the entry while we waited
+            with self._lock:
+                found, value = self._lookup(entity, key)
+            if found:
+                return value
+            try:
+                value = loader()
+                if value is not None:
+                    self.set(entity, key, value, ttl)
+                return value
+            finally:
+                with self._lock:
+                    self._loading.pop((entity, key), None)
+
+    # Function to drop one entry, all entries of an entity, or everything
+    def invalidate(self, entity=None, key=None):
+        with self._lock:
+            if entity is None:
+                self._entries.clear()
+            elif key is None:
+                for cache_key in [cache_key for cache_key in self._entries if cache_key[0] == entity]:
+                    del self._entries[cache_key]
+            else:
+                self._entries.pop((entity, key), None)
+
+    def stats(self):
+        with self._lock:
+            entities = set(self._hits) | set(self._misses)
+            return {
+                'size': len(self._entries),
+                'hits': sum(self._hits.values()),
+                'misses': sum(self._misses.values()),
+                'entities': {
+                    entity: {'hits': self._hits[entity], 'misses': self._misses[entity]}
+                    for entity in sorted(entities)
+                }
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self._hits.clear()
+            self._misses.clear()
+
+# Process-wide cache used by the helpers in wrike.py
+metadata_cache = MetadataCache()
@@ -0,0 +1,154 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from PyWrike.ratelimit import DEFAULT_RETRY_AFTER, get_rate_limiter
+from PyWrike.log import http_log, truncated
+from PyWrike.metrics import metrics
+
+WRIKE_API_URL = 'https://www.wrike.com/api/v4'
+# Default number of items requested per page of a paginated listing (Wrike allows up to 1000)
+DEFAULT_PAGE_SIZE = 500
+
+# Shared HTTP client for the Wrike REST API.
+#
+# All helpers in wrike.py route their calls through one WrikeClient so that
+# connections to www.wrike.com are pooled and kept alive between calls instead
+# of paying a new TCP+TLS handshake for every request. Every request first takes
+# a token from the shared rate limiter, and 429 responses are retried after the
+# wait the limiter derives from Retry-After. Requests, waits and retries are
+# recorded in PyWrike.metrics per endpoint template.
+class WrikeClient(object):
+    def __init__(self, base_url=WRIKE_API_URL, pool_connections=4, pool_maxsize=32, timeout=(10, 120),
+                 rate_limiter=None, max_retries=5):
+        self._base_url = base_url.rstrip('/')
+        self._timeout = timeout
+        self._rate_limiter = rate_limiter
+        self._max_retries = max_retries
+        self._auth_headers = {}
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        self._session.headers.update({
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+            'Content-Type': 'application/json'
+        })
+
+    @property
+    def session(self):
+        return self._session
+
+    def url(self, path):
+        if path.startswith('http://') or path.startswith('https://'):
+            return path
+        return self._base_url + '/' + path.lstrip('/')
+
+    def auth_headers(self, access_token):
+        # Header dicts are built once per token and reused for every call
+        headers = self._auth_headers.get(access_token)
+        if headers is None:
+            headers = {'Authorization': f'Bearer {access_token}'}
+            self._auth_headers[access_token] = headers
+        return headers
+
+    @property
+    def rate_limiter(self):
+        return self._rate_limiter or get_rate_limiter()
+
+    def request(self, method, path, access_token=None, params=None, json=None, headers=None, timeout=None,
+                retries=None, retry_delay=None):
+        request_headers = self.auth_headers(access_token) if access_token else {}
+        if headers:
+            request_headers = dict(request_headers, **headers)
+        retries = self._max_retries if retries is None else retries
+        limiter = self.rate_limiter
+        url = self.url(path)
+
+        attempt = 0
+        while True:
+            metrics.record_wait(method, path, limiter.acquire())
+            started = time.perf_counter()
+            try:
+                response = self._session.request(
+                    method,
+                    url,
+                    headers=request_headers,
+                    params=params,
+                    json=json,
+                    timeout=timeout if timeout is not None else self._timeout
+                )
+            except requests.exceptions.RequestException:
+                metrics.record_error(method, path)
+                raise
+            body = response.request.body if response.request is not None else None
+            metrics.record_request(
+                method, path, response.status_code, time.perf_counter() - started,
+                len(body) if body else 0, len(response.content or b'')
+            )
+            limiter.update_from_response(response.status_code, response.headers, retry_delay or DEFAULT_RETRY_AFTER)
+            if response.status_code != 429 or attempt >= retries:
+                return response
+            attempt += 1
+            metrics.record_retry(method, path)
+            http_log.warning("Rate limit exceeded for %s %s. Retrying (%s/%s)...", method, path, attempt, retries)
+            response.close()
+
+    def get(self, path, access_token=None, **kwargs):
+        return self.request('GET', path, access_token, **kwargs)
+
+    def post(self, path, access_token=None, **kwargs):
+        return self.request('POST', path, access_token, **kwargs)
+
+    def put(self, path, access_token=None, **kwargs):
+        return self.request('PUT', path, access_token, **kwargs)
+
+    def delete(self, path, access_token=None, **kwargs):
+        return self.request('DELETE', path, access_token, **kwargs)
+
+    # Function to yield every item of a listing page by page, following nextPageToken
+    def iter_data(self, path, access_token=None, params=None, page_size=DEFAULT_PAGE_SIZE, raise_errors=False):
+        params = dict(params or {})
+        if page_size:
+            params['pageSize'] = page_size
+        while True:
+            response = self.get(path, access_token, params=params)
+            if response.status_code != 200:
+                if raise_errors:
+                    response.raise_for_status()
+                http_log.error("Failed to retrieve %s. Status code: %s Response: %s", path, response.status_code, truncated(response))
+                return
+            body = response.json()
+            for item in body.get('data', []):
+                yield item
+            next_page_token = body.get('nextPageToken')
+            if not next_page_token:
+                return
+            params['nextPageToken'] = next_page_token
+
+    def close(self):
+        self._session.close()
+
+_client = None
+_client_lock = threading.Lock()
+
+# Function to get the process-wide shared client, creating it on first use
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = WrikeClient()
+    return _client
+
+# Function to replace the process-wide shared client (e.g. to tune pool sizes or timeouts)
+def set_client(client):
+    global _client
+    with _client_lock:
+        previous = _client
+        _client = client
+    if previous is not None and previous is not client:
+        previous.close()
+    return client
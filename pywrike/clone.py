@@ -0,0 +1,277 @@
+from collections import OrderedDict, namedtuple
+from PyWrike.client import get_client
+from PyWrike.batch import BatchFetcher, unique_ids
+from PyWrike.folders import FolderTree, create_folder_levels
+from PyWrike.log import clone_log
+from PyWrike.taskdetails import TaskDetailCache, task_key
+from PyWrike.wrike import create_folder_or_project, create_tasks, get_tasks_in_folder
+
+# Steps of a clone plan. Folders are referenced by their path relative to the
+# space, tasks by their 'title|due' key, so every step only depends on steps
+# planned before it.
+FolderStep = namedtuple('FolderStep', ['original_id', 'original_title', 'original_path', 'title', 'path', 'parent_path', 'project'])
+TaskStep = namedtuple('TaskStep', ['original_id', 'key', 'folder_id', 'parent_key'])
+TagStep = namedtuple('TagStep', ['key', 'folder_id'])
+
+# In-memory copy of the part of a space that is cloned: its folder tree, the
+# task list of every folder and every task reachable through subtask and
+# parent edges. Folder listings cost one paged request per folder, the other
+# tasks are fetched in batches of 100 IDs per subtask level.
+class SpaceSnapshot(object):
+    def __init__(self, paths, folders, folder_tasks, tasks):
+        self.paths = paths
+        self.folder_tree = folders if isinstance(folders, FolderTree) else FolderTree(folders)
+        self.folder_tasks = folder_tasks
+        self.tasks = tasks
+        self._task_folders = {}
+        for folder_id, task_ids in folder_tasks.items():
+            for task_id in task_ids:
+                self._task_folders.setdefault(task_id, folder_id)
+
+    @classmethod
+    def fetch(cls, paths, folders, access_token):
+        folder_tasks = OrderedDict()
+        tasks = {}
+        for path in paths:
+            listing = get_tasks_in_folder(path['id'], access_token)
+            folder_tasks[path['id']] = [task['id'] for task in listing]
+            for task in listing:
+                tasks.setdefault(task['id'], task)
+
+        # Subtasks and parents that are not in any folder listing, one batch per level
+        fetcher = BatchFetcher(access_token)
+        requested = set(tasks)
+        level = list(tasks.values())
+        while level:
+            missing = unique_ids(
+                related_id
+                for task in level
+                for related_id in task.get('subTaskIds', []) + task.get('superTaskIds', [])[:1]
+                if related_id not in requested
+            )
+            requested.update(missing)
+            fetched = fetcher.fetch_tasks(missing)
+            tasks.update(fetched)
+            level = list(fetched.values())
+
+        clone_log.debug("Snapshot: %s folders, %s tasks.", len(folder_tasks), len(tasks))
+        return cls(paths, folders, folder_tasks, tasks)
+
+    # Function to get the first folder whose listing contains the task
+    def folder_of(self, task_id):
+        return self._task_folders.get(task_id)
+
+# Ordered list of folder steps followed by task and tag steps
+class ClonePlan(object):
+    def __init__(self):
+        self.folders = []
+        self.tasks = []
+        self.new_paths = {}
+
+    def __len__(self):
+        return len(self.folders) + len(self.tasks)
+
+# Function to compute the creation plan for cloning a snapshot.
+# Folders come in path order (parents first); tasks come in folder order with
+# every parent task before its subtasks. A task whose key was already planned
+# is tagged into the additional folder instead of being created again.
+def plan_clone(snapshot, original_space_name, new_space_name):
+    plan = ClonePlan()
+    root_prefix = original_space_name + '/'
+    folder_paths = {}  # original folder ID -> relative path ('' for the space root)
+
+    for path in snapshot.paths:
+        folder_path = path['path']
+        if folder_path == original_space_name:
+            folder_paths[path['id']] = ''
+            continue
+        if folder_path.startswith(root_prefix):
+            folder_path = folder_path[len(root_prefix):]
+        parts = folder_path.strip('/').split('/')
+        for index, part in enumerate(parts):
+            relative_path = '/'.join(parts[:index + 1])
+            if relative_path in plan.new_paths:
+                continue
+            is_leaf = index == len(parts) - 1
+            folder = snapshot.folder_tree.get(path['id']) if is_leaf else None
+            plan.folders.append(FolderStep(
+                original_id=path['id'] if is_leaf else None,
+                original_title=path['title'] if is_leaf else None,
+                original_path=path['path'] if is_leaf else None,
+                title=part,
+                path=relative_path,
+                parent_path='/'.join(parts[:index]),
+                project=folder.get('project') if folder else None
+            ))
+            plan.new_paths[relative_path] = f"{new_space_name}/{relative_path}"
+        folder_paths[path['id']] = '/'.join(parts)
+
+    tasks = snapshot.tasks
+    planned = {}  # task key -> set of relative folder paths the task is in
+    visiting = set()
+
+    def visit(task_id, folder_path, is_subtask, caller_key=None):
+        task = tasks[task_id]
+        key = task_key(task)
+        parent_key = None
+        parent_ids = task.get('superTaskIds') or []
+        if parent_ids and parent_ids[0] in tasks:
+            parent = tasks[parent_ids[0]]
+            parent_key = task_key(parent)
+            if parent_key not in planned and parent['id'] not in visiting:
+                # Create the parent first, in its own folder when it has one
+                visiting.add(task_id)
+                parent_folder = folder_paths.get(snapshot.folder_of(parent['id']), folder_path)
+                visit(parent['id'], parent_folder, False)
+                visiting.discard(task_id)
+            if parent_key not in planned:
+                parent_key = None
+        if parent_key is None and is_subtask:
+            # The first parent is not in the snapshot: nest it under the task it was reached from
+            parent_key = caller_key
+        if parent_key is None and is_subtask:
+            # Without a parent or folder the task would be created in the account root
+            clone_log.warning("Skipping subtask %s: its parent task is not part of the clone.", task_id)
+            return
+
+        if key in planned:
+            if not is_subtask and folder_path not in planned[key]:
+                plan.tasks.append(TagStep(key=key, folder_id=folder_path))
+                planned[key].add(folder_path)
+            return
+
+        planned[key] = set() if is_subtask else {folder_path}
+        plan.tasks.append(TaskStep(
+            original_id=task_id,
+            key=key,
+            folder_id=None if is_subtask else folder_path,
+            parent_key=parent_key
+        ))
+        for subtask_id in task.get('subTaskIds', []):
+            if subtask_id in tasks:
+                visit(subtask_id, folder_path, True, key)
+
+    for folder_id, task_ids in snapshot.folder_tasks.items():
+        if folder_id not in folder_paths:
+            continue
+        for task_id in task_ids:
+            visit(task_id, folder_paths[folder_id], False)
+
+    return plan
+
+# Runs a clone plan with one request per created folder, created task and tag.
+#
+# After run(), folder_mapping maps original folder IDs to new folder IDs and
+# task_map maps task keys to new task IDs, as create_folders_recursively and
+# create_or_update_task track them.
+class CloneEngine(object):
+    def __init__(self, snapshot, access_token, custom_field_mapping=None, max_workers=8):
+        self.snapshot = snapshot
+        self.access_token = access_token
+        self.custom_field_mapping = custom_field_mapping or {}
+        self.max_workers = max_workers
+        self.folder_ids = {}
+        self.folder_mapping = {}
+        self.task_map = {}
+        self.new_paths_info = []
+        # Created tasks are written through, so tags never refetch them
+        self.details = TaskDetailCache(access_token, self.task_map)
+
+    def _map_custom_fields(self, task):
+        return [
+            {'id': self.custom_field_mapping[field['id']], 'value': field['value']}
+            for field in task.get('customFields', [])
+            if field['id'] in self.custom_field_mapping
+        ]
+
+    # Function to create the planned folders, each depth level concurrently once its parents exist
+    def create_folders(self, plan, root_folder_id):
+        steps = dict((step.path, step) for step in plan.folders)
+        self.folder_ids[''] = root_folder_id
+        create_folder_levels(
+            list(steps),
+            self.folder_ids,
+            lambda parent_id, title, path: create_folder_or_project(
+                title=title,
+                parent_id=parent_id,
+                access_token=self.access_token,
+                project_details=steps[path].project
+            ),
+            max_workers=self.max_workers
+        )
+        for step in plan.folders:
+            new_folder_id = self.folder_ids.get(step.path)
+            if new_folder_id is None:
+                # Tasks planned into this folder are skipped by create_task and tag_task
+                clone_log.warning("Folder '%s' was not created; skipping it and its tasks.", step.path)
+                continue
+            if step.original_id:
+                self.folder_mapping[step.original_id] = new_folder_id
+                self.new_paths_info.append({
+                    "original_folder_id": step.original_id,
+                    "original_folder_title": step.original_title,
+                    "original_folder_path": step.original_path,
+                    "new_folder_id": new_folder_id,
+                    "new_folder_path": plan.new_paths[step.path]
+                })
+
+    def create_task(self, step):
+        task = self.snapshot.tasks[step.original_id]
+        if step.parent_key and step.parent_key not in self.task_map:
+            clone_log.warning("Skipping task %s: its parent task was not created.", step.original_id)
+            return None
+        if step.folder_id is not None and self.folder_ids.get(step.folder_id) is None:
+            clone_log.warning("Skipping task %s: its folder was not created.", step.original_id)
+            return None
+        created_task = create_tasks(
+            new_folder_id=self.folder_ids[step.folder_id] if step.folder_id is not None else None,
+            task_data=task,
+            super_task_id=self.task_map.get(step.parent_key) if step.parent_key else None,
+            access_token=self.access_token,
+            mapped_custom_fields=self._map_custom_fields(task)
+        )
+        self.details.record_created(step.key, created_task[0])
+        return created_task
+
+    def tag_task(self, step):
+        task_id = self.task_map.get(step.key)
+        new_folder_id = self.folder_ids.get(step.folder_id)
+        if task_id is None or new_folder_id is None:
+            clone_log.warning("Skipping tag of task '%s': the task or its folder was not created.", step.key)
+            return
+        if new_folder_id in (self.details.get(task_id) or {}).get('parentIds', []):
+            clone_log.info("Task ID: %s is already in folder ID: %s. Skipping update.", task_id, new_folder_id)
+            return
+        clone_log.info("Updating task ID: %s with new folder ID: %s", task_id, new_folder_id)
+        response = get_client().put(f'/tasks/{task_id}', self.access_token, json={"addParents": [new_folder_id]})
+        clone_log.debug("Response Status: %s", response.status_code)
+        response.raise_for_status()
+        self.details.record_parent(task_id, new_folder_id)
+
+    def run(self, plan, root_folder_id):
+        # Folders that fail are left unmapped, so the task steps in them are skipped below
+        try:
+            self.create_folders(plan, root_folder_id)
+        except Exception as e:
+            clone_log.error("Creating the cloned folders failed: %s", e)
+        for step in plan.tasks:
+            # A failed step is logged; steps depending on it are skipped, the others still run
+            try:
+                if isinstance(step, TaskStep):
+                    self.create_task(step)
+                else:
+                    self.tag_task(step)
+            except Exception as e:
+                clone_log.error("Clone step %s failed: %s", step, e)
+        return self.new_paths_info
+
+# Function to clone the folders and tasks listed in paths below root_folder_id:
+# snapshot the source once, plan the creation order, then run the plan.
+# Returns the engine, which holds new_paths_info, folder_mapping and task_map.
+def clone_folders(paths, root_folder_id, original_space_name, new_space_name, access_token, folders, custom_field_mapping, max_workers=8):
+    snapshot = SpaceSnapshot.fetch(paths, folders, access_token)
+    plan = plan_clone(snapshot, original_space_name, new_space_name)
+    clone_log.debug("Clone plan: %s folders, %s task steps.", len(plan.folders), len(plan.tasks))
+    engine = CloneEngine(snapshot, access_token, custom_field_mapping, max_workers)
+    engine.run(plan, root_folder_id)
+    return engine
@@ -0,0 +1,73 @@
+import requests
+from PyWrike.client import get_client
+from PyWrike.cache import metadata_cache
+from PyWrike.log import http_log
+
+# In-memory index of the account's contacts.
+#
+# The contact list is downloaded once and indexed by id, by email and by
+# (first name, last name, email), so responsible lookups during imports are
+# dictionary hits instead of a /contacts download and linear scan per row.
+class ContactDirectory(object):
+    def __init__(self, contacts=()):
+        self._by_id = {}
+        self._by_email = {}
+        self._by_name_and_email = {}
+        for contact in contacts:
+            self.add(contact)
+
+    # Function to download all contacts of the account into a new directory
+    @classmethod
+    def load(cls, access_token, client=None):
+        client = client or get_client()
+        return cls(client.iter_data('/contacts', access_token, page_size=None, raise_errors=True))
+
+    def add(self, contact):
+        self._by_id[contact['id']] = contact
+        first_name = contact.get('firstName', '')
+        last_name = contact.get('lastName', '')
+        for profile in contact.get('profiles', []):
+            email = profile.get('email', '')
+            if not email:
+                continue
+            self._by_email.setdefault(email.lower(), contact)
+            self._by_name_and_email.setdefault((first_name, last_name, email), contact['id'])
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, contact_id):
+        return contact_id in self._by_id
+
+    def get(self, contact_id):
+        return self._by_id.get(contact_id)
+
+    # Function to get the contact ID matching a first name, last name and one of its profile emails
+    def find_id(self, first_name, last_name, email):
+        return self._by_name_and_email.get((first_name, last_name, email))
+
+    # Function to get a contact by email, ignoring case
+    def find_by_email(self, email):
+        return self._by_email.get(email.lower()) if email else None
+
+    # Function to get the primary email of a contact
+    def email(self, contact_id):
+        contact = self._by_id.get(contact_id)
+        if contact is None:
+            return None
+        profiles = contact.get('profiles') or [{}]
+        return profiles[0].get('email')
+
+# Function to get the shared contact directory of an account, reloading it once its TTL expires
+def get_contact_directory(access_token, refresh=False):
+    if refresh:
+        metadata_cache.invalidate('contacts', access_token)
+
+    def load():
+        try:
+            return ContactDirectory.load(access_token)
+        except requests.exceptions.RequestException as e:
+            http_log.error("Failed to retrieve contacts: %s", e)
+            return None
+
+    return metadata_cache.get_or_load('contacts', access_token, load)
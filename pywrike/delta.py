@@ -0,0 +1,166 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from PyWrike.client import get_client
+from PyWrike.batch import BatchFetcher
+from PyWrike.folders import FolderTree
+from PyWrike.log import sync_log
+from PyWrike.metrics import phase
+
+# Seconds between two full task ID listings that drop deleted tasks from the store
+DEFAULT_RECONCILE_INTERVAL = 7 * 24 * 3600
+
+# Function to get the default sync state file of a space export
+def default_state_path(space_name):
+    return f"export_{space_name.replace(' ', '_')}.sync.json"
+
+# Generator yielding the ID and updatedDate of a space's tasks and subtasks,
+# optionally only those updated at or after `since`
+def iter_task_stubs(space_id, access_token, since=None, client=None):
+    client = client or get_client()
+    params = {'subTasks': 'true'}
+    if since:
+        params['updatedDate'] = json.dumps({'start': since})
+    return client.iter_data(f'/spaces/{space_id}/tasks', access_token, params=params, raise_errors=True)
+
+# Local store of a space that is kept up to date with incremental syncs.
+#
+# The first sync downloads every task; later syncs only ask Wrike for tasks
+# whose updatedDate is at or after the saved cursor (the newest updatedDate
+# seen so far), fetch their details in batches and merge them into the store.
+# Deleted tasks do not show up in an updatedDate query, so every
+# reconcile_interval seconds the full list of task IDs is requested and tasks
+# missing from it are dropped. The store and cursor are saved to state_path
+# only after a sync succeeded.
+class SpaceSync(object):
+    def __init__(self, space_id, access_token, state_path, reconcile_interval=DEFAULT_RECONCILE_INTERVAL, client=None):
+        self.space_id = space_id
+        self.access_token = access_token
+        self.state_path = state_path
+        self.reconcile_interval = reconcile_interval
+        self._client = client
+        self.cursor = None
+        self.last_reconcile = 0
+        self.folders = []
+        self.tasks = OrderedDict()
+        self._folder_tree = None
+        self._folder_index = None
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.state_path):
+            return
+        with open(self.state_path) as f:
+            state = json.load(f, object_pairs_hook=OrderedDict)
+        if state.get('space_id') != self.space_id:
+            sync_log.warning("Ignoring sync state '%s' of another space", self.state_path)
+            return
+        self.cursor = state.get('cursor')
+        self.last_reconcile = state.get('last_reconcile', 0)
+        self.folders = state.get('folders', [])
+        self.tasks = state.get('tasks', OrderedDict())
+
+    def save(self):
+        state = {
+            'space_id': self.space_id,
+            'cursor': self.cursor,
+            'last_reconcile': self.last_reconcile,
+            'folders': self.folders,
+            'tasks': self.tasks,
+        }
+        temp_path = self.state_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.state_path)
+
+    # Function to bring the store up to date; returns the number of updated and deleted tasks
+    @phase('space_sync')
+    def sync(self, full=False):
+        started_at = time.time()
+        response = (self._client or get_client()).get(f'/spaces/{self.space_id}/folders', self.access_token)
+        response.raise_for_status()
+
+        reconcile = full or self.cursor is None or started_at - self.last_reconcile >= self.reconcile_interval
+        stubs = list(iter_task_stubs(self.space_id, self.access_token, None if reconcile else self.cursor, self._client))
+        changed_ids = [
+            stub['id'] for stub in stubs
+            if not reconcile or stub['id'] not in self.tasks
+            or stub.get('updatedDate') != self.tasks[stub['id']].get('updatedDate')
+        ]
+        details = BatchFetcher(self.access_token, client=self._client).fetch_tasks(changed_ids)
+
+        deleted = 0
+        if reconcile:
+            live_ids = set(stub['id'] for stub in stubs)
+            for task_id in [task_id for task_id in self.tasks if task_id not in live_ids]:
+                del self.tasks[task_id]
+                deleted += 1
+            self.last_reconcile = started_at
+        for task_id in changed_ids:
+            if task_id in details:
+                self.tasks[task_id] = details[task_id]
+
+        updated_dates = [stub['updatedDate'] for stub in stubs if stub.get('updatedDate')]
+        if updated_dates:
+            self.cursor = max([self.cursor] + updated_dates if self.cursor else updated_dates)
+        self.folders = response.json()['data']
+        self._folder_tree = None
+        self._folder_index = None
+        self.save()
+        sync_log.debug("Synced space %s: %s updated, %s deleted, cursor %s.", self.space_id, len(details), deleted, self.cursor)
+        return {'updated': len(details), 'deleted': deleted, 'reconciled': reconcile}
+
+    @property
+    def folder_tree(self):
+        if self._folder_tree is None:
+            self._folder_tree = FolderTree(self.folders)
+        return self._folder_tree
+
+    # Function to index the stored top-level tasks by folder, as positions in the store order.
+    # Subtasks are left out, like /folders/{id}/tasks leaves them out; they are reached
+    # through their parent's subTaskIds.
+    def _folder_positions(self):
+        if self._folder_index is None:
+            self._task_list = list(self.tasks.values())
+            self._folder_index = {}
+            for position, task in enumerate(self._task_list):
+                if task.get('superTaskIds'):
+                    continue
+                for parent_id in task.get('parentIds', []):
+                    self._folder_index.setdefault(parent_id, []).append(position)
+        return self._folder_index
+
+    # Function to get the stored top-level tasks of a folder and its subfolders, like /folders/{id}/tasks
+    def folder_tasks(self, folder_id, descendants=True):
+        index = self._folder_positions()
+        if descendants:
+            folder_ids = [folder['id'] for folder in self.folder_tree.iter_subtree(folder_id)] or [folder_id]
+        else:
+            folder_ids = [folder_id]
+        positions = sorted(set(position for folder_id in folder_ids for position in index.get(folder_id, [])))
+        return [self._task_list[position] for position in positions]
+
+    # Function to get the stored task details keyed by ID, e.g. as process_subtasks' task_cache.
+    # The task dicts are the stored ones and must not be modified.
+    def task_details(self):
+        return dict(self.tasks)
+
+    # Function to nest stored subtasks under each task's 'subtasks' key, as attach_subtask_tree does
+    def _with_subtasks(self, task, seen):
+        task = dict(task)
+        if task.get('subTaskIds'):
+            seen = seen | {task['id']}
+            task['subtasks'] = [
+                self._with_subtasks(self.tasks[subtask_id], seen)
+                for subtask_id in task['subTaskIds']
+                if subtask_id in self.tasks and subtask_id not in seen
+            ]
+        return task
+
+    # Generator yielding the folders with their tasks, in the format of wrike.iter_folders_json
+    def iter_folders_json(self):
+        for folder in self.folders:
+            folder = dict(folder)
+            folder['tasks'] = [self._with_subtasks(task, frozenset()) for task in self.folder_tasks(folder['id'])]
+            yield folder
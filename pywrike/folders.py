@@ -0,0 +1,147 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PyWrike.client import get_client
+from PyWrike.log import log
+from PyWrike.metrics import bind_phase
+
+# Snapshot of a space's folder tree built from a single /spaces/{id}/folders response.
+#
+# Wrike returns every folder of the space with its childIds, so the whole tree
+# can be indexed in memory once: folders by id, by parent, by title and by full
+# path ('Parent/Child/Grandchild'), with paths precomputed top-down instead of
+# being rebuilt through linear scans for every node.
+class FolderTree(object):
+    def __init__(self, folders, separator='/'):
+        self.source = folders
+        self.separator = separator
+        self._by_id = {}
+        self._parent_ids = {}
+        self._by_title = {}
+        for folder in folders:
+            self._by_id.setdefault(folder['id'], folder)
+            self._by_title.setdefault(folder['title'], []).append(folder['id'])
+        for folder in self._by_id.values():
+            for child_id in folder.get('childIds', []):
+                if child_id in self._by_id:
+                    self._parent_ids.setdefault(child_id, folder['id'])
+        self._root_ids = [folder_id for folder_id in self._by_id if folder_id not in self._parent_ids]
+
+        # Precompute each folder's full path along its first parent
+        self._paths = {}
+        self._by_path = {}
+        for root_id in self._root_ids:
+            for folder_id, path in self._walk(root_id, self._by_id[root_id]['title']):
+                if folder_id not in self._paths:
+                    self._paths[folder_id] = path
+                    self._by_path.setdefault(path, folder_id)
+
+    # Function to fetch the folders of a space and build the tree in one request
+    @classmethod
+    def fetch(cls, space_id, access_token, separator='/'):
+        response = get_client().get(f'/spaces/{space_id}/folders', access_token)
+        response.raise_for_status()
+        return cls(response.json()['data'], separator)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, folder_id):
+        return folder_id in self._by_id
+
+    def folders(self):
+        return list(self._by_id.values())
+
+    def roots(self):
+        return [self._by_id[folder_id] for folder_id in self._root_ids]
+
+    def get(self, folder_id):
+        return self._by_id.get(folder_id)
+
+    def parent_id(self, folder_id):
+        return self._parent_ids.get(folder_id)
+
+    def children(self, folder_id):
+        folder = self._by_id.get(folder_id)
+        if folder is None:
+            return []
+        return [self._by_id[child_id] for child_id in folder.get('childIds', []) if child_id in self._by_id]
+
+    def path(self, folder_id):
+        return self._paths.get(folder_id)
+
+    def find_by_path(self, path):
+        return self._by_path.get(path)
+
+    def find_by_title(self, title):
+        folder_ids = self._by_title.get(title)
+        return self._by_id[folder_ids[0]] if folder_ids else None
+
+    def depth(self, folder_id):
+        depth = 0
+        while folder_id in self._parent_ids:
+            folder_id = self._parent_ids[folder_id]
+            depth += 1
+        return depth
+
+    # Generator yielding (folder_id, path) for a folder and all its descendants in pre-order
+    def _walk(self, folder_id, path):
+        stack = [(folder_id, path)]
+        while stack:
+            folder_id, path = stack.pop()
+            yield folder_id, path
+            children = self.children(folder_id)
+            for child in reversed(children):
+                stack.append((child['id'], f"{path}{self.separator}{child['title']}"))
+
+    # Generator yielding a folder and all its descendants in pre-order
+    def iter_subtree(self, folder_id):
+        folder = self._by_id.get(folder_id)
+        if folder is None:
+            return
+        for descendant_id, _ in self._walk(folder_id, folder['title']):
+            yield self._by_id[descendant_id]
+
+    # Function to list the folder and its descendants as {"id", "path", "title"} entries,
+    # in the same order and format as get_titles_hierarchy
+    def titles_hierarchy(self, folder_id, path=""):
+        folder = self._by_id.get(folder_id)
+        if not folder:
+            return []
+        start_path = f"{path}{self.separator}{folder['title']}" if path else folder['title']
+        return [
+            {"id": descendant_id, "path": descendant_path, "title": self._by_id[descendant_id]["title"]}
+            for descendant_id, descendant_path in self._walk(folder_id, start_path)
+        ]
+
+# Function to create missing folders level by level.
+# `folder_ids` maps the paths that already exist to their IDs ('' is the root);
+# each path in `paths` whose ID is missing is created with
+# create_folder(parent_id, title, path), all folders of one depth concurrently,
+# once their parent level is done. Returns `folder_ids` updated with the new IDs.
+# A folder whose creator returns None or raises is recorded as None and the
+# folders below it are skipped; its siblings are still created and recorded.
+def create_folder_levels(paths, folder_ids, create_folder, separator='/', max_workers=8):
+    levels = {}
+    for path in paths:
+        parts = path.split(separator)
+        for depth in range(1, len(parts) + 1):
+            prefix = separator.join(parts[:depth])
+            if prefix not in folder_ids:
+                levels.setdefault(depth, OrderedDict())[prefix] = parts[depth - 1]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for depth in sorted(levels):
+            futures = []
+            for path, title in levels[depth].items():
+                parent_id = folder_ids.get(path.rpartition(separator)[0] if depth > 1 else '')
+                if parent_id:
+                    futures.append((path, executor.submit(bind_phase(create_folder), parent_id, title, path)))
+                else:
+                    folder_ids[path] = None
+            for path, future in futures:
+                try:
+                    folder_ids[path] = future.result()
+                except Exception as e:
+                    log.error("Failed to create folder '%s': %s", path, e)
+                    folder_ids[path] = None
+    return folder_ids
@@ -1,7 +1,17 @@
-import re
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import string
 import sys
+from PyWrike.log import http_log, truncated
+
+# HTTP methods the gateway sends; other methods make call() return (None, None)
+METHODS = ('GET', 'POST', 'PUT', 'DELETE', 'PATCH')
+
+# Function to split a path template such as '/folders/{folderId}/tasks' once into
+# (literal, field) pairs, so calls only join strings
+def compile_path(path):
+  return [(literal, field) for literal, field, _, _ in string.Formatter().parse(path)]
 
 class APIGateway(object):
   '''
@@ -14,43 +24,88 @@ class APIGateway(object):
     At a minimum, each key in self._api requires a hash with the following keys:
       'method'
       'path'
+
+  Each api is compiled on its first call (method, base URL, path template and
+  the common params merged with the api's params); requests go through one
+  pooled session per gateway.
   '''
-  def __init__(self):
+  def __init__(self, pool_connections=4, pool_maxsize=16):
     self._protocol_status = []
+    self._pool_connections = pool_connections
+    self._pool_maxsize = pool_maxsize
+    self._session = None
+    self._compiled = {}
+
+  @property
+  def session(self):
+    if self._session is None:
+      session = requests.Session()
+      adapter = HTTPAdapter(pool_connections=self._pool_connections, pool_maxsize=self._pool_maxsize)
+      session.mount('https://', adapter)
+      session.mount('http://', adapter)
+      self._session = session
+    return self._session
+
+  def close(self):
+    if self._session is not None:
+      self._session.close()
+      self._session = None
+
+  def _endpoint(self, api):
+    endpoint = self._compiled.get(api)
+    # Recompile when a subclass changed its host URL or common params (replaced or mutated in place)
+    if endpoint is None or endpoint['host_url'] != self._host_url or endpoint['common_params'] != self._common_params:
+      spec = self._api[api]
+      params = {}
+      params.update(self._common_params)
+      if spec.get('params') is not None:
+        params.update(spec['params'])
+      template = compile_path(spec['path'])
+      endpoint = {
+        'method': spec['method'],
+        'url': spec['url'] if spec.get('url') is not None else self._host_url,
+        'template': template,
+        'fields': [field for _, field in template if field is not None],
+        'params': params,
+        'valid_status': spec.get('valid_status'),
+        'host_url': self._host_url,
+        'common_params': dict(self._common_params)
+      }
+      self._compiled[api] = endpoint
+    return endpoint
 
   def call(self, api, **args):
-    params = {}
-    params.update(self._common_params)
-    if self._api[api].get('params') is not None:
-      params.update(self._api[api]['params'])
+    endpoint = self._endpoint(api)
+    params = endpoint['params']
     if args.get('params') is not None:
+      params = params.copy()
       params.update(args['params'])
 
     result = None
-    if self.method(api) == 'GET':
-      result = requests.get(self.api_full_path(api, **args), headers=self._common_headers, params=params)
-    elif self.method(api) == 'POST':
-      result = requests.post(self.api_full_path(api, **args), headers=self._common_headers, params=params, json=args.get('data'))
-    elif self.method(api) == 'PUT':
-      result = requests.put(self.api_full_path(api, **args), headers=self._common_headers, params=params, json=args.get('data'))
-    elif self.method(api) == 'DELETE':
-      result = requests.delete(self.api_full_path(api, **args), headers=self._common_headers, params=params, json=args.get('data'))
-    elif self.method(api) == 'PATCH':
-      result = requests.patch(self.api_full_path(api, **args), headers=self._common_headers, params=params, json=args.get('data'))
+    method = endpoint['method']
+    if method in METHODS:
+      result = self.session.request(
+        method,
+        self._full_path(endpoint, args),
+        headers=self._common_headers,
+        params=params,
+        json=args.get('data') if method != 'GET' else None
+      )
 
     ret = None
     status = None
     if result is not None:
-      if result.text:
-        ret = json.loads(result.text)
+      if result.content:
+        # json.loads detects the encoding of the raw bytes itself
+        ret = json.loads(result.content)
       status = result.status_code
 
+    valid_status = endpoint['valid_status']
     if status is not None and \
-    self._api[api].get('valid_status') is not None and \
-    status not in self._api[api]['valid_status'] and \
+    valid_status is not None and \
+    status not in valid_status and \
     status not in self._protocol_status:
-        print("Warning - Status: {0}".format(status))
-        print("Warning - Response: {0}".format(ret))
+        http_log.warning("Unexpected status %s from %s. Response: %s", status, api, truncated(ret))
 
     return ret, status
 
@@ -58,16 +113,18 @@ class APIGateway(object):
     return self._api.keys()
 
   def params(self, api):
-    return re.findall('\{([^\}]*)\}', self._api[api]['path'])
+    return list(self._endpoint(api)['fields'])
 
   def method(self, api):
     return self._api[api]['method']
 
+  def _full_path(self, endpoint, args):
+    parts = [endpoint['url']]
+    for literal, field in endpoint['template']:
+      parts.append(literal)
+      if field is not None:
+        parts.append(str(args[field]))
+    return ''.join(parts)
+
   def api_full_path(self, api, **args):
-    url = self._host_url
-    if self._api[api].get('url') is not None:
-      url = self._api[api]['url']
-    return ''.join([
-      url,
-      self._api[api]['path'].format(**args)
-    ])
\ No newline at end of file
+    return self._full_path(self._endpoint(api), args)
@@ -1,4 +1,5 @@
 from PyWrike.gateways.basegateway1 import APIGateway
+from PyWrike.log import auth_log
 
 import os
 import json
@@ -8,7 +9,20 @@ import socket
 import http.server 
 import re
 import threading
-import pandas as pd
+import time
+import weakref
+import asyncio
+from urllib.parse import urlsplit, urlunsplit
+
+# Seconds before expiry at which an access token is refreshed in the background
+REFRESH_MARGIN = 300
+
+# Port of the local OAuth2 callback server when the redirect URI does not name one
+DEFAULT_REDIRECT_PORT = 19877
+
+# Seconds to wait for the user to log in, and for redirect() after the code arrived
+DEFAULT_AUTH_TIMEOUT = 300
+DEFAULT_REDIRECT_TIMEOUT = 30
 
 class OAuth2CodeServer(http.server.BaseHTTPRequestHandler):
     def __init__(self, *args):
@@ -16,41 +30,92 @@ class OAuth2CodeServer(http.server.BaseHTTPRequestHandler):
         http.server.BaseHTTPRequestHandler.__init__(self, *args)
 
     def do_GET(self):
-        match = re.search('code=([\w|\-]+)', self.path)
+        match = re.search(r'code=([\w|\-]+)', self.path)
         if match is not None:
-            self.server.authentication_code = match.group(1)
-            while self.server.wait_for_redirect and self.server.redirect is None: pass
-            if self.server.wait_for_redirect:
+            self.server.set_authentication_code(match.group(1))
+            redirect = self.server.wait_for_redirect_url()
+            if redirect is not None:
                 self.send_response(301)
-                self.send_header('Location', self.server.redirect)
+                self.send_header('Location', redirect)
                 self.end_headers()
             else:
                 self.send_response(200)
                 self.end_headers()
                 self.wfile.write(b"Thank you, you can now close this window.")
-        else:
-            self.server.authentication_code = 0
+        elif 'error=' in self.path:
+            self.server.set_authentication_code(0)
             self.send_response(406)
             self.end_headers()
+        else:
+            # e.g. the browser asking for /favicon.ico; keep waiting for the callback
+            self.send_response(404)
+            self.end_headers()
 
+# One-shot HTTP server receiving the OAuth2 authorization code.
+# port=0 binds an ephemeral port, available as server.port after construction.
 class QuickSocketServer(socketserver.TCPServer):
-    def __init__(self, wait_for_redirect=False):
+    def __init__(self, wait_for_redirect=False, port=DEFAULT_REDIRECT_PORT, host="", redirect_timeout=DEFAULT_REDIRECT_TIMEOUT):
         self.authentication_code = None
         self.redirect = None
         self.wait_for_redirect = wait_for_redirect
-        socketserver.TCPServer.__init__(self, ("", 19877), OAuth2CodeServer)
+        self.redirect_timeout = redirect_timeout
+        self.code_received = threading.Event()
+        self.redirect_ready = threading.Event()
+        socketserver.TCPServer.__init__(self, (host, port), OAuth2CodeServer)
 
     def server_bind(self):
         self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.socket.bind(self.server_address)
+        self.server_address = self.socket.getsockname()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def set_authentication_code(self, code):
+        self.authentication_code = code
+        self.code_received.set()
+
+    # Function to block until the authorization code (0 on an OAuth error) arrives; None on timeout
+    def wait_for_code(self, timeout=None):
+        self.code_received.wait(timeout)
+        return self.authentication_code
+
+    def set_redirect(self, redirect):
+        self.redirect = redirect
+        self.redirect_ready.set()
+
+    # Function to block the request handler until the caller chose where to send the browser
+    def wait_for_redirect_url(self):
+        if not self.wait_for_redirect:
+            return None
+        self.redirect_ready.wait(self.redirect_timeout)
+        return self.redirect
 
 class ServerThread(threading.Thread):
     def __init__(self, httpd, **args):
         self._httpd = httpd
+        self._stopped = threading.Event()
+        args.setdefault('daemon', True)
         threading.Thread.__init__(self, **args)
 
     def run(self):
-        self._httpd.handle_request()
+        # handle_request blocks in select() for at most httpd.timeout seconds
+        self._httpd.timeout = 0.5
+        try:
+            while not self._httpd.code_received.is_set() and not self._stopped.is_set():
+                self._httpd.handle_request()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self):
+        self._stopped.set()
+
+# Function run by the refresh timer; stops once the gateway has been garbage collected
+def _background_refresh(gateway_ref):
+    gateway = gateway_ref()
+    if gateway is not None:
+        gateway._background_refresh()
 
 class _OAuth2Gateway1(APIGateway):
     def __init__(self, oauth2_url):
@@ -77,7 +142,7 @@ class _OAuth2Gateway1(APIGateway):
         }
 
 class OAuth2Gateway1(APIGateway):
-    def __init__(self, data_filepath=None, auth_info=None, tokens_updater=None, excel_filepath=None, wait_for_redirect=False):
+    def __init__(self, data_filepath=None, auth_info=None, tokens_updater=None, excel_filepath=None, wait_for_redirect=False, redirect_port=None, auth_timeout=DEFAULT_AUTH_TIMEOUT):
         APIGateway.__init__(self)
         self._common_params = {}
         self._common_headers = {}
@@ -90,6 +155,11 @@ class OAuth2Gateway1(APIGateway):
         self._tokens_updater = tokens_updater
         self._excel_filepath = excel_filepath  # New field to store Excel filepath
         self._wait_for_redirect = wait_for_redirect  # Initialize wait_for_redirect
+        self._redirect_port = redirect_port  # None: port of the redirect URI, 0: ephemeral port
+        self._auth_timeout = auth_timeout
+        self._auth_mtime = None  # mtime of the token file when it was last read or written
+        self._auth_lock = threading.RLock()
+        self._refresh_timer = None
 
         if auth_info is not None:
             self._set_auth_info(auth_info)
@@ -99,6 +169,8 @@ class OAuth2Gateway1(APIGateway):
 
     # New method to load credentials from Excel
     def _load_credentials_from_excel(self):
+        # pandas is only needed here, so it is not imported with the gateway
+        import pandas as pd
         try:
             # Assuming 'Config' sheet has 'Client ID', 'Client Secret', and 'Redirect URI' in the first row
             config_df = pd.read_excel(self._excel_filepath, sheet_name='Config', header=1)
@@ -106,17 +178,30 @@ class OAuth2Gateway1(APIGateway):
             self._oauth2_client_secret = config_df.at[0, 'Client Secret']
             self._oauth2_redirect_url = config_df.at[0, 'Redirect URI']
         except Exception as e:
-            print(f"Error loading credentials from Excel: {e}")
+            auth_log.error("Error loading credentials from Excel: %s", e)
             raise
 
     def call(self, api, **args):
         self._authenticate_client()
+        if self._token_expired():
+            # The background refresh did not run in time (e.g. the process was suspended)
+            self._refresh_client_authentication()
         result, status = super(OAuth2Gateway1, self).call(api, **args)
         if status == 401 and result['error'] == 'not_authorized':
             self._refresh_client_authentication()
             result, status = super(OAuth2Gateway1, self).call(api, **args)
         return result, status
 
+    # Function to stop the background refresh and close the pooled connections
+    def close(self):
+        with self._auth_lock:
+            if self._refresh_timer is not None:
+                self._refresh_timer.cancel()
+                self._refresh_timer = None
+            if self._oauth2_gateway is not None:
+                self._oauth2_gateway.close()
+        APIGateway.close(self)
+
     def update_common_headers(self, data):
         self._common_headers = {
             'Authorization': 'bearer {0}'.format(data['access_token'])
@@ -125,18 +210,36 @@ class OAuth2Gateway1(APIGateway):
     def redirect(self, redirect="http://www.google.com"):
         if redirect is not None:
             if self._httpd is not None:
-                self._httpd.redirect = redirect
+                self._httpd.set_redirect(redirect)
                 self._httpd = None
 
             if self._serverthread is not None:
-                self._serverthread.join()
+                self._serverthread.join(DEFAULT_REDIRECT_TIMEOUT)
                 self._serverthread = None
 
+    # Coroutine running the authorization flow (or loading the stored tokens) in an
+    # executor thread, so an event loop keeps serving while the user logs in
+    async def authenticate_async(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._authenticate_client)
+        return self._auth_info
+
+    # Returns the in-memory tokens; the token file is only read again when its mtime
+    # changed, e.g. because another process refreshed the tokens
     def get_auth_info(self):
         data = self._auth_info
-        if (data is None) and (self._data_filepath is not None) and os.path.isfile(self._data_filepath):
-            with open(self._data_filepath, 'r') as data_file:
-                data = json.load(data_file)
+        if self._data_filepath is not None:
+            try:
+                mtime = os.stat(self._data_filepath).st_mtime
+            except OSError:
+                return data
+            if data is None or mtime != self._auth_mtime:
+                with open(self._data_filepath, 'r') as data_file:
+                    data = json.load(data_file)
+                if 'expires_at' not in data and data.get('expires_in') is not None:
+                    # Tokens written by older versions: assume they were issued when the file was written
+                    data['expires_at'] = mtime + data['expires_in']
+                self._auth_mtime = mtime
         return data
 
     def _get_oauth2_gateway(self):
@@ -146,18 +249,54 @@ class OAuth2Gateway1(APIGateway):
         return self._oauth2_gateway
 
     def _authenticate_client(self):
-        auth_info = self.get_auth_info()
-        if auth_info is None:
-            auth_info = self._create_auth_info()
-        self._set_auth_info(auth_info)
+        with self._auth_lock:
+            auth_info = self.get_auth_info()
+            if auth_info is None:
+                auth_info = self._create_auth_info()
+            if auth_info is not self._auth_info:
+                self._set_auth_info(auth_info)
 
     def _set_auth_info(self, new_auth_info):
-        if self._auth_info != new_auth_info:
-            self._dump_auth_info_to_file(new_auth_info)
-            self._auth_info = new_auth_info
-            self.update_common_headers(new_auth_info)
-            if self._tokens_updater is not None:
-                self._tokens_updater.new_tokens(refresh_token=new_auth_info.get('refresh_token'), access_token=new_auth_info.get('access_token'))
+        with self._auth_lock:
+            if 'expires_at' not in new_auth_info and new_auth_info.get('expires_in') is not None:
+                new_auth_info = dict(new_auth_info, expires_at=time.time() + new_auth_info['expires_in'])
+            if self._auth_info != new_auth_info:
+                self._dump_auth_info_to_file(new_auth_info)
+                self._auth_info = new_auth_info
+                self.update_common_headers(new_auth_info)
+                self._schedule_refresh()
+                if self._tokens_updater is not None:
+                    self._tokens_updater.new_tokens(refresh_token=new_auth_info.get('refresh_token'), access_token=new_auth_info.get('access_token'))
+            else:
+                self._auth_info = new_auth_info
+
+    def _token_expired(self):
+        expires_at = (self._auth_info or {}).get('expires_at')
+        return expires_at is not None and time.time() >= expires_at
+
+    # Function to (re)start the timer that refreshes the access token REFRESH_MARGIN
+    # seconds before it expires (or at 90% of its lifetime for short-lived tokens)
+    def _schedule_refresh(self):
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+        auth_info = self._auth_info or {}
+        if auth_info.get('expires_at') is None or not auth_info.get('refresh_token'):
+            return
+        remaining = auth_info['expires_at'] - time.time()
+        delay = max(0, remaining - REFRESH_MARGIN, remaining * 0.9)
+        # The timer only holds a weak reference, so a gateway that is dropped without
+        # close() is not kept alive (and refreshing) by its own refresh loop
+        self._refresh_timer = threading.Timer(delay, _background_refresh, args=(weakref.ref(self),))
+        self._refresh_timer.daemon = True
+        self._refresh_timer.start()
+
+    def _background_refresh(self):
+        try:
+            self._refresh_client_authentication()
+        except Exception as e:
+            # The next call refreshes on expiry or on a 401 instead
+            auth_log.error("Error refreshing access token: %s", e)
 
     def _create_auth_info(self):
         # Set the OAuth2 authorization URL
@@ -169,37 +308,62 @@ class OAuth2Gateway1(APIGateway):
         
         scopes = 'Default,wsReadWrite,amReadOnlyUser,amReadWriteUser,wsReadOnly,amReadOnlyWorkflow,amReadWriteWorkflow,wsReadOnly'
 
+        # Start listening before the browser can redirect to us
+        redirect_url = urlsplit(self._oauth2_redirect_url)
+        port = self._redirect_port
+        if port is None:
+            port = redirect_url.port or DEFAULT_REDIRECT_PORT
+        self._httpd = QuickSocketServer(self._wait_for_redirect, port)
+        if self._redirect_port is not None and redirect_url.port != self._httpd.port:
+            # Ephemeral or explicitly chosen port: the redirect URI has to name the port we listen on.
+            # Otherwise the registered URI is sent unchanged.
+            netloc = f"{redirect_url.hostname}:{self._httpd.port}"
+            self._oauth2_redirect_url = urlunsplit(redirect_url._replace(netloc=netloc))
+        self._serverthread = ServerThread(self._httpd)
+        self._serverthread.start()
+
         # Open the authorization URL in the web browser
         webbrowser.open(self._oauth2_authorization_url + 
                         f'?client_id={self._oauth2_client_id}&response_type=code&redirect_uri={self._oauth2_redirect_url}&scope={scopes}')
 
-        self._httpd = QuickSocketServer(self._wait_for_redirect)
-        self._serverthread = ServerThread(self._httpd)
-        self._serverthread.start()
-        while self._httpd.authentication_code is None: pass
-        authentication_code = self._httpd.authentication_code
+        authentication_code = self._httpd.wait_for_code(self._auth_timeout)
+        if not authentication_code:
+            self._serverthread.stop()
+            self._httpd = None
+            self._serverthread = None
+            if authentication_code is None:
+                raise TimeoutError(f"No OAuth2 authorization code received within {self._auth_timeout} seconds.")
+            raise RuntimeError("OAuth2 authorization was denied.")
+        if not self._wait_for_redirect:
+            self._httpd = None
+            self._serverthread = None
 
         # Use the authentication code to get the access token
-        auth_info = self._get_oauth2_gateway().call('get_token', params={
+        auth_info, status = self._get_oauth2_gateway().call('get_token', params={
             'client_id': self._oauth2_client_id,
             'client_secret': self._oauth2_client_secret,
             'code': authentication_code,
             'redirect_uri': self._oauth2_redirect_url  # Use self._oauth2_redirect_url here as well
-        })[0]
+        })
+        if status != 200 or not auth_info or 'access_token' not in auth_info:
+            raise RuntimeError(f"Token request failed with status {status}: {auth_info}")
 
-        # Extract the access token only
-        access_token = auth_info.get('access_token')
-        return access_token
+        # Keep the refresh token and expiry along with the access token
+        return auth_info
 
     def _refresh_client_authentication(self):
-        auth_info = self._get_oauth2_gateway().call('refresh_token', params={
-            'client_id': self._oauth2_client_id,
-            'client_secret': self._oauth2_client_secret,
-            'refresh_token': self.get_auth_info()['refresh_token']
-        })[0]
-        self._set_auth_info(auth_info)
+        with self._auth_lock:
+            auth_info, status = self._get_oauth2_gateway().call('refresh_token', params={
+                'client_id': self._oauth2_client_id,
+                'client_secret': self._oauth2_client_secret,
+                'refresh_token': self.get_auth_info()['refresh_token']
+            })
+            if status != 200 or not auth_info or 'access_token' not in auth_info:
+                raise RuntimeError(f"Token refresh failed with status {status}: {auth_info}")
+            self._set_auth_info(auth_info)
 
     def _dump_auth_info_to_file(self, auth_info):
         if self._data_filepath is not None:
             with open(self._data_filepath, 'w') as outfile:
                 json.dump(auth_info, outfile)
+            self._auth_mtime = os.stat(self._data_filepath).st_mtime
@@ -0,0 +1,76 @@
+import json
+from collections.abc import Iterator
+
+# Incremental writers for space exports.
+#
+# Both writers emit each folder as soon as its tasks have been fetched and
+# flush the file after it, so memory stays bounded by a single folder and
+# the export can be followed (tail -f, jq --stream, ...) while it runs.
+
+def _newline(indent, level):
+    return '\n' + ' ' * (indent * level) if indent is not None else ''
+
+# Function to write a JSON object from (key, value) pairs.
+# Values that are iterators (e.g. generators) are written as arrays one
+# element at a time; with indent=4 the output is the same as json.dump(indent=4).
+def dump_json_stream(items, fileobj, indent=4):
+    separator = ',' if indent is not None else ', '
+    fileobj.write('{')
+    first_key = True
+    for key, value in items:
+        fileobj.write(('' if first_key else separator) + _newline(indent, 1) + json.dumps(key) + ': ')
+        first_key = False
+        if isinstance(value, Iterator):
+            fileobj.write('[')
+            empty = True
+            for element in value:
+                element_json = json.dumps(element, indent=indent)
+                if indent is not None:
+                    element_json = element_json.replace('\n', _newline(indent, 2))
+                fileobj.write(('' if empty else separator) + _newline(indent, 2) + element_json)
+                fileobj.flush()
+                empty = False
+            fileobj.write(']' if empty else _newline(indent, 1) + ']')
+        else:
+            value_json = json.dumps(value, indent=indent)
+            if indent is not None:
+                value_json = value_json.replace('\n', _newline(indent, 1))
+            fileobj.write(value_json)
+    fileobj.write(('' if first_key else _newline(indent, 0)) + '}')
+    fileobj.flush()
+
+# Function to write records as newline-delimited JSON, one compact object per line
+def dump_ndjson(records, fileobj):
+    count = 0
+    for record in records:
+        fileobj.write(json.dumps(record, separators=(',', ':')) + '\n')
+        count += 1
+        if record.get('type') == 'folder':
+            fileobj.flush()
+    fileobj.flush()
+    return count
+
+# Generator flattening a task and its nested 'subtasks' into task records
+def _iter_task_records(task, folder_id):
+    stack = [(task, None)]
+    while stack:
+        task, parent_task_id = stack.pop()
+        data = {key: value for key, value in task.items() if key != 'subtasks'}
+        yield {'type': 'task', 'folderId': folder_id, 'parentTaskId': parent_task_id, 'data': data}
+        for subtask in reversed(task.get('subtasks', [])):
+            stack.append((subtask, task['id']))
+
+# Generator turning a space export into NDJSON records of the form {"type": ..., "data": ...}:
+# a 'workspace' record, then each 'folder' followed by its 'task' records (with
+# folderId and parentTaskId), then the 'custom_field' and 'workflow' records
+def iter_space_records(workspace_id, folders, custom_fields=(), workflows=()):
+    yield {'type': 'workspace', 'data': {'workspace_id': workspace_id}}
+    for folder in folders:
+        yield {'type': 'folder', 'data': {key: value for key, value in folder.items() if key != 'tasks'}}
+        for task in folder.get('tasks', []):
+            for record in _iter_task_records(task, folder['id']):
+                yield record
+    for custom_field in custom_fields:
+        yield {'type': 'custom_field', 'data': custom_field}
+    for workflow in workflows:
+        yield {'type': 'workflow', 'data': workflow}
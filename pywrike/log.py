@@ -0,0 +1,45 @@
+import json
+import logging
+
+# Logger hierarchy; configure "pywrike" to control all of them at once, e.g.
+# logging.getLogger("pywrike").setLevel(logging.DEBUG)
+log = logging.getLogger('pywrike')
+http_log = logging.getLogger('pywrike.http')
+auth_log = logging.getLogger('pywrike.auth')
+export_log = logging.getLogger('pywrike.export')
+import_log = logging.getLogger('pywrike.import')
+clone_log = logging.getLogger('pywrike.clone')
+sync_log = logging.getLogger('pywrike.sync')
+
+# Longest payload or response body written to a log record, in characters
+MAX_PAYLOAD_CHARS = 1000
+
+# Log argument that renders a payload, JSON value or response only when the record
+# is emitted, cut to MAX_PAYLOAD_CHARS characters. Pass the response object itself
+# rather than response.text, so the body is not decoded for disabled records.
+class truncated(object):
+    __slots__ = ('value', 'limit')
+
+    def __init__(self, value, limit=None):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self):
+        value = self.value
+        if hasattr(value, 'status_code') and hasattr(value, 'content'):
+            value = value.content
+        if isinstance(value, bytes):
+            text = value.decode('utf-8', 'replace')
+        elif isinstance(value, str):
+            text = value
+        else:
+            try:
+                text = json.dumps(value, default=str, ensure_ascii=False)
+            except (TypeError, ValueError):
+                text = repr(value)
+        limit = self.limit or MAX_PAYLOAD_CHARS
+        if len(text) > limit:
+            return f"{text[:limit]}... ({len(text) - limit} more characters)"
+        return text
+
+    __repr__ = __str__
@@ -0,0 +1,228 @@
+import contextvars
+import re
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Phase label of requests sent outside any phase()
+DEFAULT_PHASE = 'none'
+
+# Wrike IDs are upper-case alphanumeric strings such as IEAAAAAQI4AAAAAB
+_ID_SEGMENT = re.compile(r'^[A-Z0-9]{8,}$')
+_API_PREFIX = re.compile(r'^https?://[^/]+(/api/v\d+)?')
+
+_phase = contextvars.ContextVar('pywrike_phase', default=DEFAULT_PHASE)
+
+# Function to turn a request path or URL into its endpoint template, e.g.
+# '/folders/IEAAAAAQI4AAAAAB/tasks' -> '/folders/{id}/tasks' and
+# '/tasks/IEA1,IEA2' -> '/tasks/{ids}', so metrics are not split per ID
+@lru_cache(maxsize=4096)
+def endpoint_template(path):
+    path = _API_PREFIX.sub('', path.split('?', 1)[0])
+    segments = []
+    for segment in path.strip('/').split('/'):
+        if ',' in segment and all(_ID_SEGMENT.match(part) for part in segment.split(',')):
+            segments.append('{ids}')
+        elif _ID_SEGMENT.match(segment):
+            segments.append('{id}')
+        else:
+            segments.append(segment)
+    return '/' + '/'.join(segments)
+
+def current_phase():
+    return _phase.get()
+
+# Context manager (also usable as a decorator) labelling the requests sent
+# inside it with a phase, e.g. with phase('export'): ...
+# The innermost phase wins; coroutines inherit the phase of the code that
+# created them, worker threads get it through bind_phase.
+@contextmanager
+def phase(name):
+    token = _phase.set(name)
+    try:
+        yield name
+    finally:
+        _phase.reset(token)
+
+# Function to wrap a callable handed to a thread pool so it runs in the caller's phase
+def bind_phase(fn):
+    name = _phase.get()
+
+    def run(*args, **kwargs):
+        token = _phase.set(name)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _phase.reset(token)
+    return run
+
+class _EndpointStats(object):
+    __slots__ = ('requests', 'errors', 'statuses', 'bytes_sent', 'bytes_received', 'retries',
+                 'rate_limited', 'wait_seconds', 'latency_sum', 'latency_buckets')
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.statuses = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.wait_seconds = 0.0
+        self.latency_sum = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def as_dict(self):
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), self.latency_buckets):
+            cumulative += count
+            buckets['+Inf' if bound == float('inf') else bound] = cumulative
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'statuses': dict(self.statuses),
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'retries': self.retries,
+            'rate_limited': self.rate_limited,
+            'wait_seconds': self.wait_seconds,
+            'latency_sum': self.latency_sum,
+            'latency_buckets': buckets,
+        }
+
+# Request counters, byte counts, status codes, retries, 429s, rate limiter waits
+# and latency histograms per (phase, method, endpoint template).
+#
+# The clients call the record_* methods for every request; as_dict() gives a
+# nested {phase: {'METHOD /endpoint': stats}} snapshot and to_prometheus() the
+# same data in the Prometheus text exposition format.
+class RequestMetrics(object):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.enabled = True
+
+    def _entry(self, method, path):
+        key = (_phase.get(), method, endpoint_template(path))
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats.setdefault(key, _EndpointStats())
+        return stats
+
+    # Function to record a completed request (including ones answered with 429)
+    def record_request(self, method, path, status, elapsed, bytes_sent=0, bytes_received=0):
+        if not self.enabled:
+            return
+        bucket = len(LATENCY_BUCKETS)
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if elapsed <= bound:
+                bucket = index
+                break
+        with self._lock:
+            stats = self._entry(method, path)
+            stats.requests += 1
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.bytes_sent += bytes_sent
+            stats.bytes_received += bytes_received
+            stats.latency_sum += elapsed
+            stats.latency_buckets[bucket] += 1
+            if status == 429:
+                stats.rate_limited += 1
+
+    # Function to record a request that raised instead of returning a response
+    def record_error(self, method, path):
+        if self.enabled:
+            with self._lock:
+                self._entry(method, path).errors += 1
+
+    def record_retry(self, method, path):
+        if self.enabled:
+            with self._lock:
+                self._entry(method, path).retries += 1
+
+    # Function to record time a request spent waiting for the rate limiter
+    def record_wait(self, method, path, seconds):
+        if self.enabled and seconds:
+            with self._lock:
+                self._entry(method, path).wait_seconds += seconds
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    def as_dict(self):
+        with self._lock:
+            items = [(key, stats.as_dict()) for key, stats in self._stats.items()]
+        result = {}
+        for (phase_name, method, endpoint), stats in sorted(items, key=lambda item: item[0]):
+            result.setdefault(phase_name, {})[f"{method} {endpoint}"] = stats
+        return result
+
+    # Function to roll the stats of every endpoint up per phase
+    def totals(self):
+        totals = {}
+        for phase_name, endpoints in self.as_dict().items():
+            total = totals.setdefault(phase_name, {
+                'requests': 0, 'errors': 0, 'bytes_sent': 0, 'bytes_received': 0,
+                'retries': 0, 'rate_limited': 0, 'wait_seconds': 0.0, 'latency_sum': 0.0
+            })
+            for stats in endpoints.values():
+                for name in total:
+                    total[name] += stats[name]
+        return totals
+
+    def to_prometheus(self, prefix='pywrike'):
+        with self._lock:
+            items = sorted((key, stats.as_dict()) for key, stats in self._stats.items())
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            lines.extend(samples)
+
+        def labels(key, **extra):
+            phase_name, method, endpoint = key
+            pairs = [('phase', phase_name), ('method', method), ('endpoint', endpoint)] + sorted(extra.items())
+            return '{' + ','.join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + '}'
+
+        family('requests_total', 'counter', 'Wrike API requests by response status.', [
+            f"{prefix}_requests_total{labels(key, status=status)} {count}"
+            for key, stats in items for status, count in sorted(stats['statuses'].items())
+        ])
+        for name, field, help_text in [
+            ('request_errors_total', 'errors', 'Wrike API requests that raised before a response.'),
+            ('request_retries_total', 'retries', 'Wrike API requests retried after a 429 response.'),
+            ('rate_limited_total', 'rate_limited', 'Wrike API responses with status 429.'),
+            ('request_bytes_total', 'bytes_sent', 'Request body bytes sent to the Wrike API.'),
+            ('response_bytes_total', 'bytes_received', 'Response body bytes received from the Wrike API.'),
+            ('rate_limit_wait_seconds_total', 'wait_seconds', 'Seconds spent waiting for the rate limiter.'),
+        ]:
+            family(name, 'counter', help_text, [
+                f"{prefix}_{name}{labels(key)} {_number(stats[field])}" for key, stats in items
+            ])
+
+        samples = []
+        for key, stats in items:
+            for bound, count in stats['latency_buckets'].items():
+                samples.append(f"{prefix}_request_duration_seconds_bucket{labels(key, le=bound)} {count}")
+            samples.append(f"{prefix}_request_duration_seconds_sum{labels(key)} {_number(stats['latency_sum'])}")
+            samples.append(f"{prefix}_request_duration_seconds_count{labels(key)} {stats['requests']}")
+        family('request_duration_seconds', 'histogram', 'Wrike API request latency.', samples)
+        return '\n'.join(lines) + '\n'
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+# Process-wide metrics the clients record into
+metrics = RequestMetrics()
+
+def get_metrics():
+    return metrics
@@ -0,0 +1,328 @@
+import json
+import sqlite3
+import threading
+import time
+from PyWrike.client import get_client
+from PyWrike.batch import BatchFetcher
+from PyWrike.folders import FolderTree
+from PyWrike.delta import DEFAULT_RECONCILE_INTERVAL, iter_task_stubs
+from PyWrike.log import sync_log
+from PyWrike.metrics import phase
+from PyWrike.wrike import get_cached_metadata
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS spaces (
+    id TEXT PRIMARY KEY,
+    title TEXT,
+    cursor TEXT,
+    last_reconcile REAL DEFAULT 0,
+    synced_at REAL,
+    data TEXT
+);
+CREATE TABLE IF NOT EXISTS folders (
+    id TEXT PRIMARY KEY,
+    space_id TEXT,
+    parent_id TEXT,
+    title TEXT,
+    path TEXT,
+    is_project INTEGER,
+    data TEXT
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    space_id TEXT,
+    title TEXT,
+    status TEXT,
+    importance TEXT,
+    custom_status_id TEXT,
+    start_date TEXT,
+    due_date TEXT,
+    created_date TEXT,
+    updated_date TEXT,
+    data TEXT
+);
+CREATE TABLE IF NOT EXISTS task_folders (
+    task_id TEXT,
+    folder_id TEXT,
+    PRIMARY KEY (task_id, folder_id)
+);
+CREATE TABLE IF NOT EXISTS subtasks (
+    parent_id TEXT,
+    task_id TEXT,
+    position INTEGER,
+    PRIMARY KEY (parent_id, task_id)
+);
+CREATE TABLE IF NOT EXISTS task_responsibles (
+    task_id TEXT,
+    user_id TEXT,
+    PRIMARY KEY (task_id, user_id)
+);
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    first_name TEXT,
+    last_name TEXT,
+    email TEXT,
+    data TEXT
+);
+CREATE TABLE IF NOT EXISTS custom_fields (
+    id TEXT PRIMARY KEY,
+    title TEXT,
+    type TEXT,
+    space_id TEXT,
+    data TEXT
+);
+CREATE TABLE IF NOT EXISTS custom_field_values (
+    task_id TEXT,
+    field_id TEXT,
+    value TEXT,
+    PRIMARY KEY (task_id, field_id)
+);
+CREATE INDEX IF NOT EXISTS idx_folders_parent ON folders (parent_id);
+CREATE INDEX IF NOT EXISTS idx_folders_title ON folders (title);
+CREATE INDEX IF NOT EXISTS idx_folders_path ON folders (space_id, path);
+CREATE INDEX IF NOT EXISTS idx_tasks_title ON tasks (title COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_tasks_updated ON tasks (updated_date);
+CREATE INDEX IF NOT EXISTS idx_tasks_space ON tasks (space_id);
+CREATE INDEX IF NOT EXISTS idx_task_folders_folder ON task_folders (folder_id);
+CREATE INDEX IF NOT EXISTS idx_subtasks_task ON subtasks (task_id);
+CREATE INDEX IF NOT EXISTS idx_task_responsibles_user ON task_responsibles (user_id);
+CREATE INDEX IF NOT EXISTS idx_users_email ON users (email COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_custom_fields_title ON custom_fields (title);
+CREATE INDEX IF NOT EXISTS idx_custom_field_values_field ON custom_field_values (field_id);
+"""
+
+# Optional local SQLite mirror of spaces, folders, tasks, users and custom fields.
+#
+# sync_space() fills the mirror from the API: the first time with every task of
+# the space, afterwards only with tasks updated since the space's cursor (with
+# a periodic full ID listing to drop deleted tasks), like delta.SpaceSync. The
+# read helpers return the same dicts as the API helpers in wrike.py, so
+# scripts and reports can run against the mirror instead of the network.
+class WrikeMirror(object):
+    def __init__(self, path='wrike_mirror.sqlite3', access_token=None, reconcile_interval=DEFAULT_RECONCILE_INTERVAL, client=None):
+        self.path = path
+        self.access_token = access_token
+        self.reconcile_interval = reconcile_interval
+        self._client = client
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    # Function to run a read-only SQL query against the mirror, e.g. for reports
+    def query(self, sql, params=()):
+        with self._lock:
+            return [dict(row) for row in self._connection.execute(sql, params).fetchall()]
+
+    # Sync
+
+    # Function to mirror a space; returns the number of updated and deleted tasks
+    @phase('mirror_sync')
+    def sync_space(self, space_id, access_token=None, full=False):
+        access_token = access_token or self.access_token
+        client = self._client or get_client()
+        started_at = time.time()
+
+        space_response = client.get(f'/spaces/{space_id}', access_token)
+        space_response.raise_for_status()
+        space = space_response.json()['data'][0]
+        folders_response = client.get(f'/spaces/{space_id}/folders', access_token)
+        folders_response.raise_for_status()
+        folders = folders_response.json()['data']
+
+        state = self.query('SELECT cursor, last_reconcile FROM spaces WHERE id = ?', (space_id,))
+        cursor = state[0]['cursor'] if state else None
+        last_reconcile = state[0]['last_reconcile'] if state else 0
+        reconcile = full or cursor is None or started_at - (last_reconcile or 0) >= self.reconcile_interval
+
+        stubs = list(iter_task_stubs(space_id, access_token, None if reconcile else cursor, client))
+        if reconcile:
+            known = dict((row['id'], row['updated_date']) for row in self.query('SELECT id, updated_date FROM tasks WHERE space_id = ?', (space_id,)))
+            changed_ids = [stub['id'] for stub in stubs if known.get(stub['id']) != stub.get('updatedDate')]
+        else:
+            changed_ids = [stub['id'] for stub in stubs]
+        fetcher = BatchFetcher(access_token, client=client)
+        tasks = fetcher.fetch_tasks(changed_ids)
+
+        # Users referenced by the tasks that are not mirrored yet
+        user_ids = set(user_id for task in tasks.values() for user_id in task.get('responsibleIds', []))
+        known_users = set(row['id'] for row in self.query('SELECT id FROM users'))
+        users = fetcher.fetch_users(user_id for user_id in user_ids if user_id not in known_users)
+        custom_fields = get_cached_metadata('customfields', access_token) or []
+
+        updated_dates = [stub['updatedDate'] for stub in stubs if stub.get('updatedDate')]
+        if updated_dates:
+            cursor = max(updated_dates + ([cursor] if cursor else []))
+
+        deleted = 0
+        with self._lock, self._connection:
+            connection = self._connection
+            if reconcile:
+                live_ids = set(stub['id'] for stub in stubs)
+                stale_ids = [row[0] for row in connection.execute('SELECT id FROM tasks WHERE space_id = ?', (space_id,)) if row[0] not in live_ids]
+                for task_id in stale_ids:
+                    self._delete_task(task_id)
+                deleted = len(stale_ids)
+            self._write_folders(space_id, folders)
+            for task in tasks.values():
+                self._write_task(space_id, task)
+            for user in users.values():
+                self._write_user(user)
+            for field in custom_fields:
+                self._write_custom_field(field)
+            connection.execute(
+                'INSERT OR REPLACE INTO spaces (id, title, cursor, last_reconcile, synced_at, data) VALUES (?, ?, ?, ?, ?, ?)',
+                (space_id, space.get('title'), cursor, started_at if reconcile else last_reconcile, started_at, json.dumps(space))
+            )
+
+        sync_log.debug("Mirrored space %s: %s updated, %s deleted, %s folders.", space_id, len(tasks), deleted, len(folders))
+        return {'updated': len(tasks), 'deleted': deleted, 'reconciled': reconcile}
+
+    def _write_folders(self, space_id, folders):
+        tree = FolderTree(folders)
+        connection = self._connection
+        connection.execute('DELETE FROM folders WHERE space_id = ?', (space_id,))
+        connection.executemany(
+            'INSERT OR REPLACE INTO folders (id, space_id, parent_id, title, path, is_project, data) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [
+                (folder['id'], space_id, tree.parent_id(folder['id']), folder['title'], tree.path(folder['id']),
+                 1 if folder.get('project') else 0, json.dumps(folder))
+                for folder in tree.folders()
+            ]
+        )
+
+    def _delete_task(self, task_id):
+        connection = self._connection
+        for table, column in (('tasks', 'id'), ('task_folders', 'task_id'), ('subtasks', 'parent_id'),
+                              ('task_responsibles', 'task_id'), ('custom_field_values', 'task_id')):
+            connection.execute(f'DELETE FROM {table} WHERE {column} = ?', (task_id,))
+
+    def _write_task(self, space_id, task):
+        self._delete_task(task['id'])
+        dates = task.get('dates', {})
+        connection = self._connection
+        connection.execute(
+            'INSERT INTO tasks (id, space_id, title, status, importance, custom_status_id, start_date, due_date, created_date, updated_date, data) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (task['id'], space_id, task.get('title'), task.get('status'), task.get('importance'), task.get('customStatusId'),
+             dates.get('start'), dates.get('due'), task.get('createdDate'), task.get('updatedDate'), json.dumps(task))
+        )
+        connection.executemany('INSERT OR IGNORE INTO task_folders (task_id, folder_id) VALUES (?, ?)',
+                               [(task['id'], folder_id) for folder_id in task.get('parentIds', [])])
+        connection.executemany('INSERT OR IGNORE INTO subtasks (parent_id, task_id, position) VALUES (?, ?, ?)',
+                               [(task['id'], subtask_id, position) for position, subtask_id in enumerate(task.get('subTaskIds', []))])
+        connection.executemany('INSERT OR IGNORE INTO task_responsibles (task_id, user_id) VALUES (?, ?)',
+                               [(task['id'], user_id) for user_id in task.get('responsibleIds', [])])
+        connection.executemany('INSERT OR REPLACE INTO custom_field_values (task_id, field_id, value) VALUES (?, ?, ?)',
+                               [(task['id'], field['id'], field.get('value')) for field in task.get('customFields', [])])
+
+    def _write_user(self, user):
+        profiles = user.get('profiles') or [{}]
+        self._connection.execute(
+            'INSERT OR REPLACE INTO users (id, first_name, last_name, email, data) VALUES (?, ?, ?, ?, ?)',
+            (user['id'], user.get('firstName'), user.get('lastName'), profiles[0].get('email'), json.dumps(user))
+        )
+
+    def _write_custom_field(self, field):
+        space_id = field.get('spaceId')
+        self._connection.execute(
+            'INSERT OR REPLACE INTO custom_fields (id, title, type, space_id, data) VALUES (?, ?, ?, ?, ?)',
+            (field['id'], field.get('title'), field.get('type'),
+             space_id if space_id is None or isinstance(space_id, str) else json.dumps(space_id), json.dumps(field))
+        )
+
+    # Read helpers
+
+    def _load(self, sql, params=()):
+        return [json.loads(row['data']) for row in self.query(sql, params)]
+
+    def get_spaces(self):
+        return self._load('SELECT data FROM spaces ORDER BY title')
+
+    def get_space_id_by_name(self, space_name):
+        rows = self.query('SELECT id FROM spaces WHERE title = ?', (space_name,))
+        return rows[0]['id'] if rows else None
+
+    def get_folders_in_space(self, space_id):
+        return self._load('SELECT data FROM folders WHERE space_id = ? ORDER BY rowid', (space_id,))
+
+    # Function to get a folder ID by its path, with the path separator of wrike.get_folder_id_by_path
+    def get_folder_id_by_path(self, folder_path, space_id, path_separator='\\'):
+        # The space's root folder has the ID of the space
+        parent_id = space_id
+        for name in [part.strip() for part in folder_path.strip().split(path_separator) if part.strip()]:
+            rows = self.query('SELECT id FROM folders WHERE parent_id = ? AND title = ? ORDER BY rowid LIMIT 1', (parent_id, name))
+            if not rows:
+                return None
+            parent_id = rows[0]['id']
+        return parent_id
+
+    def get_task(self, task_id):
+        tasks = self._load('SELECT data FROM tasks WHERE id = ?', (task_id,))
+        return tasks[0] if tasks else None
+
+    # Function to get the tasks directly in a folder, or also in its subfolders like /folders/{id}/tasks
+    def get_tasks_in_folder(self, folder_id, descendants=True):
+        if not descendants:
+            return self._load(
+                'SELECT t.data FROM tasks t JOIN task_folders f ON f.task_id = t.id WHERE f.folder_id = ? ORDER BY t.rowid',
+                (folder_id,)
+            )
+        return self._load(
+            'WITH RECURSIVE subtree(id) AS (SELECT ? UNION SELECT folders.id FROM folders JOIN subtree ON folders.parent_id = subtree.id) '
+            'SELECT t.data FROM tasks t WHERE t.id IN (SELECT task_id FROM task_folders WHERE folder_id IN (SELECT id FROM subtree)) ORDER BY t.rowid',
+            (folder_id,)
+        )
+
+    def get_subtasks(self, task_id):
+        return self._load(
+            'SELECT t.data FROM tasks t JOIN subtasks s ON s.task_id = t.id WHERE s.parent_id = ? ORDER BY s.position',
+            (task_id,)
+        )
+
+    # Function to find tasks by title, ignoring case, optionally within one space
+    def find_tasks_by_title(self, title, space_id=None):
+        if space_id:
+            return self._load('SELECT data FROM tasks WHERE title = ? COLLATE NOCASE AND space_id = ? ORDER BY rowid', (title.strip(), space_id))
+        return self._load('SELECT data FROM tasks WHERE title = ? COLLATE NOCASE ORDER BY rowid', (title.strip(),))
+
+    def get_tasks_updated_since(self, updated_date, space_id=None):
+        if space_id:
+            return self._load('SELECT data FROM tasks WHERE updated_date >= ? AND space_id = ? ORDER BY updated_date', (updated_date, space_id))
+        return self._load('SELECT data FROM tasks WHERE updated_date >= ? ORDER BY updated_date', (updated_date,))
+
+    def get_user(self, user_id):
+        users = self._load('SELECT data FROM users WHERE id = ?', (user_id,))
+        return users[0] if users else None
+
+    def get_user_email(self, user_id):
+        rows = self.query('SELECT email FROM users WHERE id = ?', (user_id,))
+        return rows[0]['email'] if rows else None
+
+    def get_custom_fields(self):
+        return self._load('SELECT data FROM custom_fields ORDER BY title')
+
+    # Function to get the custom field values of a task as {field title: value}
+    def get_custom_field_values(self, task_id):
+        rows = self.query(
+            'SELECT COALESCE(c.title, v.field_id) AS title, v.value FROM custom_field_values v '
+            'LEFT JOIN custom_fields c ON c.id = v.field_id WHERE v.task_id = ?',
+            (task_id,)
+        )
+        return dict((row['title'], row['value']) for row in rows)
+
+# Function to open (or create) a mirror database and sync a space into it
+def sync_space(space_id, access_token, path='wrike_mirror.sqlite3', full=False):
+    mirror = WrikeMirror(path, access_token)
+    mirror.sync_space(space_id, full=full)
+    return mirror
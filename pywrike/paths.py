@@ -0,0 +1,123 @@
+import threading
+from PyWrike.client import get_client
+from PyWrike.cache import metadata_cache
+from PyWrike.log import http_log, truncated
+
+class _PathNode(object):
+    __slots__ = ('folder_id', 'children', 'listing')
+
+    def __init__(self, folder_id):
+        self.folder_id = folder_id
+        self.children = {}
+        self.listing = None
+
+# Resolves folder paths such as 'Projects\\2024\\Q1' to folder IDs.
+#
+# Resolved prefixes are kept in a trie of path segments, so rows that share a
+# prefix reuse it and each distinct parent's folder listing is downloaded at
+# most once. Folders created through the resolver (or reported with record())
+# are written through into the trie, so later rows find them without another
+# request.
+class FolderPathResolver(object):
+    def __init__(self, access_token, separator='\\', client=None):
+        self._access_token = access_token
+        self._separator = separator
+        self._client = client
+        self._roots = {}
+        self._nodes = {}
+        self._lock = threading.RLock()
+        # Number of folder listings requested from the API
+        self.lookups = 0
+
+    # Function to split a path into folder titles. With strip=False the segments are
+    # kept verbatim, so titles with leading or trailing spaces match exactly.
+    def split(self, path, separator=None, strip=True):
+        if not strip:
+            return path.split(separator or self._separator)
+        parts = path.strip().split(separator or self._separator)
+        return [part.strip() for part in parts if part.strip()]
+
+    def _root(self, space_id):
+        node = self._roots.get(space_id)
+        if node is None:
+            node = _PathNode(space_id)
+            self._roots[space_id] = node
+            self._nodes.setdefault(space_id, node)
+        return node
+
+    def _node(self, folder_id):
+        node = self._nodes.get(folder_id)
+        if node is None:
+            node = _PathNode(folder_id)
+            self._nodes[folder_id] = node
+        return node
+
+    # Top-level folders are looked up in the space listing, subfolders in their parent's listing
+    def _listing(self, node, is_space):
+        if node.listing is None:
+            client = self._client or get_client()
+            if is_space:
+                endpoint = f'/spaces/{node.folder_id}/folders'
+            else:
+                endpoint = f'/folders/{node.folder_id}/folders'
+            response = client.get(endpoint, self._access_token)
+            self.lookups += 1
+            if response.status_code != 200:
+                http_log.error("Failed to retrieve folders in %s. Status code: %s Response: %s", node.folder_id, response.status_code, truncated(response))
+                return {}
+            node.listing = {}
+            for folder in response.json().get('data', []):
+                node.listing.setdefault(folder['title'], folder['id'])
+        return node.listing
+
+    def _child(self, node, name, is_space, create_folder=None):
+        child = node.children.get(name)
+        if child is not None:
+            return child
+        child_id = self._listing(node, is_space).get(name)
+        if not child_id and create_folder is not None:
+            child_id = create_folder(node.folder_id, name)
+            if child_id:
+                self._record(node, name, child_id)
+        if not child_id:
+            return None
+        child = self._node(child_id)
+        node.children[name] = child
+        return child
+
+    def _record(self, node, name, folder_id):
+        if node.listing is not None:
+            node.listing.setdefault(name, folder_id)
+        node.children.setdefault(name, self._node(folder_id))
+
+    # Function to resolve a path in a space to a folder ID.
+    # Missing folders are created with create_top_level_folder(space_id, name) and
+    # create_folder(parent_id, name) when given, otherwise None is returned.
+    def resolve(self, path, space_id, create_folder=None, create_top_level_folder=None, separator=None, strip=True):
+        with self._lock:
+            node = self._root(space_id)
+            for index, name in enumerate(self.split(path, separator, strip)):
+                node = self._child(node, name, index == 0, create_top_level_folder if index == 0 else create_folder)
+                if node is None:
+                    return None
+            return node.folder_id if node.folder_id != space_id else None
+
+    # Function to find a subfolder by name in a parent folder, using the cached listing
+    def child_id(self, parent_folder_id, name):
+        with self._lock:
+            child = self._child(self._node(parent_folder_id), name, False)
+            return child.folder_id if child is not None else None
+
+    # Function to record a newly created folder so later lookups find it without a request
+    def record(self, parent_folder_id, name, folder_id):
+        with self._lock:
+            self._record(self._node(parent_folder_id), name, folder_id)
+
+    def invalidate(self):
+        with self._lock:
+            self._roots.clear()
+            self._nodes.clear()
+
+# Function to get the shared path resolver of an account
+def get_path_resolver(access_token):
+    return metadata_cache.get_or_load('folderpaths', access_token, lambda: FolderPathResolver(access_token))
@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Wrike allows 400 requests per minute per user; stay slightly below that by default
+DEFAULT_REQUESTS_PER_MINUTE = 380
+DEFAULT_BURST = 20
+# Wait used for a 429 that carries no Retry-After or rate-limit reset header
+DEFAULT_RETRY_AFTER = 60
+
+# Function to parse a Retry-After header (delta-seconds or HTTP date) into seconds
+def parse_retry_after(value):
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+def _header(headers, name):
+    value = headers.get(name)
+    if value is None:
+        value = headers.get(name.lower())
+    return value
+
+# Token-bucket rate limiter shared by every request of the process.
+#
+# Each request takes one token; tokens refill at requests_per_minute / 60 per
+# second up to `burst`. Callers reserve a token and sleep for the returned
+# delay, so concurrent threads and coroutines queue up fairly instead of all
+# retrying at once. Responses feed back into the bucket: a 429 pauses it for
+# Retry-After seconds and lowers the rate, exhausted X-RateLimit-Remaining
+# headers pause it until the advertised reset, and successful responses let the
+# rate recover towards the configured value.
+class TokenBucket(object):
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, burst=DEFAULT_BURST, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._updated = clock()
+        self.configure(requests_per_minute, burst)
+
+    def configure(self, requests_per_minute, burst=DEFAULT_BURST):
+        with self._lock:
+            self._max_rate = requests_per_minute / 60.0
+            self._rate = self._max_rate
+            self._capacity = max(1, burst)
+            self._tokens = self._capacity
+
+    @property
+    def requests_per_minute(self):
+        return self._rate * 60.0
+
+    def _refill(self, now):
+        if now > self._updated:
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+
+    # Function to take one token and return how many seconds the caller must wait before sending
+    def reserve(self):
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens -= 1
+            delay = max(0.0, self._updated - now)
+            if self._tokens < 0:
+                delay += -self._tokens / self._rate
+            return delay
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    # Function to stop handing out tokens for the next `seconds` seconds
+    def pause(self, seconds):
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._updated = max(self._updated, now + seconds)
+            self._tokens = min(self._tokens, 0)
+
+    # Function to adapt the bucket to a response's status code and rate-limit headers
+    def update_from_response(self, status_code, headers, default_retry_after=DEFAULT_RETRY_AFTER):
+        if status_code == 429:
+            retry_after = parse_retry_after(_header(headers, 'Retry-After'))
+            if retry_after is None:
+                retry_after = self._reset_after(headers)
+            with self._lock:
+                self._rate = max(self._max_rate / 10, self._rate * 0.8)
+            self.pause(retry_after if retry_after is not None else default_retry_after)
+            return
+
+        remaining = _header(headers, 'X-RateLimit-Remaining')
+        if remaining is not None:
+            try:
+                remaining = int(remaining)
+            except ValueError:
+                remaining = None
+        if remaining is not None and remaining <= 0:
+            reset_after = self._reset_after(headers)
+            if reset_after:
+                self.pause(reset_after)
+        elif self._rate < self._max_rate:
+            with self._lock:
+                self._rate = min(self._max_rate, self._rate + self._max_rate / 100)
+
+    # X-RateLimit-Reset is either seconds until reset or a Unix timestamp
+    def _reset_after(self, headers):
+        reset = _header(headers, 'X-RateLimit-Reset')
+        if reset is None:
+            return None
+        try:
+            reset = float(reset)
+        except ValueError:
+            return None
+        if reset > 10 ** 9:
+            reset -= time.time()
+        return max(0.0, reset)
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+# Function to get the process-wide rate limiter shared by all clients
+def get_rate_limiter():
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = TokenBucket()
+    return _rate_limiter
+
+# Function to change the process-wide request budget
+def configure_rate_limit(requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, burst=DEFAULT_BURST):
+    limiter = get_rate_limiter()
+    limiter.configure(requests_per_minute, burst)
+    return limiter
@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict
+from PyWrike.batch import BatchFetcher, unique_ids
+
+# Function to build the 'title|due' key migrations use to recognise a task that was already copied
+def task_key(task):
+    return task['title'] + "|" + str(task.get('dates', {}).get('due', ''))
+
+# Per-migration cache of task details.
+#
+# Keeps task ID -> details for source and newly created tasks, and the reverse
+# task key -> new task ID map (the task_map of create_or_update_task). Details
+# are filled by batch prefetches of up to 100 IDs per request and updated
+# write-through when tasks are created or tagged, so each task is fetched at
+# most once per migration.
+class TaskDetailCache(object):
+    def __init__(self, access_token, task_map=None, fetcher=None):
+        self._access_token = access_token
+        self._fetcher = fetcher or BatchFetcher(access_token)
+        self._details = {}
+        self._lock = threading.Lock()
+        self.task_map = task_map if task_map is not None else {}
+        # Number of tasks requested from the API
+        self.fetches = 0
+
+    def __contains__(self, task_id):
+        return task_id in self._details
+
+    # Function to fetch the details of all not yet cached tasks in batches
+    def prefetch(self, task_ids):
+        with self._lock:
+            missing = unique_ids(task_id for task_id in task_ids if task_id not in self._details)
+        if not missing:
+            return
+        fetched = self._fetcher.fetch_tasks(missing)
+        with self._lock:
+            self.fetches += len(missing)
+            for task_id, task in fetched.items():
+                self._details.setdefault(task_id, task)
+
+    # Function to get the details of a task, fetching it on a miss; None if it cannot be fetched
+    def get(self, task_id):
+        with self._lock:
+            task = self._details.get(task_id)
+        if task is None:
+            self.prefetch([task_id])
+            with self._lock:
+                task = self._details.get(task_id)
+        return task
+
+    # Function to store task details, e.g. a task returned by a create request
+    def put(self, task):
+        with self._lock:
+            self._details[task['id']] = task
+        return task
+
+    def key(self, task_id):
+        task = self.get(task_id)
+        return task_key(task) if task is not None else None
+
+    def new_id(self, key):
+        return self.task_map.get(key)
+
+    # Function to record a created task under its key and store its details
+    def record_created(self, key, task):
+        self.put(task)
+        with self._lock:
+            self.task_map[key] = task['id']
+
+    # Function to record that a folder was added to a task's parents
+    def record_parent(self, task_id, folder_id):
+        with self._lock:
+            task = self._details.get(task_id)
+            if task is not None and folder_id not in task.setdefault('parentIds', []):
+                task['parentIds'].append(folder_id)
+
+_migration_caches = OrderedDict()
+_MAX_MIGRATION_CACHES = 8
+
+# Function to get the detail cache of a migration, identified by its task_map dict
+def get_task_detail_cache(access_token, task_map):
+    entry = _migration_caches.get(id(task_map))
+    if entry is None or entry[0] is not task_map:
+        entry = (task_map, TaskDetailCache(access_token, task_map))
+        _migration_caches[id(task_map)] = entry
+        while len(_migration_caches) > _MAX_MIGRATION_CACHES:
+            _migration_caches.popitem(last=False)
+    _migration_caches.move_to_end(id(task_map))
+    return entry[1]
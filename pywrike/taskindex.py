@@ -0,0 +1,130 @@
+from collections import OrderedDict
+
+# Function to normalize a task title for duplicate checks
+def normalize_title(title):
+    return (title or '').strip().lower()
+
+# Hash index over tasks for duplicate checks during imports.
+#
+# Keeps normalized title -> task IDs, folder -> {title: task ID} and parent
+# task -> {title: task ID}, so "does this title already exist in the space /
+# folder / under this parent" is a dictionary lookup instead of a scan of the
+# cached task list. A TaskIndex can be passed wherever a cached_tasks list is
+# expected: append() and extend() index the new tasks as they are added.
+class TaskIndex(object):
+    def __init__(self, tasks=()):
+        self._tasks = OrderedDict()
+        self._by_title = {}
+        self._folder_titles = {}
+        self._parent_titles = {}
+        self._loaded_folders = set()
+        self._loaded_parents = set()
+        self._synced = 0
+        self.extend(tasks)
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def __iter__(self):
+        return iter(list(self._tasks.values()))
+
+    def __contains__(self, task_id):
+        return task_id in self._tasks
+
+    def get(self, task_id):
+        return self._tasks.get(task_id)
+
+    # Function to index a task; adding an already indexed task only merges its folders and parents
+    def add(self, task):
+        task_id = task['id']
+        title = normalize_title(task.get('title'))
+        if task_id not in self._tasks:
+            self._tasks[task_id] = task
+            self._by_title.setdefault(title, []).append(task_id)
+        for folder_id in task.get('parentIds', []):
+            self._folder_titles.setdefault(folder_id, {}).setdefault(title, task_id)
+        for parent_task_id in task.get('superTaskIds', []):
+            self._parent_titles.setdefault(parent_task_id, {}).setdefault(title, task_id)
+        return task
+
+    append = add
+
+    def extend(self, tasks):
+        for task in tasks:
+            self.add(task)
+
+    # Function to index the tasks a plain list gained since the last sync
+    def sync(self, tasks):
+        if len(tasks) < self._synced:
+            self._synced = 0
+        for task in tasks[self._synced:]:
+            self.add(task)
+        self._synced = len(tasks)
+        return self
+
+    def add_folder(self, task_id, folder_id):
+        task = self._tasks.get(task_id)
+        if task is not None:
+            self._folder_titles.setdefault(folder_id, {}).setdefault(normalize_title(task.get('title')), task_id)
+
+    def add_parent(self, task_id, parent_task_id):
+        task = self._tasks.get(task_id)
+        if task is not None:
+            self._parent_titles.setdefault(parent_task_id, {}).setdefault(normalize_title(task.get('title')), task_id)
+
+    # Folders and parent tasks whose current children were loaded from the API
+    def is_folder_loaded(self, folder_id):
+        return folder_id in self._loaded_folders
+
+    def load_folder(self, folder_id, tasks):
+        for task in tasks:
+            self.add(task)
+            self.add_folder(task['id'], folder_id)
+        self._loaded_folders.add(folder_id)
+
+    def is_parent_loaded(self, parent_task_id):
+        return parent_task_id in self._loaded_parents
+
+    def load_parent(self, parent_task_id, subtasks):
+        for subtask in subtasks:
+            self.add(subtask)
+            self.add_parent(subtask['id'], parent_task_id)
+        self._loaded_parents.add(parent_task_id)
+
+    # Function to get the first task with the given title anywhere in the index
+    def find(self, title):
+        task_ids = self._by_title.get(normalize_title(title))
+        return self._tasks[task_ids[0]] if task_ids else None
+
+    def find_in_folder(self, folder_id, title):
+        task_id = self._folder_titles.get(folder_id, {}).get(normalize_title(title))
+        return self._tasks.get(task_id) if task_id else None
+
+    def find_in_parent(self, parent_task_id, title):
+        task_id = self._parent_titles.get(parent_task_id, {}).get(normalize_title(title))
+        return self._tasks.get(task_id) if task_id else None
+
+    # Function to get the first task with the given title that is not yet a subtask of the parent
+    def find_outside_parent(self, parent_task_id, title):
+        title = normalize_title(title)
+        child_id = self._parent_titles.get(parent_task_id, {}).get(title)
+        for task_id in self._by_title.get(title, []):
+            if task_id != child_id and parent_task_id not in self._tasks[task_id].get('superTaskIds', []):
+                return self._tasks[task_id]
+        return None
+
+_list_indexes = OrderedDict()
+_MAX_LIST_INDEXES = 8
+
+# Function to get the index for a cached_tasks list, kept in sync with tasks appended to it
+def get_task_index(cached_tasks):
+    if isinstance(cached_tasks, TaskIndex):
+        return cached_tasks
+    entry = _list_indexes.get(id(cached_tasks))
+    if entry is None or entry[0] is not cached_tasks:
+        entry = (cached_tasks, TaskIndex())
+        _list_indexes[id(cached_tasks)] = entry
+        while len(_list_indexes) > _MAX_LIST_INDEXES:
+            _list_indexes.popitem(last=False)
+    _list_indexes.move_to_end(id(cached_tasks))
+    return entry[1].sync(cached_tasks)
@@ -0,0 +1,159 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from html.parser import HTMLParser
+from multiprocessing import Pool
+
+# Tags whose text is not part of the visible description
+SKIPPED_TAGS = frozenset(['script', 'style', 'template'])
+
+# Below this many distinct descriptions a batch is cleaned in-process
+MIN_PARALLEL_BATCH = 256
+
+# Streaming tag stripper producing the same lines as
+# "\n".join(BeautifulSoup(html, "html.parser").stripped_strings):
+# every text node between two tags is stripped and kept if not empty, while
+# comments, doctypes, processing instructions and the text of script/style
+# elements are dropped. No tree is built. (Only malformed character
+# references, e.g. a bare '&nbsp' at the very end, may decode differently.)
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        HTMLParser.__init__(self, convert_charrefs=True)
+        self.lines = []
+        self._buffer = []
+        self._skip_depth = 0
+
+    def _flush(self):
+        if self._buffer:
+            text = ''.join(self._buffer).strip()
+            self._buffer = []
+            if text and not self._skip_depth:
+                self.lines.append(text)
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush()
+
+    def handle_endtag(self, tag):
+        self._flush()
+        if tag in SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        self._buffer.append(data)
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    # <![CDATA[...]]> sections are kept as text, like BeautifulSoup's CData strings
+    def unknown_decl(self, data):
+        self._flush()
+        if data.startswith('CDATA['):
+            self._buffer.append(data[len('CDATA['):])
+            self._flush()
+
+    def close(self):
+        HTMLParser.close(self)
+        self._flush()
+
+# Function to convert HTML to text lines without building a tree
+def strip_html(raw_html):
+    if not raw_html:
+        return ""
+    extractor = _TextExtractor()
+    extractor.feed(raw_html)
+    extractor.close()
+    return "\n".join(extractor.lines)
+
+# LRU memo of cleaned descriptions keyed by a hash of the HTML
+class CleanCache(object):
+    def __init__(self, max_entries=4096):
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(raw_html):
+        return hashlib.blake2b(raw_html.encode('utf-8'), digest_size=16).digest()
+
+    def get(self, key):
+        with self._lock:
+            text = self._entries.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def set(self, key, text):
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+# Process-wide memo used by clean_description
+clean_cache = CleanCache()
+
+# Function to clean a description, reusing the result for HTML seen before
+def clean_description(raw_html):
+    if not raw_html:
+        return ""
+    key = CleanCache.key(raw_html)
+    text = clean_cache.get(key)
+    if text is None:
+        text = strip_html(raw_html)
+        clean_cache.set(key, text)
+    return text
+
+# Function to clean many descriptions at once, in `processes` worker processes
+# when the batch is large enough. Returns the texts in input order and fills the memo,
+# so later clean_description calls for the same HTML are lookups. Callers cleaning
+# several batches pass one multiprocessing `pool` for all of them instead.
+def clean_descriptions(raw_htmls, processes=None, chunksize=64, pool=None):
+    raw_htmls = list(raw_htmls)
+    texts = {}
+    pending = OrderedDict()
+    for raw_html in raw_htmls:
+        if raw_html:
+            key = CleanCache.key(raw_html)
+            if key in texts or key in pending:
+                continue
+            text = clean_cache.get(key)
+            if text is None:
+                pending[key] = raw_html
+            else:
+                texts[key] = text
+
+    if pending:
+        if pool is not None and len(pending) >= MIN_PARALLEL_BATCH:
+            cleaned = pool.map(strip_html, list(pending.values()), chunksize)
+        elif processes != 1 and len(pending) >= MIN_PARALLEL_BATCH:
+            with Pool(processes) as pool:
+                cleaned = pool.map(strip_html, list(pending.values()), chunksize)
+        else:
+            cleaned = [strip_html(raw_html) for raw_html in pending.values()]
+        for key, text in zip(pending, cleaned):
+            clean_cache.set(key, text)
+            texts[key] = text
+
+    return [texts[CleanCache.key(raw_html)] if raw_html else "" for raw_html in raw_htmls]
@@ -1,28 +1,52 @@
 import requests
+import copy
 import json
-import time
-import openpyxl
-from openpyxl import Workbook
-from openpyxl.utils import get_column_letter
-from bs4 import BeautifulSoup
-import pandas as pd
-import os
+import logging
+import sys
+from multiprocessing import Pool
 from PyWrike.gateways import OAuth2Gateway1
-import numpy as np
+from PyWrike.client import DEFAULT_PAGE_SIZE, get_client
+from PyWrike.batch import BatchFetcher, attach_subtask_tree
+from PyWrike.cache import metadata_cache
+from PyWrike.contacts import get_contact_directory
+from PyWrike.folders import FolderTree, create_folder_levels
+from PyWrike.paths import get_path_resolver
+from PyWrike.taskindex import get_task_index
+from PyWrike.taskdetails import get_task_detail_cache
+from PyWrike.delta import SpaceSync, default_state_path
+from PyWrike.textclean import clean_description, clean_descriptions
+from PyWrike.jsonstream import dump_json_stream, dump_ndjson, iter_space_records
+from PyWrike.log import http_log, auth_log, export_log, import_log, clone_log, truncated
+from PyWrike.metrics import phase
+
+# pandas, openpyxl and BeautifulSoup are imported inside the Excel, DataFrame and
+# HTML code paths, so importing this module stays cheap for API-only callers
+
+# Function to test a cell value like pd.notna. Without pandas loaded the value cannot
+# be a pandas scalar, so only None and float NaN count as missing.
+def _notna(value):
+    pd = sys.modules.get('pandas')
+    if pd is not None:
+        return pd.notna(value)
+    return not (value is None or (isinstance(value, float) and value != value))
+
+# Function to turn a pandas Timestamp cell into an ISO string, leaving other values as they are
+def _date_value(value):
+    pd = sys.modules.get('pandas')
+    if pd is not None and isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value
 
 # Function to validate the access token
 def validate_token(access_token):
-    endpoint = 'https://www.wrike.com/api/v4/contacts'
-    headers = {
-        'Authorization': f'Bearer {access_token}'
-    }
+    endpoint = '/contacts'
     
-    response = requests.get(endpoint, headers=headers)
+    response = get_client().get(endpoint, access_token)
     if response.status_code == 200:
-        print("Access token is valid.")
+        auth_log.info("Access token is valid.")
         return True
     else:
-        print(f"Access token is invalid. Status code: {response.status_code}")
+        auth_log.warning("Access token is invalid. Status code: %s", response.status_code)
         return False
 
 # Function to authenticate using OAuth2 if the token is invalid
@@ -37,21 +61,16 @@ def authenticate_with_oauth2(client_id, client_secret, redirect_url):
     # Perform OAuth2 authentication and retrieve the access token
     access_token = wrike.authenticate(auth_info=auth_info)
     
-    print(f"New access token obtained: {access_token}")
+    auth_log.info("New access token obtained.")
     return access_token
 
 # Function to get the ID of a folder by its name
 def get_folder_id_by_name(folder_name, access_token):
-    endpoint = 'https://www.wrike.com/api/v4/folders'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
+    endpoint = '/folders'
 
-    response = requests.get(endpoint, headers=headers)
+    response = get_client().get(endpoint, access_token)
     if response.status_code != 200:
-        print(f"Failed to retrieve folders. Status code: {response.status_code}")
-        print(response.text)
+        http_log.error("Failed to retrieve folders. Status code: %s Response: %s", response.status_code, truncated(response))
         return None
 
     folders = response.json().get('data', [])
@@ -59,17 +78,16 @@ def get_folder_id_by_name(folder_name, access_token):
         if folder['title'] == folder_name:
             return folder['id']
 
-    print(f"Folder with name '{folder_name}' not found.")
+    http_log.info("Folder with name '%s' not found.", folder_name)
     return None
 
 # Function to create a new project in Wrike
 def create_wrike_project(access_token, parent_folder_id, project_title, responsible_id, start_date, end_date):
     if not all([project_title, responsible_id, start_date, end_date]):
-        print("Missing required project details.")
+        http_log.warning("Missing required project details.")
         return None
 
-    endpoint = f'https://www.wrike.com/api/v4/folders/{parent_folder_id}/folders'
-    headers = {'Authorization': f'Bearer {access_token}', 'Content-Type': 'application/json'}
+    endpoint = f'/folders/{parent_folder_id}/folders'
 
     data = {
         'title': project_title,
@@ -80,122 +98,100 @@ def create_wrike_project(access_token, parent_folder_id, project_title, responsi
         }
     }
 
-    response = requests.post(endpoint, headers=headers, json=data)
+    response = get_client().post(endpoint, access_token, json=data)
     if response.status_code == 200:
         project_id = response.json()['data'][0]['id']
-        print(f"Project '{project_title}' created successfully with ID: {project_id}!")
+        get_path_resolver(access_token).record(parent_folder_id, project_title, project_id)
+        http_log.info("Project '%s' created successfully with ID: %s!", project_title, project_id)
         return project_id
     else:
-        print(f"Failed to create project '{project_title}'. Status code: {response.status_code}")
-        print(response.text)
+        http_log.error("Failed to create project '%s'. Status code: %s Response: %s", project_title, response.status_code, truncated(response))
         return None
 
 # Function to create a new folder in a project in Wrike
 def create_wrike_folder(access_token, parent_folder_id, folder_title):
-    endpoint = f'https://www.wrike.com/api/v4/folders/{parent_folder_id}/folders'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
+    endpoint = f'/folders/{parent_folder_id}/folders'
 
     data = {
         'title': folder_title,
     }
 
-    response = requests.post(endpoint, headers=headers, json=data)
+    response = get_client().post(endpoint, access_token, json=data)
 
     if response.status_code == 200:
-        print(f"Folder '{folder_title}' created successfully!")
+        get_path_resolver(access_token).record(parent_folder_id, folder_title, response.json()['data'][0]['id'])
+        http_log.info("Folder '%s' created successfully!", folder_title)
     else:
-        print(f"Failed to create folder '{folder_title}'. Status code: {response.status_code}")
-        print(response.text)
+        http_log.error("Failed to create folder '%s'. Status code: %s Response: %s", folder_title, response.status_code, truncated(response))
 
 # Function to delete a folder in Wrike
 def delete_wrike_folder(access_token, parent_folder_id, folder_title):
     folder_id = get_subfolder_id_by_name(parent_folder_id, folder_title, access_token)
     if not folder_id:
-        print(f"Folder '{folder_title}' not found in project.")
+        http_log.info("Folder '%s' not found in project.", folder_title)
         return
 
-    endpoint = f'https://www.wrike.com/api/v4/folders/{folder_id}'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
+    endpoint = f'/folders/{folder_id}'
 
-    response = requests.delete(endpoint, headers=headers)
+    response = get_client().delete(endpoint, access_token)
 
     if response.status_code == 200:
-        print(f"Folder '{folder_title}' deleted successfully!")
+        get_path_resolver(access_token).invalidate()
+        http_log.info("Folder '%s' deleted successfully!", folder_title)
     else:
-        print(f"Failed to delete folder '{folder_title}'. Status code: {response.status_code}")
-        print(response.text)
+        http_log.error("Failed to delete folder '%s'. Status code: %s Response: %s", folder_title, response.status_code, truncated(response))
 
 # Function to delete a folder in Wrike by folder ID
 def delete_wrike_folder_by_id(access_token, folder_id):
-    endpoint = f'https://www.wrike.com/api/v4/folders/{folder_id}'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
+    endpoint = f'/folders/{folder_id}'
 
-    response = requests.delete(endpoint, headers=headers)
+    response = get_client().delete(endpoint, access_token)
 
     if response.status_code == 200:
-        print(f"Folder with ID '{folder_id}' deleted successfully!")
+        get_path_resolver(access_token).invalidate()
+        http_log.info("Folder with ID '%s' deleted successfully!", folder_id)
     else:
-        print(f"Failed to delete folder with ID '{folder_id}'. Status code: {response.status_code}")
-        print(response.text)
+        http_log.error("Failed to delete folder with ID '%s'. Status code: %s Response: %s", folder_id, response.status_code, truncated(response))
 
 
 # Function to delete a project in Wrike
 def delete_wrike_project(access_token, parent_folder_id, project_title):
     project_id = get_subfolder_id_by_name(parent_folder_id, project_title, access_token)
     if not project_id:
-        print(f"Project '{project_title}' not found.")
+        http_log.info("Project '%s' not found.", project_title)
         return
 
-    endpoint = f'https://www.wrike.com/api/v4/folders/{project_id}'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
+    endpoint = f'/folders/{project_id}'
 
-    response = requests.delete(endpoint, headers=headers)
+    response = get_client().delete(endpoint, access_token)
 
     if response.status_code == 200:
-        print(f"Project '{project_title}' deleted successfully!")
+        get_path_resolver(access_token).invalidate()
+        http_log.info("Project '%s' deleted successfully!", project_title)
     else:
-        print(f"Failed to delete project '{project_title}'. Status code: {response.status_code}")
-        print(response.text)
+        http_log.error("Failed to delete project '%s'. Status code: %s Response: %s", project_title, response.status_code, truncated(response))
     
 # Function to get the ID of a folder by its path within a specific space
-def get_folder_id_by_path(folder_path, space_id, access_token):
-    folder_names = folder_path.split('\\')
-    parent_folder_id = get_folder_id_in_space_by_name(space_id, folder_names[0], access_token)
-    if not parent_folder_id:
-        return None
-
-    for folder_name in folder_names[1:]:
-        parent_folder_id = get_or_create_subfolder(parent_folder_id, folder_name, access_token)
-        if not parent_folder_id:
-            print(f"Subfolder '{folder_name}' not found in space '{space_id}'")
-            return None
-
-    return parent_folder_id
+# Missing subfolders below the top-level folder are created
+def get_folder_id_by_path(folder_path, space_id, access_token, path_separator='\\'):
+    folder_id = get_path_resolver(access_token).resolve(
+        folder_path,
+        space_id,
+        create_folder=lambda parent_id, name: create_subfolder(parent_id, name, access_token),
+        separator=path_separator,
+        strip=False
+    )
+    if not folder_id:
+        http_log.info("Folder path '%s' not found in space '%s'", folder_path, space_id)
+    return folder_id
 
 # Function to get the ID of a folder by its name within a specific space
 def get_folder_id_in_space_by_name(space_id, folder_name, access_token):
-    endpoint = f'https://www.wrike.com/api/v4/spaces/{space_id}/folders'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
+    endpoint = f'/spaces/{space_id}/folders'
 
-    response = requests.get(endpoint, headers=headers)
+    response = get_client().get(endpoint, access_token)
     if response.status_code != 200:
-        print(f"Failed to retrieve folders in space {space_id}. Status code: {response.status_code}")
-        print(response.text)
+        http_log.error("Failed to retrieve folders in space %s. Status code: %s Response: %s", space_id, response.status_code, truncated(response))
         return None
 
     folders = response.json().get('data', [])
@@ -203,47 +199,20 @@ def get_folder_id_in_space_by_name(space_id, folder_name, access_token):
         if folder['title'] == folder_name:
             return folder['id']
 
-    print(f"Folder with name '{folder_name}' not found in space {space_id}.")
+    http_log.info("Folder with name '%s' not found in space %s.", folder_name, space_id)
     return None
        
 def get_all_folders_in_space(space_id, access_token):
-    all_folders = []
-    folders_to_process = [space_id]  # Start with the root space
-    processed_folders = set()  # Set to track processed folder IDs
-
-    while folders_to_process:
-        parent_folder_id = folders_to_process.pop()
-
-        # Check if the folder has already been processed
-        if parent_folder_id in processed_folders:
-            continue
-        
-        print(f"[DEBUG] Fetching folders for parent folder ID: {parent_folder_id}")
-        endpoint = f'https://www.wrike.com/api/v4/folders/{parent_folder_id}/folders'
-        headers = {
-            'Authorization': f'Bearer {access_token}',
-            'Content-Type': 'application/json'
-        }
-        response = requests.get(endpoint, headers=headers)
-        
-        if response.status_code != 200:
-            print(f"[DEBUG] Failed to retrieve folders. Status code: {response.status_code}")
-            print(response.text)
-            continue
-
-        folders = response.json().get('data', [])
-        print(f"[DEBUG] Found {len(folders)} folders under parent folder ID: {parent_folder_id}")
-        all_folders.extend(folders)
-
-        # Mark the folder as processed
-        processed_folders.add(parent_folder_id)
-
-        # Add child folders to the list to process them in the next iterations
-        for folder in folders:
-            folder_id = folder['id']
-            if folder_id not in processed_folders:
-                folders_to_process.append(folder_id)
+    # The space listing already contains every folder with its childIds, so one request is enough
+    http_log.debug("Fetching folder tree for space ID: %s", space_id)
+    try:
+        tree = FolderTree.fetch(space_id, access_token)
+    except requests.exceptions.RequestException as e:
+        http_log.error("Failed to retrieve folders: %s", e)
+        return []
 
+    all_folders = [folder for folder in tree.folders() if folder['id'] != space_id]
+    http_log.debug("Found %s folders in space ID: %s", len(all_folders), space_id)
     return all_folders
 
 def get_all_tasks_in_space(space_id, access_token):
@@ -252,64 +221,56 @@ def get_all_tasks_in_space(space_id, access_token):
 
     for folder in folders:
         folder_id = folder['id']
-        print(f"[DEBUG] Fetching tasks for folder ID: {folder_id}")
+        http_log.debug("Fetching tasks for folder ID: %s", folder_id)
         tasks = get_tasks_by_folder_id(folder_id, access_token)
-        print(f"[DEBUG] Found {len(tasks)} tasks in folder ID: {folder_id}")
+        http_log.debug("Found %s tasks in folder ID: %s", len(tasks), folder_id)
         all_tasks.extend(tasks)
 
     return all_tasks
 
 # Function to get or create a subfolder by its name and parent folder ID
 def get_or_create_subfolder(parent_folder_id, subfolder_name, access_token):
-    subfolder_id = get_subfolder_id_by_name(parent_folder_id, subfolder_name, access_token)
+    resolver = get_path_resolver(access_token)
+    subfolder_id = resolver.child_id(parent_folder_id, subfolder_name)
     if not subfolder_id:
         subfolder_id = create_subfolder(parent_folder_id, subfolder_name, access_token)
     return subfolder_id
 
 # Function to create a subfolder in the parent folder
 def create_subfolder(parent_folder_id, subfolder_name, access_token):
-    endpoint = f'https://www.wrike.com/api/v4/folders/{parent_folder_id}/folders'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
+    endpoint = f'/folders/{parent_folder_id}/folders'
     
     payload = {
         "title": subfolder_name,
         "shareds": []  # Adjust shared settings as needed
     }
 
-    response = requests.post(endpoint, headers=headers, json=payload)
+    response = get_client().post(endpoint, access_token, json=payload)
     if response.status_code == 200:
         subfolder_id = response.json().get('data', [])[0].get('id')
-        print(f"Subfolder '{subfolder_name}' created successfully in parent folder '{parent_folder_id}'")
+        http_log.info("Subfolder '%s' created successfully in parent folder '%s'", subfolder_name, parent_folder_id)
+        # Write the new folder through to the path cache
+        get_path_resolver(access_token).record(parent_folder_id, subfolder_name, subfolder_id)
         return subfolder_id
     else:
-        print(f"Failed to create subfolder '{subfolder_name}' in parent folder '{parent_folder_id}'. Status code: {response.status_code}")
-        print(response.text)
+        http_log.error("Failed to create subfolder '%s' in parent folder '%s'. Status code: %s Response: %s", subfolder_name, parent_folder_id, response.status_code, truncated(response))
         return None
 
-def get_tasks_in_space(space_id, access_token):
-    endpoint = f'https://www.wrike.com/api/v4/spaces/{space_id}/tasks'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
-
-    response = requests.get(endpoint, headers=headers)
-    if response.status_code != 200:
-        print(f"[DEBUG] Failed to retrieve tasks in space {space_id}. Status code: {response.status_code}")
-        print(response.text)
-        return []
+# Generator yielding the tasks in a space page by page
+def iter_tasks_in_space(space_id, access_token, page_size=DEFAULT_PAGE_SIZE):
+    endpoint = f'/spaces/{space_id}/tasks'
+    return get_client().iter_data(endpoint, access_token, page_size=page_size)
 
-    tasks = response.json().get('data', [])
-    print(f"[DEBUG] Retrieved {len(tasks)} tasks in space {space_id}.")
-    for task in tasks:
-        print(f"[DEBUG] Task ID: {task['id']}, Title: '{task['title']}', Parent Folders: {task.get('parentIds', [])}")
+def get_tasks_in_space(space_id, access_token):
+    tasks = list(iter_tasks_in_space(space_id, access_token))
+    http_log.debug("Retrieved %s tasks in space %s.", len(tasks), space_id)
+    if http_log.isEnabledFor(logging.DEBUG):
+        for task in tasks:
+            http_log.debug("Task ID: %s, Title: '%s', Parent Folders: %s", task['id'], task['title'], task.get('parentIds', []))
     return tasks
 
-# Function to get all tasks by folder ID
-def get_tasks_by_folder_id(folder_id, access_token):
+# Generator yielding the tasks in a folder page by page
+def iter_tasks_by_folder_id(folder_id, access_token, page_size=DEFAULT_PAGE_SIZE):
     fields = [
         "subTaskIds", "authorIds", "customItemTypeId", "responsibleIds",
         "description", "hasAttachments", "dependencyIds", "superParentIds",
@@ -319,19 +280,12 @@ def get_tasks_by_folder_id(folder_id, access_token):
 
     # Convert the fields list to a JSON string
     fields_json = json.dumps(fields)
-    endpoint = f'https://www.wrike.com/api/v4/folders/{folder_id}/tasks?fields={fields_json}'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
-
-    response = requests.get(endpoint, headers=headers)
-    if response.status_code != 200:
-        print(f"Failed to retrieve tasks in folder {folder_id}. Status code: {response.status_code}")
-        print(response.text)
-        return []
+    endpoint = f'/folders/{folder_id}/tasks'
+    return get_client().iter_data(endpoint, access_token, params={'fields': fields_json}, page_size=page_size)
 
-    return response.json().get('data', [])
+# Function to get all tasks by folder ID
+def get_tasks_by_folder_id(folder_id, access_token):
+    return list(iter_tasks_by_folder_id(folder_id, access_token))
 
 # Function to get the ID of a task by its title and folder ID
 def get_task_id_by_title(task_title, folder_id, access_token):
@@ -339,88 +293,85 @@ def get_task_id_by_title(task_title, folder_id, access_token):
     for task in tasks:
         if task['title'] == task_title:
             return task['id']
-    print(f"Task with title '{task_title}' not found in folder '{folder_id}'.")
+    http_log.info("Task with title '%s' not found in folder '%s'.", task_title, folder_id)
     return None
 
 # Function to lookup the responsible ID by first name, last name, and email
 # Function to lookup the responsible ID by first name, last name, and email
 def get_responsible_id_by_name_and_email(first_name, last_name, email, access_token):
-    endpoint = 'https://www.wrike.com/api/v4/contacts'
-    headers = {'Authorization': f'Bearer {access_token}', 'Content-Type': 'application/json'}
-
-    response = requests.get(endpoint, headers=headers)
-    if response.status_code != 200:
-        print(f"Failed to retrieve contacts. Status code: {response.status_code}")
-        print(response.text)
+    # Contacts are downloaded once per TTL and looked up through the shared directory index
+    directory = get_contact_directory(access_token)
+    if directory is None:
         return None
 
-    contacts = response.json().get('data', [])
-    for contact in contacts:
-        profiles = contact.get('profiles', [])
-        if (
-            contact.get('firstName', '') == first_name
-            and contact.get('lastName', '') == last_name
-            and any(profile.get('email', '') == email for profile in profiles)
-        ):
-            return contact['id']
-
-    print(f"No contact found with name {first_name} {last_name} and email {email}.")
+    contact_id = directory.find_id(first_name, last_name, email)
+    if contact_id:
+        return contact_id
+
+    import_log.info("No contact found with name %s %s and email %s.", first_name, last_name, email)
     return None
 
-def cache_subtasks_from_tasks(cached_tasks, access_token):
-    new_subtasks = []
+# Generator yielding the contacts of the account, following nextPageToken if the API pages them
+def iter_contacts(access_token, page_size=None):
+    return get_client().iter_data('/contacts', access_token, page_size=page_size)
 
-    # Loop through all cached tasks to find those with 'subtaskIds'
+def cache_subtasks_from_tasks(cached_tasks, access_token):
+    # Collect the subtask IDs of all cached tasks so they can be fetched in batches
+    subtask_ids = []
     for task in cached_tasks:
-        subtask_ids = task.get('subTaskIds')
-        if subtask_ids:
-            if isinstance(subtask_ids, list):
-                for subtask_id in subtask_ids:
-                    print(f"[DEBUG] Found subtaskId '{subtask_id}' in task '{task['title']}'. Fetching subtask details.")
-                    
-                    # Fetch subtask details
-                    subtask_response = get_task_by_id(subtask_id, access_token)
-                    
-                    # Print the entire response for debugging
-                    print(f"[DEBUG] Subtask response fetched: {subtask_response}")
-                    
-                    # Extract the subtask details from the response
-                    if 'data' in subtask_response and len(subtask_response['data']) > 0:
-                        subtask_details = subtask_response['data'][0]
-                        new_subtasks.append(subtask_details)
-                        print(f"[DEBUG] Subtask '{subtask_details.get('title', 'Unknown Title')}' added to cache.")
-                    else:
-                        print(f"[DEBUG] No subtask details found for subtaskId '{subtask_id}'.")
+        task_subtask_ids = task.get('subTaskIds')
+        if task_subtask_ids:
+            if isinstance(task_subtask_ids, list):
+                import_log.debug("Found %s subtaskIds in task '%s'.", len(task_subtask_ids), task['title'])
+                subtask_ids.extend(task_subtask_ids)
             else:
-                print(f"[DEBUG] Unexpected type for 'subtaskIds': {type(subtask_ids)}. Expected a list.")
-    
+                import_log.warning("Unexpected type for 'subtaskIds': %s. Expected a list.", type(task_subtask_ids))
+
+    new_subtasks = BatchFetcher(access_token).tasks(subtask_ids)
+    for subtask_id in set(subtask_ids) - {subtask['id'] for subtask in new_subtasks}:
+        import_log.debug("No subtask details found for subtaskId '%s'.", subtask_id)
+
     # Add the new subtasks to the global cached_tasks list
     cached_tasks.extend(new_subtasks)
-    print(f"[DEBUG] Cached {len(new_subtasks)} new subtasks.")
+    import_log.debug("Cached %s new subtasks.", len(new_subtasks))
+
+# Function to get the shared, parsed metadata listing of the cache. The result is
+# shared with every other caller and must not be modified.
+def _shared_metadata(entity, access_token, raise_errors=False):
+    def load():
+        response = get_client().get(f'/{entity}', access_token)
+        if response.status_code != 200:
+            if raise_errors:
+                response.raise_for_status()
+            http_log.error("Failed to fetch %s. Status code: %s Response: %s", entity, response.status_code, truncated(response))
+            return None
+        return response.json()['data']
+
+    return metadata_cache.get_or_load(entity, access_token, load)
+
+# Function to get an account-wide metadata listing ('customfields', 'spaces' or 'workflows')
+# through the shared metadata cache, so repeated calls within the TTL cost no request.
+# The cache holds the listing parsed once and every call gets its own deep copy, so
+# callers may modify the returned dicts without affecting other callers.
+def get_cached_metadata(entity, access_token, raise_errors=False):
+    data = _shared_metadata(entity, access_token, raise_errors)
+    return copy.deepcopy(data) if data is not None else None
 
 # Function to retrieve custom fields and filter by space
 def get_custom_fields_by_space(access_token, space_id):
-    endpoint = 'https://www.wrike.com/api/v4/customfields'
-    headers = {
-        'Authorization': f'Bearer {access_token}'
-    }
-    
-    response = requests.get(endpoint, headers=headers)
-    
-    if response.status_code == 200:
-        custom_fields_data = response.json()
+    # Only read here, so the shared listing is used without copying it
+    custom_fields_data = _shared_metadata('customfields', access_token)
 
+    if custom_fields_data is not None:
         # Create a mapping of custom field title to a list of {id, spaces} dicts
         custom_fields = {}
-        for field in custom_fields_data['data']:
+        for field in custom_fields_data:
             field_spaces = field.get('spaceId', [])  # Get the spaces where the custom field is applied
             if space_id in field_spaces:  # Only add custom fields that belong to the specific space
-                custom_fields[field['title']] = {'id': field['id'], 'spaces': field_spaces}
+                custom_fields[field['title']] = {'id': field['id'], 'spaces': list(field_spaces)}
         
         return custom_fields
     else:
-        print(f"Failed to fetch custom fields. Status code: {response.status_code}")
-        print(response.text)
         return {}
 
 # Function to map Excel headings to custom fields by name and space
@@ -432,33 +383,29 @@ def map_excel_headings_to_custom_fields(headings, wrike_custom_fields):
         if clean_heading in wrike_custom_fields:
             mapped_custom_fields[clean_heading] = wrike_custom_fields[clean_heading]['id']
         else:
-            print(f"[WARNING] No match found for Excel heading '{heading}' in Wrike custom fields")
+            import_log.warning("No match found for Excel heading '%s' in Wrike custom fields", heading)
     
     return mapped_custom_fields
 
 # Task creation function with space-specific custom field mapping
 def create_task(folder_id, space_id, task_data, responsible_ids, access_token):
-    endpoint = f'https://www.wrike.com/api/v4/folders/{folder_id}/tasks'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
+    endpoint = f'/folders/{folder_id}/tasks'
     
     payload = {
         "title": task_data.get("title", ""),
         "responsibles": responsible_ids
     }
     
-    if "importance" in task_data and pd.notna(task_data["importance"]) and task_data["importance"]:
+    if "importance" in task_data and _notna(task_data["importance"]) and task_data["importance"]:
         payload["importance"] = task_data["importance"]
     
-    if "description" in task_data and pd.notna(task_data["description"]) and task_data["description"]:
+    if "description" in task_data and _notna(task_data["description"]) and task_data["description"]:
         payload["description"] = task_data["description"]
     
-    if pd.notna(task_data.get("start_date")) and pd.notna(task_data.get("end_date")):
+    if _notna(task_data.get("start_date")) and _notna(task_data.get("end_date")):
         payload["dates"] = {
-            "start": task_data.get("start_date").isoformat() if isinstance(task_data.get("start_date"), pd.Timestamp) else task_data.get("start_date"),
-            "due": task_data.get("end_date").isoformat() if isinstance(task_data.get("end_date"), pd.Timestamp) else task_data.get("end_date")
+            "start": _date_value(task_data.get("start_date")),
+            "due": _date_value(task_data.get("end_date"))
         }
 
 
@@ -467,15 +414,15 @@ def create_task(folder_id, space_id, task_data, responsible_ids, access_token):
 
     # Map Excel headings to Wrike custom fields
     mapped_custom_fields = map_excel_headings_to_custom_fields(task_data.keys(), custom_fields)
-    print(f"[DEBUG] Mapped Custom Fields: {mapped_custom_fields}")
+    import_log.debug("Mapped Custom Fields: %s", mapped_custom_fields)
 
     # Create custom fields payload
     custom_fields_payload = []
     for field_name, field_id in mapped_custom_fields.items():
         field_value = task_data.get(field_name) 
-        print(f"[DEBUG] Retrieving '{field_name}' from task data: '{field_value}'") 
+        import_log.debug("Retrieving '%s' from task data: '%s'", field_name, field_value)
         
-        if pd.notna(field_value):
+        if _notna(field_value):
             custom_fields_payload.append({
                 "id": field_id,
                 "value": str(field_value)  # Wrike expects the custom field values as strings
@@ -484,53 +431,43 @@ def create_task(folder_id, space_id, task_data, responsible_ids, access_token):
     if custom_fields_payload:
         payload["customFields"] = custom_fields_payload
 
-    print(f"[DEBUG] Final payload being sent: {payload}")
-    response = requests.post(endpoint, headers=headers, json=payload)
+    import_log.debug("Final payload being sent: %s", truncated(payload))
+    response = get_client().post(endpoint, access_token, json=payload)
     
     if response.status_code == 200:
         task_data_response = response.json()  # Parse the JSON response to get the task data
-        print(f"[DEBUG] Response JSON: {task_data_response}")  # Print out the entire response for inspection
+        import_log.debug("Response JSON: %s", truncated(task_data_response))
 
         # Check if the expected data structure is present
         if 'data' in task_data_response and len(task_data_response['data']) > 0:
             task_data = task_data_response['data'][0]
-            print(f"Task '{task_data['title']}' created successfully in folder '{folder_id}'")
+            import_log.info("Task '%s' created successfully in folder '%s'", task_data['title'], folder_id)
             return task_data  # Return the first task in the data list
         else:
-            print(f"[ERROR] Unexpected response structure: {task_data_response}")
+            import_log.error("Unexpected response structure: %s", truncated(task_data_response))
             return None  # Handle the unexpected structure gracefully
     else:
-        print(f"Failed to create task '{task_data.get('title', '')}' in folder '{folder_id}'. Status code: {response.status_code}")
-        print(response.text)
+        import_log.error("Failed to create task '%s' in folder '%s'. Status code: %s Response: %s", task_data.get('title', ''), folder_id, response.status_code, truncated(response))
         return None  # Return None if the task creation fails
     
 def get_task_by_id(task_id, access_token):
-    endpoint = f'https://www.wrike.com/api/v4/tasks/{task_id}'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
+    endpoint = f'/tasks/{task_id}'
 
-    response = requests.get(endpoint, headers=headers)
+    response = get_client().get(endpoint, access_token)
     if response.status_code == 200:
         return response.json()
     else:
-        print(f"Failed to fetch task with ID '{task_id}': {response.status_code} {response.text}")
+        http_log.error("Failed to fetch task with ID '%s': %s %s", task_id, response.status_code, truncated(response))
         return None
 
 #Function to update task
 def update_task_with_tags(task_id, new_folder_id, access_token):
-    endpoint = f'https://www.wrike.com/api/v4/tasks/{task_id}'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
+    endpoint = f'/tasks/{task_id}'
     
     # Retrieve current task details to get existing tags
-    response = requests.get(endpoint, headers=headers)
+    response = get_client().get(endpoint, access_token)
     if response.status_code != 200:
-        print(f"Failed to retrieve task details for task '{task_id}'. Status code: {response.status_code}")
-        print(response.text)
+        import_log.error("Failed to retrieve task details for task '%s'. Status code: %s Response: %s", task_id, response.status_code, truncated(response))
         return
 
     task_data = response.json().get('data', [])[0]
@@ -546,24 +483,18 @@ def update_task_with_tags(task_id, new_folder_id, access_token):
     }
 
     # Update the task with new tags
-    response = requests.put(endpoint, headers=headers, json=payload)
+    response = get_client().put(endpoint, access_token, json=payload)
     if response.status_code == 200:
-        print(f"Task '{task_data['title']}' updated successfully with new folder tags.")
+        import_log.info("Task '%s' updated successfully with new folder tags.", task_data['title'])
     else:
-        print(f"Failed to update task '{task_data['title']}'. Status code: {response.status_code}")
-        print(response.text)
+        import_log.error("Failed to update task '%s'. Status code: %s Response: %s", task_data['title'], response.status_code, truncated(response))
 
 def update_subtask_with_parent(subtask_id, new_parent_task_id, access_token):
-    endpoint = f'https://www.wrike.com/api/v4/tasks/{subtask_id}'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
+    endpoint = f'/tasks/{subtask_id}'
 
-    response = requests.get(endpoint, headers=headers)
+    response = get_client().get(endpoint, access_token)
     if response.status_code != 200:
-        print(f"Failed to retrieve subtask details for '{subtask_id}'. Status code: {response.status_code}")
-        print(response.text)
+        import_log.error("Failed to retrieve subtask details for '%s'. Status code: %s Response: %s", subtask_id, response.status_code, truncated(response))
         return
 
     subtask_data = response.json().get('data', [])[0]
@@ -576,15 +507,14 @@ def update_subtask_with_parent(subtask_id, new_parent_task_id, access_token):
         "addSuperTasks": [new_parent_task_id]
     }
 
-    response = requests.put(endpoint, headers=headers, json=payload)
+    response = get_client().put(endpoint, access_token, json=payload)
     if response.status_code == 200:
-        print(f"Subtask '{subtask_data['title']}' updated successfully with parent task.")
+        import_log.info("Subtask '%s' updated successfully with parent task.", subtask_data['title'])
     else:
-        print(f"Failed to update subtask '{subtask_data['title']}'. Status code: {response.status_code}")
-        print(response.text)
+        import_log.error("Failed to update subtask '%s'. Status code: %s Response: %s", subtask_data['title'], response.status_code, truncated(response))
 
 def create_task_in_folder(folder_id, space_id, task_data, access_token, cached_tasks):
-    print(f"[DEBUG] Starting to create/update task '{task_data['title']}' in folder '{folder_id}' within space '{space_id}'.")
+    import_log.debug("Starting to create/update task '%s' in folder '%s' within space '%s'.", task_data['title'], folder_id, space_id)
 
     responsible_ids = []
     for first_name, last_name, email in zip(task_data.get("first_names", []), task_data.get("last_names", []), task_data.get("emails", [])):
@@ -592,7 +522,7 @@ def create_task_in_folder(folder_id, space_id, task_data, access_token, cached_t
         if responsible_id:
             responsible_ids.append(responsible_id)
         else:
-            print(f"[DEBUG] Responsible user '{first_name} {last_name}' with email '{email}' not found.")
+            import_log.debug("Responsible user '%s %s' with email '%s' not found.", first_name, last_name, email)
             user_input = input(f"User '{first_name} {last_name}' with email '{email}' not found. Would you like to (1) Correct the information, or (2) Proceed without assigning this user? (Enter 1/2): ").strip()
             if user_input == '1':
                 first_name = input("Enter the correct first name: ").strip()
@@ -602,56 +532,59 @@ def create_task_in_folder(folder_id, space_id, task_data, access_token, cached_t
                 if responsible_id:
                     responsible_ids.append(responsible_id)
                 else:
-                    print(f"[DEBUG] User '{first_name} {last_name}' with email '{email}' still not found. Creating the task without assignee.")
+                    import_log.debug("User '%s %s' with email '%s' still not found. Creating the task without assignee.", first_name, last_name, email)
             elif user_input == '2':
-                print(f"[DEBUG] Proceeding without assigning user '{first_name} {last_name}'.")
+                import_log.debug("Proceeding without assigning user '%s %s'.", first_name, last_name)
 
-    existing_tasks = get_tasks_by_folder_id(folder_id, access_token)
-    print(f"[DEBUG] Retrieved {len(existing_tasks)} tasks in folder '{folder_id}'.")
+    task_index = get_task_index(cached_tasks)
+    if not task_index.is_folder_loaded(folder_id):
+        existing_tasks = get_tasks_by_folder_id(folder_id, access_token)
+        task_index.load_folder(folder_id, existing_tasks)
+        import_log.debug("Retrieved %s tasks in folder '%s'.", len(existing_tasks), folder_id)
 
-    existing_task = next((task for task in existing_tasks if task['title'].strip().lower() == task_data['title'].strip().lower()), None)
+    existing_task = task_index.find_in_folder(folder_id, task_data['title'])
     if existing_task:
-        print(f"[DEBUG] Task '{task_data['title']}' already exists in the folder '{folder_id}'.")
+        import_log.debug("Task '%s' already exists in the folder '%s'.", task_data['title'], folder_id)
         return  # Task already exists in the folder, do nothing
 
-    existing_tasks_space = cached_tasks
-    print(f"[DEBUG] Checking for task '{task_data['title']}' in entire space '{space_id}'.")
+    import_log.debug("Checking for task '%s' in entire space '%s'.", task_data['title'], space_id)
 
-    existing_task_space = next((task for task in existing_tasks_space if task['title'].strip().lower() == task_data['title'].strip().lower()), None)
+    existing_task_space = task_index.find(task_data['title'])
     if existing_task_space:
-        print(f"[DEBUG] Task '{task_data['title']}' found in another folder in the space.")
+        import_log.debug("Task '%s' found in another folder in the space.", task_data['title'])
         existing_task_id = existing_task_space['id']
         update_task_with_tags(existing_task_id, folder_id, access_token)
-        print(f"[DEBUG] Updated task '{task_data['title']}' with new folder tag '{folder_id}'.")
+        task_index.add_folder(existing_task_id, folder_id)
+        import_log.debug("Updated task '%s' with new folder tag '%s'.", task_data['title'], folder_id)
     else:
-        print(f"[DEBUG] Task '{task_data['title']}' does not exist in space '{space_id}'. Creating a new task.")
+        import_log.debug("Task '%s' does not exist in space '%s'. Creating a new task.", task_data['title'], space_id)
         new_task = create_task(folder_id, space_id, task_data, responsible_ids, access_token)
         # Update the cache with the newly created task
         # Ensure the new task is not None and has an ID
         if new_task and 'id' in new_task:
             cached_tasks.append(new_task)
-            print(f"[DEBUG] Added newly created task '{new_task['title']}' with ID '{new_task['id']}' to cache.")
+            task_index.add(new_task)
+            task_index.add_folder(new_task['id'], folder_id)
+            import_log.debug("Added newly created task '%s' with ID '%s' to cache.", new_task['title'], new_task['id'])
         else:
-            print(f"[DEBUG] Failed to create the task or retrieve task ID.")
+            import_log.error("Failed to create the task or retrieve task ID.")
 
+# Function to get the subtasks of a parent task, fetched in batches of up to 100 IDs
 def get_subtasks_by_task_id(parent_task_id, access_token):
-    endpoint = f'https://www.wrike.com/api/v4/tasks/{parent_task_id}'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
+    endpoint = f'/tasks/{parent_task_id}'
     
     try:
-        response = requests.get(endpoint, headers=headers)
+        response = get_client().get(endpoint, access_token)
         response.raise_for_status()
-        data = response.json()
-        return data.get('subTaskIds', [])  # Return the list of subtasks
+        data = response.json().get('data', [])
+        subtask_ids = data[0].get('subTaskIds', []) if data else []
+        return BatchFetcher(access_token).tasks(subtask_ids)  # Return the list of subtasks
     except requests.exceptions.RequestException as e:
-        print(f"Failed to retrieve subtasks for parent task '{parent_task_id}': {e}")
+        import_log.error("Failed to retrieve subtasks for parent task '%s': %s", parent_task_id, e)
         return []
 
 def create_subtask_in_parent_task(parent_task_id, space_id, subtask_data, access_token, cached_tasks):
-    print(f"[DEBUG] Starting to create/update subtask '{subtask_data['title']}' under parent task '{parent_task_id}' within space '{space_id}'.")
+    import_log.debug("Starting to create/update subtask '%s' under parent task '%s' within space '%s'.", subtask_data['title'], parent_task_id, space_id)
 
     responsible_ids = []
     for first_name, last_name, email in zip(subtask_data.get("first_names", []), subtask_data.get("last_names", []), subtask_data.get("emails", [])):
@@ -659,7 +592,7 @@ def create_subtask_in_parent_task(parent_task_id, space_id, subtask_data, access
         if responsible_id:
             responsible_ids.append(responsible_id)
         else:
-            print(f"[DEBUG] Responsible user '{first_name} {last_name}' with email '{email}' not found.")
+            import_log.debug("Responsible user '%s %s' with email '%s' not found.", first_name, last_name, email)
             user_input = input(f"User '{first_name} {last_name}' with email '{email}' not found. Would you like to (1) Correct the information, or (2) Proceed without assigning this user? (Enter 1/2): ").strip()
             if user_input == '1':
                 first_name = input("Enter the correct first name: ").strip()
@@ -669,57 +602,55 @@ def create_subtask_in_parent_task(parent_task_id, space_id, subtask_data, access
                 if responsible_id:
                     responsible_ids.append(responsible_id)
                 else:
-                    print(f"[DEBUG] User '{first_name} {last_name}' with email '{email}' still not found. Creating the subtask without assignee.")
+                    import_log.debug("User '%s %s' with email '%s' still not found. Creating the subtask without assignee.", first_name, last_name, email)
             elif user_input == '2':
-                print(f"[DEBUG] Proceeding without assigning user '{first_name} {last_name}'.")
+                import_log.debug("Proceeding without assigning user '%s %s'.", first_name, last_name)
 
     # Check cached tasks for the subtask under the parent task
-    existing_subtask = next((task for task in cached_tasks 
-                             if task['title'].strip().lower() == subtask_data['title'].strip().lower() 
-                             and task.get('supertaskId') == parent_task_id), None)
+    task_index = get_task_index(cached_tasks)
+    existing_subtask = task_index.find_in_parent(parent_task_id, subtask_data['title'])
 
     if existing_subtask:
-        print(f"[DEBUG] Subtask '{subtask_data['title']}' already exists under parent task '{parent_task_id}'.")
+        import_log.debug("Subtask '%s' already exists under parent task '%s'.", subtask_data['title'], parent_task_id)
         return  # Subtask already exists, no further action
 
-    # Retrieve all subtasks under the parent task from API
-    existing_subtasks = get_subtasks_by_task_id(parent_task_id, access_token)
-    print(f"[DEBUG] Retrieved {len(existing_subtasks)} subtasks under parent task '{parent_task_id}'.")
+    # Retrieve all subtasks under the parent task from API, once per parent
+    if not task_index.is_parent_loaded(parent_task_id):
+        existing_subtasks = get_subtasks_by_task_id(parent_task_id, access_token)
+        task_index.load_parent(parent_task_id, existing_subtasks)
+        import_log.debug("Retrieved %s subtasks under parent task '%s'.", len(existing_subtasks), parent_task_id)
 
-    # Check if the subtask already exists under the parent task
-    existing_subtask = next((subtask for subtask in existing_subtasks if subtask['title'].strip().lower() == subtask_data['title'].strip().lower()), None)
-    if existing_subtask:
-        print(f"[DEBUG] Subtask '{subtask_data['title']}' already exists under the parent task '{parent_task_id}'.")
-        return  # Subtask already exists under the parent, do nothing
+        # Check if the subtask already exists under the parent task
+        existing_subtask = task_index.find_in_parent(parent_task_id, subtask_data['title'])
+        if existing_subtask:
+            import_log.debug("Subtask '%s' already exists under the parent task '%s'.", subtask_data['title'], parent_task_id)
+            return  # Subtask already exists under the parent, do nothing
 
     # Check for the subtask in the entire space (cached tasks)
-    print(f"[DEBUG] Checking for subtask '{subtask_data['title']}' in the entire space '{space_id}'.")
-    existing_subtask_space = next((task for task in cached_tasks 
-                                   if task['title'].strip().lower() == subtask_data['title'].strip().lower() 
-                                   and task.get('supertaskId') != parent_task_id), None)
+    import_log.debug("Checking for subtask '%s' in the entire space '%s'.", subtask_data['title'], space_id)
+    existing_subtask_space = task_index.find_outside_parent(parent_task_id, subtask_data['title'])
 
     if existing_subtask_space:
-        print(f"[DEBUG] Subtask '{subtask_data['title']}' found in another parent task within the space.")
+        import_log.debug("Subtask '%s' found in another parent task within the space.", subtask_data['title'])
         existing_subtask_id = existing_subtask_space['id']
         update_subtask_with_parent(existing_subtask_id, parent_task_id, access_token)
-        print(f"[DEBUG] Updated subtask '{subtask_data['title']}' with new parent task '{parent_task_id}'.")
+        task_index.add_parent(existing_subtask_id, parent_task_id)
+        import_log.debug("Updated subtask '%s' with new parent task '%s'.", subtask_data['title'], parent_task_id)
     else:
-        print(f"[DEBUG] Subtask '{subtask_data['title']}' does not exist in space '{space_id}'. Creating a new subtask.")
+        import_log.debug("Subtask '%s' does not exist in space '%s'. Creating a new subtask.", subtask_data['title'], space_id)
         new_subtask = create_subtask(parent_task_id, space_id, subtask_data, responsible_ids, access_token)
         
         # Update the cache with the newly created subtask
         if new_subtask and 'id' in new_subtask:
             cached_tasks.append(new_subtask)
-            print(f"[DEBUG] Added newly created subtask '{new_subtask['title']}' with ID '{new_subtask['id']}' to cache.")
+            task_index.add(new_subtask)
+            task_index.add_parent(new_subtask['id'], parent_task_id)
+            import_log.debug("Added newly created subtask '%s' with ID '%s' to cache.", new_subtask['title'], new_subtask['id'])
         else:
-            print(f"[DEBUG] Failed to create the subtask or retrieve subtask ID.")
+            import_log.error("Failed to create the subtask or retrieve subtask ID.")
 
 def create_subtask(parent_task_id, space_id, subtask_data, responsible_ids, access_token):
-    endpoint = f'https://www.wrike.com/api/v4/tasks'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
+    endpoint = '/tasks'
 
     payload = {
         "title": subtask_data.get("title", ""),
@@ -727,16 +658,16 @@ def create_subtask(parent_task_id, space_id, subtask_data, responsible_ids, acce
         "superTasks": [parent_task_id],
     }
 
-    if "importance" in subtask_data and pd.notna(subtask_data["importance"]) and subtask_data["importance"]:
+    if "importance" in subtask_data and _notna(subtask_data["importance"]) and subtask_data["importance"]:
         payload["importance"] = subtask_data["importance"]
 
-    if "description" in subtask_data and pd.notna(subtask_data["description"]) and subtask_data["description"]:
+    if "description" in subtask_data and _notna(subtask_data["description"]) and subtask_data["description"]:
         payload["description"] = subtask_data["description"]
 
-    if pd.notna(subtask_data.get("start_date")) and pd.notna(subtask_data.get("end_date")):
+    if _notna(subtask_data.get("start_date")) and _notna(subtask_data.get("end_date")):
         payload["dates"] = {
-            "start": subtask_data.get("start_date").isoformat() if isinstance(subtask_data.get("start_date"), pd.Timestamp) else subtask_data.get("start_date"),
-            "due": subtask_data.get("end_date").isoformat() if isinstance(subtask_data.get("end_date"), pd.Timestamp) else subtask_data.get("end_date")
+            "start": _date_value(subtask_data.get("start_date")),
+            "due": _date_value(subtask_data.get("end_date"))
         }
 
         # Get custom fields from API specific to the space
@@ -744,15 +675,15 @@ def create_subtask(parent_task_id, space_id, subtask_data, responsible_ids, acce
 
     # Map Excel headings to Wrike custom fields
     mapped_custom_fields = map_excel_headings_to_custom_fields(subtask_data.keys(), custom_fields)
-    print(f"[DEBUG] Mapped Custom Fields: {mapped_custom_fields}")
+    import_log.debug("Mapped Custom Fields: %s", mapped_custom_fields)
 
     # Create custom fields payload
     custom_fields_payload = []
     for field_name, field_id in mapped_custom_fields.items():
         field_value = subtask_data.get(field_name) 
-        print(f"[DEBUG] Retrieving '{field_name}' from task data: '{field_value}'") 
+        import_log.debug("Retrieving '%s' from task data: '%s'", field_name, field_value)
         
-        if pd.notna(field_value):
+        if _notna(field_value):
             custom_fields_payload.append({
                 "id": field_id,
                 "value": str(field_value)  # Wrike expects the custom field values as strings
@@ -761,32 +692,28 @@ def create_subtask(parent_task_id, space_id, subtask_data, responsible_ids, acce
     if custom_fields_payload:
         payload["customFields"] = custom_fields_payload
 
-    # Debugging print statement to see the final payload
-    print("Final payload being sent:", payload)   
-    response = requests.post(endpoint, headers=headers, json=payload)
+    # Debug log of the final payload
+    import_log.debug("Final payload being sent: %s", truncated(payload))
+    response = get_client().post(endpoint, access_token, json=payload)
 
     if response.status_code == 200:
         subtask_data_response = response.json()
-        print(f"Subtask '{subtask_data['title']}' created successfully under parent task '{parent_task_id}'")
+        import_log.info("Subtask '%s' created successfully under parent task '%s'", subtask_data['title'], parent_task_id)
         return subtask_data_response['data'][0] if 'data' in subtask_data_response else None
     else:
-        print(f"Failed to create subtask '{subtask_data.get('title', '')}'. Status code: {response.status_code}")
-        print(response.text)
+        import_log.error("Failed to create subtask '%s'. Status code: %s Response: %s", subtask_data.get('title', ''), response.status_code, truncated(response))
         return None
 
 # Function to read configuration from Excel
 def read_config_from_excel(file_path):
+    import pandas as pd
     df = pd.read_excel(file_path, sheet_name='Config', header=1)
     config = df.iloc[0].to_dict()  # Convert first row to dictionary
     return config
 
 # Function to get the Wrike space ID by name
 def get_wrike_space_id(space_name, access_token):
-    url = f'https://www.wrike.com/api/v4/spaces'
-    headers = {'Authorization': f'Bearer {access_token}'}
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    spaces = response.json()['data']
+    spaces = get_cached_metadata('spaces', access_token, raise_errors=True)
     for space in spaces:
         if space['title'].lower() == space_name.lower():
             return space['id']
@@ -794,38 +721,32 @@ def get_wrike_space_id(space_name, access_token):
 
 # Function to get the details of a space
 def get_space_details(space_id, access_token):
-    url = f'https://www.wrike.com/api/v4/spaces/{space_id}'
-    headers = {'Authorization': f'Bearer {access_token}'}
-    response = requests.get(url, headers=headers)
+    url = f'/spaces/{space_id}'
+    response = get_client().get(url, access_token)
     response.raise_for_status()
     return response.json()['data'][0]
 
 # Function to create a new Wrike space
 def create_new_space(original_space, new_title, access_token):
-    url = f'https://www.wrike.com/api/v4/spaces'
-    headers = {'Authorization': f'Bearer {access_token}', 'Content-Type': 'application/json'}
+    url = '/spaces'
     payload = {
         "title": new_title,
         "description": original_space.get("description", ""),
         "accessType": original_space.get("accessType", ""),
         "members": original_space.get("members", [])
     }
-    response = requests.post(url, headers=headers, json=payload)
+    response = get_client().post(url, access_token, json=payload)
     response.raise_for_status()
+    metadata_cache.invalidate('spaces', access_token)
     return response.json()['data'][0]
 
 # Function to get custom fields in a space
 def get_custom_fields(access_token):
-    url = f'https://www.wrike.com/api/v4/customfields'
-    headers = {'Authorization': f'Bearer {access_token}'}
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    return response.json()['data']
+    return get_cached_metadata('customfields', access_token, raise_errors=True)
 
 # Function to create a new custom field scoped to the new space
 def create_custom_field(field_data, new_space_id, access_token):
-    url = f'https://www.wrike.com/api/v4/customfields'
-    headers = {'Authorization': f'Bearer {access_token}', 'Content-Type': 'application/json'}
+    url = '/customfields'
     payload = {
         "title": field_data.get("title"),
         "type": field_data.get("type"),  # e.g., 'Text', 'Numeric', 'DropDown'
@@ -833,8 +754,9 @@ def create_custom_field(field_data, new_space_id, access_token):
         "spaceId": new_space_id  # Set the new space ID as the scope
     }
 
-    response = requests.post(url, headers=headers, json=payload)
+    response = get_client().post(url, access_token, json=payload)
     response.raise_for_status()
+    metadata_cache.invalidate('customfields', access_token)
 
     return response.json()['data'][0]
 
@@ -853,17 +775,17 @@ def map_custom_fields(original_fields, original_space_id, new_space_id, access_t
         
         # If the field is account-wide, use the same ID
         if field_scope is None:
-            print(f"Account-wide custom field detected: {field['title']}. Reusing existing field ID.")
+            clone_log.info("Account-wide custom field detected: %s. Reusing existing field ID.", field['title'])
             field_mapping[field['id']] = field['id']
         elif field_scope == original_space_id:
-            print(f"Creating new custom field: {field['title']}")
+            clone_log.info("Creating new custom field: %s", field['title'])
             # Create the custom field in the new space
             new_field = create_custom_field(field, new_space_id, access_token)
             # Map the old field ID to the new field ID
             field_mapping[field['id']] = new_field['id']
-            print(f"Mapped Custom Field: {field['title']} -> New Field ID: {new_field['id']}")
+            clone_log.debug("Mapped Custom Field: %s -> New Field ID: %s", field['title'], new_field['id'])
         else:
-            print(f"Field {field['title']} is skipped due to missing or invalid scope.")
+            clone_log.warning("Field %s is skipped due to missing or invalid scope.", field['title'])
 
     return field_mapping
 
@@ -896,9 +818,8 @@ def map_custom_fields_propagate(original_fields, original_space_id, new_space_id
 
 # Function to get folders in a space
 def get_folders_in_space(space_id, access_token):
-    url = f'https://www.wrike.com/api/v4/spaces/{space_id}/folders'
-    headers = {'Authorization': f'Bearer {access_token}'}
-    response = requests.get(url, headers=headers)
+    url = f'/spaces/{space_id}/folders'
+    response = get_client().get(url, access_token)
     response.raise_for_status()
     return response.json()['data']
 
@@ -909,18 +830,17 @@ def get_folder_by_id(folder_id, folders):
             return folder
     return None
 
-# Function to get the hierarchy of folder titles
+# Function to get the hierarchy of folder titles.
+# `folders` is a folder list or a FolderTree; callers handling many folders of the
+# same list build the tree once with get_folder_tree and pass it here.
 def get_titles_hierarchy(folder_id, folders, path=""):
-    folder = get_folder_by_id(folder_id, folders)
-    if not folder:
-        return []
-    current_path = f"{path}/{folder['title']}" if path else folder['title']
-    current_entry = {"id": folder_id, "path": current_path, "title": folder["title"]}
-    paths = [current_entry]
-    for child_id in folder.get("childIds", []):
-        child_paths = get_titles_hierarchy(child_id, folders, current_path)
-        paths.extend(child_paths)
-    return paths
+    return get_folder_tree(folders).titles_hierarchy(folder_id, path)
+
+# Function to get a FolderTree for a folder list; a FolderTree is returned as is
+def get_folder_tree(folders):
+    if isinstance(folders, FolderTree):
+        return folders
+    return FolderTree(folders)
 
 # Function to get tasks in a folder
 def get_tasks_in_folder(folder_id, access_token):
@@ -933,17 +853,13 @@ def get_tasks_in_folder(folder_id, access_token):
 
     # Convert the fields list to a JSON string
     fields_json = json.dumps(fields)
-    url = f'https://www.wrike.com/api/v4/folders/{folder_id}/tasks?fields={fields_json}'
-    headers = {'Authorization': f'Bearer {access_token}'}
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    return response.json()['data']
+    url = f'/folders/{folder_id}/tasks'
+    return list(get_client().iter_data(url, access_token, params={'fields': fields_json}, raise_errors=True))
 
 # Function to get detailed information about a specific task
 def get_task_details(task_id, access_token):
-    url = f'https://www.wrike.com/api/v4/tasks/{task_id}'
-    headers = {'Authorization': f'Bearer {access_token}'}
-    response = requests.get(url, headers=headers)
+    url = f'/tasks/{task_id}'
+    response = get_client().get(url, access_token)
     response.raise_for_status()
     return response.json()['data'][0]
 
@@ -956,33 +872,34 @@ def find_task_across_folders(task_id, folders, access_token):
                 return task
     return None
 
-def create_or_update_task(new_folder_id, task_data, task_map, access_token, folders, folder_mapping, custom_field_mapping, is_subtask=False):
+def create_or_update_task(new_folder_id, task_data, task_map, access_token, folders, folder_mapping, custom_field_mapping, is_subtask=False, detail_cache=None):
+    # Task details and key -> new ID lookups go through the migration's cache, so each task is fetched once
+    detail_cache = detail_cache or get_task_detail_cache(access_token, task_map)
     task_key = task_data['title'] + "|" + str(task_data.get('dates', {}).get('due', ''))
 
     # Determine if this is a subtask and handle parent task creation first
     super_task_id = None
     if 'superTaskIds' in task_data and task_data['superTaskIds']:
         parent_task_id = task_data['superTaskIds'][0]  # Assuming there's only one parent
-        parent_task_key = get_task_key_by_id(parent_task_id, access_token, task_map)
+        parent_task_key = get_task_key_by_id(parent_task_id, access_token, task_map, detail_cache)
 
         if parent_task_key not in task_map:
             # Check if the parent task already exists in another folder in the original space
-            existing_parent_task = find_task_across_folders(parent_task_id, folders, access_token)
-            if existing_parent_task:
+            parent_task_data = detail_cache.get(parent_task_id)
+            folder_ids = set(folder['id'] for folder in folders)
+            if parent_task_data and any(folder_id in folder_ids for folder_id in parent_task_data.get('parentIds', [])):
                 # Parent exists in the original space, so link it to the new space folder
-                if existing_parent_task['id'] in folder_mapping:
-                    super_task_id = folder_mapping[existing_parent_task['id']]
+                if parent_task_data['id'] in folder_mapping:
+                    super_task_id = folder_mapping[parent_task_data['id']]
                 else:
                     # Parent exists in the original space but needs to be created in the new space
-                    new_parent_folder_id = folder_mapping.get(existing_parent_task['parentIds'][0])
-                    parent_task_data = get_task_details(parent_task_id, access_token)
-                    parent_task = create_or_update_task(new_parent_folder_id, parent_task_data, task_map, access_token, folders, folder_mapping)
-                    super_task_id = parent_task[0]['id'] if parent_task else None
-            else:
+                    new_parent_folder_id = folder_mapping.get(parent_task_data['parentIds'][0])
+                    parent_task = create_or_update_task(new_parent_folder_id, parent_task_data, task_map, access_token, folders, folder_mapping, custom_field_mapping, detail_cache=detail_cache)
+                    super_task_id = parent_task[0]['id'] if parent_task else task_map.get(parent_task_key)
+            elif parent_task_data:
                 # Parent task does not exist anywhere, create it
-                parent_task_data = get_task_details(parent_task_id, access_token)
-                parent_task = create_or_update_task(new_folder_id, parent_task_data, task_map, access_token, folders, folder_mapping)
-                super_task_id = parent_task[0]['id'] if parent_task else None
+                parent_task = create_or_update_task(new_folder_id, parent_task_data, task_map, access_token, folders, folder_mapping, custom_field_mapping, detail_cache=detail_cache)
+                super_task_id = parent_task[0]['id'] if parent_task else task_map.get(parent_task_key)
         else:
             super_task_id = task_map[parent_task_key]
     # Map custom fields for the task
@@ -1000,27 +917,24 @@ def create_or_update_task(new_folder_id, task_data, task_map, access_token, fold
         existing_task_id = task_map[task_key]
 
         # Get the details of the existing task to check its current parents
-        existing_task_details = get_task_details(existing_task_id, access_token)
+        existing_task_details = detail_cache.get(existing_task_id) or {}
         current_parents = existing_task_details.get('parentIds', [])
       
         # Only update if the new folder is not already a parent
         if not is_subtask and new_folder_id not in current_parents:
-            url = f'https://www.wrike.com/api/v4/tasks/{existing_task_id}'
-            headers = {
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/json'
-            }
+            url = f'/tasks/{existing_task_id}'
             update_payload = {
                 "addParents": [new_folder_id]
             }
 
-            print(f"Updating task ID: {existing_task_id} with new folder ID: {new_folder_id}")
-            response = requests.put(url, headers=headers, json=update_payload)
-            print(f"Response Status: {response.status_code}")
-            print(f"Response Data: {response.text}")
+            clone_log.info("Updating task ID: %s with new folder ID: %s", existing_task_id, new_folder_id)
+            response = get_client().put(url, access_token, json=update_payload)
+            clone_log.debug("Response Status: %s", response.status_code)
+            clone_log.debug("Response Data: %s", truncated(response))
             response.raise_for_status()
+            detail_cache.record_parent(existing_task_id, new_folder_id)
         else:
-            print(f"Task '{task_data['title']}' already exists in the folder. Skipping update.")
+            clone_log.info("Task '%s' already exists in the folder. Skipping update.", task_data['title'])
 
     else:
         # Create the task or subtask
@@ -1032,100 +946,35 @@ def create_or_update_task(new_folder_id, task_data, task_map, access_token, fold
             mapped_custom_fields=mapped_custom_fields  # Pass the mapped custom fields
         )
 
-        task_map[task_key] = created_task[0]['id']
+        detail_cache.record_created(task_key, created_task[0])
 
-        # Handle subtask creation for the newly created task
+        # Handle subtask creation for the newly created task, fetching all subtasks in one batch
+        detail_cache.prefetch(task_data.get('subTaskIds', []))
         for sub_task_id in task_data.get('subTaskIds', []):
-            subtask_data = get_task_details(sub_task_id, access_token)
-            create_or_update_task(new_folder_id, subtask_data, task_map, access_token, folders, folder_mapping, custom_field_mapping, is_subtask=True)
+            subtask_data = detail_cache.get(sub_task_id)
+            if subtask_data is None:
+                continue
+            create_or_update_task(new_folder_id, subtask_data, task_map, access_token, folders, folder_mapping, custom_field_mapping, is_subtask=True, detail_cache=detail_cache)
 
         return created_task
 
 # Function to create folders recursively, updating the folder_mapping with original-new folder relationships
-def create_folders_recursively(paths, root_folder_id, original_space_name, new_space_name, access_token, folders, custom_field_mapping):
-    folder_id_map = {}
-    folder_mapping = {}
-    new_paths_info = []
-    task_map = {}
-
-    for path in paths:
-        folder_path = path['path']
-
-        # Skip folder creation for the root space but handle its tasks
-        if folder_path == original_space_name:
-            root_tasks = get_tasks_in_folder(path['id'], access_token)
-            for task in root_tasks:
-                create_or_update_task(
-                    new_folder_id=root_folder_id,
-                    task_data=task,
-                    task_map=task_map,
-                    access_token=access_token,
-                    folders=folders,
-                    folder_mapping=folder_mapping,
-                    custom_field_mapping=custom_field_mapping
-                )
-            continue
-
-        # Adjust folder_path for subfolders
-        if folder_path.startswith(original_space_name + '/'):
-            folder_path = folder_path[len(original_space_name) + 1:]
+# The source folders and tasks are snapshotted once and created from a dependency-ordered plan,
+# so the number of requests grows linearly with the number of cloned folders and tasks
+@phase('create_folders_recursively')
+def create_folders_recursively(paths, root_folder_id, original_space_name, new_space_name, access_token, folders, custom_field_mapping, max_workers=8):
+    # Imported here because clone.py builds on the helpers of this module
+    from PyWrike.clone import clone_folders
 
-        path_parts = folder_path.strip('/').split('/')
-        parent_id = root_folder_id
+    engine = clone_folders(paths, root_folder_id, original_space_name, new_space_name, access_token, folders, custom_field_mapping, max_workers)
+    return engine.new_paths_info
 
-        for part in path_parts:
-            if part not in folder_id_map:
-                # Check if the current folder is a project
-                folder_data = next((f for f in folders if f.get('title') == part), None)
-
-                project_details = folder_data.get('project') if folder_data else None
-
-                # Create the folder or project
-                new_folder_id = create_folder_or_project(
-                    title=part,
-                    parent_id=parent_id,
-                    access_token=access_token,
-                    project_details=project_details
-                )
-
-                folder_id_map[part] = new_folder_id
-                new_path = f"{new_space_name}/{'/'.join(path_parts[:path_parts.index(part)+1])}"
-                new_paths_info.append({
-                    "original_folder_id": path['id'],
-                    "original_folder_title": path['title'],
-                    "original_folder_path": path['path'],
-                    "new_folder_id": new_folder_id,
-                    "new_folder_path": new_path
-                })
-                folder_mapping[path['id']] = new_folder_id
-            parent_id = folder_id_map[part]
-
-        # Process tasks in the current folder
-        folder_tasks = get_tasks_in_folder(path['id'], access_token)
-        for task in folder_tasks:
-            create_or_update_task(
-                new_folder_id=parent_id,
-                task_data=task,
-                task_map=task_map,
-                access_token=access_token,
-                folders=folders,
-                folder_mapping=folder_mapping,
-                custom_field_mapping=custom_field_mapping
-            )
-
-    return new_paths_info
-
-def get_task_key_by_id(task_id, access_token, task_map):
-    task_details = get_task_details(task_id, access_token)
-    task_key = task_details['title'] + "|" + str(task_details.get('dates', {}).get('due', ''))
-    return task_key
+def get_task_key_by_id(task_id, access_token, task_map, detail_cache=None):
+    detail_cache = detail_cache or get_task_detail_cache(access_token, task_map)
+    return detail_cache.key(task_id)
 
 def create_tasks(new_folder_id=None, task_data=None, super_task_id=None, access_token=None, mapped_custom_fields=None):
-    url = f'https://www.wrike.com/api/v4/folders/{new_folder_id}/tasks' if new_folder_id else f'https://www.wrike.com/api/v4/tasks'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
+    url = f'/folders/{new_folder_id}/tasks' if new_folder_id else '/tasks'
     
     task_dates = task_data.get('dates', {})
     start_date = task_dates.get('start', "")
@@ -1174,126 +1023,78 @@ def create_tasks(new_folder_id=None, task_data=None, super_task_id=None, access_
     if super_task_id:
         payload["superTasks"] = [super_task_id]
     
-    print(f"Payload: {json.dumps(payload, indent=2)}")
+    clone_log.debug("Payload: %s", truncated(payload))
     
-    response = requests.post(url, headers=headers, json=payload)
-    print(f"Response status: {response.status_code}")
-    print(f"Response data: {response.json()}")
+    response = get_client().post(url, access_token, json=payload)
+    clone_log.debug("Response status: %s", response.status_code)
+    clone_log.debug("Response data: %s", truncated(response))
     
     response.raise_for_status()
     return response.json()['data']
 
 # Function to create a folder
 def create_folder(title, parent_id, access_token):
-    url = f'https://www.wrike.com/api/v4/folders/{parent_id}/folders'
+    url = f'/folders/{parent_id}/folders'
     payload = {'title': title, 'shareds': []}
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
-    response = requests.post(url, headers=headers, json=payload)
+    response = get_client().post(url, access_token, json=payload)
     response.raise_for_status()
-    return response.json()['data'][0]['id']
+    folder_id = response.json()['data'][0]['id']
+    get_path_resolver(access_token).record(parent_id, title, folder_id)
+    return folder_id
 
 # Function to create a folder in a given space and parent folder
 def create_folder_in_space(folder_name, parent_folder_id, access_token):
-    endpoint = f'https://www.wrike.com/api/v4/folders'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
+    endpoint = '/folders'
     data = {
         'title': folder_name,
         'parents': [parent_folder_id]
     }
 
-    response = requests.post(endpoint, headers=headers, json=data)
+    response = get_client().post(endpoint, access_token, json=data)
     if response.status_code == 200:
         new_folder = response.json().get('data', [])[0]
-        print(f"Folder '{folder_name}' created successfully in parent folder '{parent_folder_id}'.")
+        get_path_resolver(access_token).record(parent_folder_id, folder_name, new_folder['id'])
+        http_log.info("Folder '%s' created successfully in parent folder '%s'.", folder_name, parent_folder_id)
         return new_folder['id']
     else:
-        print(f"Failed to create folder '{folder_name}'. Status code: {response.status_code}")
-        print(response.text)
+        http_log.error("Failed to create folder '%s'. Status code: %s Response: %s", folder_name, response.status_code, truncated(response))
         return None
 
 # Function to get the space ID by space name
 def get_space_id_by_name(space_name, access_token):
-    endpoint = f'https://www.wrike.com/api/v4/spaces'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
-
-    response = requests.get(endpoint, headers=headers)
-    if response.status_code != 200:
-        print(f"Failed to retrieve spaces. Status code: {response.status_code}")
-        print(response.text)
+    spaces = get_cached_metadata('spaces', access_token)
+    if spaces is None:
         return None
 
-    spaces = response.json().get('data', [])
     for space in spaces:
         if space['title'] == space_name:
             return space['id']
 
-    print(f"Space with name '{space_name}' not found.")
+    http_log.info("Space with name '%s' not found.", space_name)
     return None
 
 # Function to get the ID of a folder by its path within a specific space
-def get_folder_id_by_paths(folder_path, space_id, access_token):
-    folder_names = folder_path.split('\\')  # Split the folder path into individual folders
-    parent_folder_id = None  # Start with no parent folder
-
-    # Iterate through folder names and get each folder's ID in the hierarchy
-    for folder_name in folder_names:
-        if parent_folder_id:
-            # Fetch subfolder of the current parent folder
-            parent_folder_id = get_subfolder_id_by_name(parent_folder_id, folder_name, access_token)
-        else:
-            # Fetch top-level folder in the given space
-            parent_folder_id = get_folder_in_space_by_name(folder_name, space_id, access_token)
-        
-        if not parent_folder_id:
-            print(f"Folder '{folder_name}' not found.")
-            return None
-
-    return parent_folder_id
+def get_folder_id_by_paths(folder_path, space_id, access_token, path_separator='\\'):
+    # Each distinct parent's folder listing is fetched once and shared between paths
+    folder_id = get_path_resolver(access_token).resolve(folder_path, space_id, separator=path_separator, strip=False)
+    if not folder_id:
+        http_log.info("Folder path '%s' not found.", folder_path)
+    return folder_id
 
 # Function to get the ID of a folder by its full path within a space
 def get_folder_id_by_paths_2(folder_path, space_id, access_token, path_separator='\\'):
-    folder_names = folder_path.strip().split(path_separator)  # Split the folder path into individual folders
-    parent_folder_id = None  # Start with no parent folder
-
-    for folder_name in folder_names:
-        folder_name = folder_name.strip()
-        if not folder_name:
-            continue  # Skip empty segments
-
-        if parent_folder_id:
-            # Fetch subfolder of the current parent folder
-            parent_folder_id = get_subfolder_id_by_name(parent_folder_id, folder_name, access_token)
-        else:
-            # Fetch top-level folder in the given space
-            parent_folder_id = get_folder_in_space_by_name(folder_name, space_id, access_token)
-
-        if not parent_folder_id:
-            print(f"Folder '{folder_name}' not found in the path '{folder_path}'.")
-            return None
-
-    return parent_folder_id
+    folder_id = get_path_resolver(access_token).resolve(folder_path, space_id, separator=path_separator)
+    if not folder_id:
+        http_log.info("Folder path '%s' not found in space '%s'.", folder_path, space_id)
+    return folder_id
 
 # Function to get a folder within a space by its name
 def get_folder_in_space_by_name(folder_name, space_id, access_token):
-    endpoint = f'https://www.wrike.com/api/v4/spaces/{space_id}/folders'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
+    endpoint = f'/spaces/{space_id}/folders'
 
-    response = requests.get(endpoint, headers=headers)
+    response = get_client().get(endpoint, access_token)
     if response.status_code != 200:
-        print(f"Failed to retrieve folders in space {space_id}. Status code: {response.status_code}")
-        print(response.json())  # Print the full error response
+        http_log.error("Failed to retrieve folders in space %s. Status code: %s Response: %s", space_id, response.status_code, truncated(response))
         return None
 
     folders = response.json().get('data', [])
@@ -1301,21 +1102,16 @@ def get_folder_in_space_by_name(folder_name, space_id, access_token):
         if folder['title'] == folder_name:
             return folder['id']
 
-    print(f"Folder with name '{folder_name}' not found in space {space_id}.")
+    http_log.info("Folder with name '%s' not found in space %s.", folder_name, space_id)
     return None
 
 # Function to get subfolder ID within a parent folder by name
 def get_subfolder_id_by_name(parent_folder_id, subfolder_name, access_token):
-    endpoint = f'https://www.wrike.com/api/v4/folders/{parent_folder_id}/folders'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
+    endpoint = f'/folders/{parent_folder_id}/folders'
 
-    response = requests.get(endpoint, headers=headers)
+    response = get_client().get(endpoint, access_token)
     if response.status_code != 200:
-        print(f"Failed to retrieve subfolders in folder {parent_folder_id}. Status code: {response.status_code}")
-        print(response.json())
+        http_log.error("Failed to retrieve subfolders in folder %s. Status code: %s Response: %s", parent_folder_id, response.status_code, truncated(response))
         return None
 
     subfolders = response.json().get('data', [])
@@ -1323,25 +1119,17 @@ def get_subfolder_id_by_name(parent_folder_id, subfolder_name, access_token):
         if subfolder['title'] == subfolder_name:
             return subfolder['id']
 
-    print(f"Subfolder '{subfolder_name}' not found in folder {parent_folder_id}.")
+    http_log.info("Subfolder '%s' not found in folder %s.", subfolder_name, parent_folder_id)
     return None
 
 # Function to get the IDs of all tasks in a folder
 def get_all_tasks_in_folder(folder_id, access_token):
-    endpoint = f'https://www.wrike.com/api/v4/folders/{folder_id}/tasks'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
-
-    response = requests.get(endpoint, headers=headers)
-    if response.status_code != 200:
-        print(f"Failed to retrieve tasks. Status code: {response.status_code}")
-        print(response.text)
-        return None
+    return list(iter_all_tasks_in_folder(folder_id, access_token))
 
-    tasks = response.json().get('data', [])
-    return tasks
+# Generator yielding the tasks in a folder page by page
+def iter_all_tasks_in_folder(folder_id, access_token, page_size=DEFAULT_PAGE_SIZE):
+    endpoint = f'/folders/{folder_id}/tasks'
+    return get_client().iter_data(endpoint, access_token, page_size=page_size)
 
 # Function to get the ID of a task by its title in a folder
 def get_task_id_by_titles(folder_id, task_title, access_token):
@@ -1349,15 +1137,11 @@ def get_task_id_by_titles(folder_id, task_title, access_token):
     for task in tasks:
         if task['title'] == task_title:
             return task['id']
-    print(f"Task with title '{task_title}' not found.")
+    http_log.info("Task with title '%s' not found.", task_title)
     return None
 
 def create_task_folder(folder_id, task_data, access_token, mapped_custom_fields=None):
-    url = f'https://www.wrike.com/api/v4/folders/{folder_id}/tasks'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
+    url = f'/folders/{folder_id}/tasks'
     
     task_dates = task_data.get('dates', {})
     start_date = task_dates.get('start', "")
@@ -1404,54 +1188,37 @@ def create_task_folder(folder_id, task_data, access_token, mapped_custom_fields=
     if effortAllocation:
         payload["effortAllocation"] = effort_allocation_payload
             
-    response = requests.post(url, headers=headers, json=payload)
+    response = get_client().post(url, access_token, json=payload)
         
     response.raise_for_status()
     return response.json()['data']
 
 # Function to get task details by task ID
 def get_task_detail(task_id, access_token):
-    endpoint = f'https://www.wrike.com/api/v4/tasks/{task_id}'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
+    endpoint = f'/tasks/{task_id}'
 
-    response = requests.get(endpoint, headers=headers)
+    response = get_client().get(endpoint, access_token)
     if response.status_code != 200:
-        print(f"Failed to retrieve task details. Status code: {response.status_code}")
-        print(response.text)
+        http_log.error("Failed to retrieve task details. Status code: %s Response: %s", response.status_code, truncated(response))
         return None
 
     task = response.json().get('data', [])[0]
     return task
 
 # Retry mechanism for handling rate limits
-def retry_request(url, headers, retries=3, delay=60):
-    for _ in range(retries):
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            return response
-        elif response.status_code == 429:
-            print("Rate limit exceeded. Sleeping for 60 seconds...")
-            time.sleep(delay)
-        else:
-            response.raise_for_status()
-    raise Exception(f"Failed after {retries} retries")
+# The shared client waits on the process-wide token bucket before every request and
+# retries 429 responses after Retry-After; `delay` is only used when the API sends none.
+def retry_request(url, headers=None, retries=3, delay=60, access_token=None):
+    response = get_client().get(url, access_token, headers=headers, retries=retries - 1, retry_delay=delay)
+    if response.status_code == 429:
+        raise Exception(f"Failed after {retries} retries")
+    response.raise_for_status()
+    return response
 
 # Function to get all spaces
 def get_all_spaces(access_token):
-    url = 'https://www.wrike.com/api/v4/spaces'
-    headers = {'Authorization': f'Bearer {access_token}'}
-    response = retry_request(url, headers=headers)
-    print("Fetching all spaces...")
-    
-    try:
-        return response.json()["data"]
-    except json.JSONDecodeError as e:
-        print(f"Error parsing JSON response: {e}")
-        print(f"Response content: {response.content}")
-        raise
+    export_log.debug("Fetching all spaces...")
+    return get_cached_metadata('spaces', access_token, raise_errors=True)
 
 # Function to get the space ID from space name
 def get_space_id_from_name(space_name, spaces):
@@ -1462,38 +1229,41 @@ def get_space_id_from_name(space_name, spaces):
 
 # Function to get all folders and subfolders in the space
 def get_all_folders(space_id, access_token):
-    url = f'https://www.wrike.com/api/v4/spaces/{space_id}/folders'
-    headers = {'Authorization': f'Bearer {access_token}'}
-    response = retry_request(url, headers=headers)
-    print("Fetching all folders and subfolders...")
+    url = f'/spaces/{space_id}/folders'
+    response = retry_request(url, access_token=access_token)
+    export_log.debug("Fetching all folders and subfolders...")
     
     try:
         return response.json()
     except json.JSONDecodeError as e:
-        print(f"Error parsing JSON response: {e}")
-        print(f"Response content: {response.content}")
+        export_log.error("Error parsing JSON response: %s", e)
+        export_log.error("Response content: %s", truncated(response))
         raise
 
+# Function to apply the custom status and custom field name mappings to a copy of raw task data.
+# The input is left unchanged, since it may be shared, e.g. a SpaceSync store entry.
+def map_task_details(task_data, custom_status_mapping, custom_field_mapping):
+    task_data = dict(task_data)
+    custom_status_id = task_data.get("customStatusId")
+    task_data["customStatus"] = custom_status_mapping.get(custom_status_id, "Unknown")
+    # Process custom fields by mapping ID to name
+    custom_fields = task_data.get("customFields", [])
+    custom_field_data = {custom_field_mapping.get(cf["id"], "Unknown Field"): cf.get("value", "") for cf in custom_fields}
+    task_data["customFields"] = custom_field_data
+    return task_data
+
 # Function to get task details by ID with custom status mapping
 def get_tasks_details(task_id, access_token, custom_status_mapping, custom_field_mapping):
-    url = f'https://www.wrike.com/api/v4/tasks/{task_id}'
-    headers = {'Authorization': f'Bearer {access_token}'}
-    response = retry_request(url, headers=headers)
-    print(f"Fetching details for task {task_id}")
+    url = f'/tasks/{task_id}'
+    response = retry_request(url, access_token=access_token)
+    export_log.debug("Fetching details for task %s", task_id)
     
     try:
         task_data = response.json()["data"][0]
-        custom_status_id = task_data.get("customStatusId")
-        task_data["customStatus"] = custom_status_mapping.get(custom_status_id, "Unknown")
-        # Process custom fields by mapping ID to name
-        custom_fields = task_data.get("customFields", [])
-        custom_field_data = {custom_field_mapping.get(cf["id"], "Unknown Field"): cf.get("value", "") for cf in custom_fields}
-        task_data["customFields"] = custom_field_data
-
-        return task_data
+        return map_task_details(task_data, custom_status_mapping, custom_field_mapping)
     except json.JSONDecodeError as e:
-        print(f"Error parsing JSON response: {e}")
-        print(f"Response content: {response.content}")
+        export_log.error("Error parsing JSON response: %s", e)
+        export_log.error("Response content: %s", truncated(response))
         raise
 
 # Function to get tasks for a folder
@@ -1507,42 +1277,55 @@ def get_tasks_for_folder(folder_id, access_token):
 
     # Convert the fields list to a JSON string
     fields_json = json.dumps(fields)
-    url = f'https://www.wrike.com/api/v4/folders/{folder_id}/tasks?fields={fields_json}'
-    headers = {'Authorization': f'Bearer {access_token}'}
-    response = retry_request(url, headers=headers)
-    print(f"Fetching tasks for folder {folder_id}")
-    
-    try:
-        return response.json()["data"]
-    except json.JSONDecodeError as e:
-        print(f"Error parsing JSON response: {e}")
-        print(f"Response content: {response.content}")
-        raise
+    url = f'/folders/{folder_id}/tasks'
+    export_log.debug("Fetching tasks for folder %s", folder_id)
+    return list(get_client().iter_data(url, access_token, params={'fields': fields_json}, raise_errors=True))
 
 # Recursive function to get all subtask IDs
-def get_all_subtask_ids(task, token):
+def get_all_subtask_ids(task, token, subtasks=None):
+    if subtasks is None:
+        # Fetch the whole subtask tree up front, one request per 100 tasks per level
+        subtasks = BatchFetcher(token).fetch_task_tree(task.get("subTaskIds", []))
     task_ids = [{"id": task["id"], "title": task["title"]}]
     if "subTaskIds" in task:
         for subtask_id in task["subTaskIds"]:
-            subtask = get_task_details(subtask_id, token, {})
-            task_ids.extend(get_all_subtask_ids(subtask, token))
+            if subtask_id in subtasks:
+                task_ids.extend(get_all_subtask_ids(subtasks[subtask_id], token, subtasks))
     return task_ids
 
 # Function to clean HTML content and preserve line breaks
-def clean_html(raw_html):
+# Descriptions go through a streaming tag stripper memoized by content hash;
+# use_bs4=True (or a parser error) falls back to BeautifulSoup
+def clean_html(raw_html, use_bs4=False):
+    if not use_bs4:
+        try:
+            return clean_description(raw_html)
+        except Exception as e:
+            export_log.warning("Falling back to BeautifulSoup to clean description: %s", e)
+    from bs4 import BeautifulSoup
     soup = BeautifulSoup(raw_html, "html.parser")
     lines = soup.stripped_strings
     return "\n".join(lines)
 
+# Function to fetch the emails of many users at once into a user cache
+def prefetch_user_details(user_ids, access_token, user_cache, fetcher=None):
+    missing = [user_id for user_id in user_ids if user_id not in user_cache]
+    if missing:
+        fetcher = fetcher or BatchFetcher(access_token)
+        for user_id, user_data in fetcher.fetch_users(missing).items():
+            profiles = user_data.get("profiles") or [{}]
+            if profiles[0].get("email"):
+                user_cache[user_id] = profiles[0]["email"]
+    return user_cache
+
 # Function to get user details by ID
 def get_user_details(user_id, access_token, user_cache):
     if user_id in user_cache:
         return user_cache[user_id]
     
-    url = f"https://www.wrike.com/api/v4/users/{user_id}"
-    headers = {'Authorization': f'Bearer {access_token}'}
-    response = retry_request(url, headers=headers)
-    print(f"Fetching details for user {user_id}")
+    url = f"/users/{user_id}"
+    response = retry_request(url, access_token=access_token)
+    export_log.debug("Fetching details for user %s", user_id)
     
     try:
         user_data = response.json()["data"][0]
@@ -1550,23 +1333,14 @@ def get_user_details(user_id, access_token, user_cache):
         user_cache[user_id] = email
         return email
     except json.JSONDecodeError as e:
-        print(f"Error parsing JSON response: {e}")
-        print(f"Response content: {response.content}")
+        export_log.error("Error parsing JSON response: %s", e)
+        export_log.error("Response content: %s", truncated(response))
         raise
 
 # Function to get custom statuses
 def get_custom_statuses(access_token):
-    url = 'https://www.wrike.com/api/v4/workflows'
-    headers = {'Authorization': f'Bearer {access_token}'}
-    response = retry_request(url, headers=headers)
-    print("Fetching custom statuses...")
-    
-    try:
-        return response.json()["data"]
-    except json.JSONDecodeError as e:
-        print(f"Error parsing JSON response: {e}")
-        print(f"Response content: {response.content}")
-        raise
+    export_log.debug("Fetching custom statuses...")
+    return get_cached_metadata('workflows', access_token, raise_errors=True)
 
 # Function to create a mapping from customStatusId to custom status name
 def create_custom_status_mapping(workflows):
@@ -1593,51 +1367,71 @@ def save_to_json(data, space_name):
         json.dump(data, f, indent=4)
 
 # Function to create a folder by its path within a specific space
-def create_folder_by_path(folder_path, space_id, access_token):
-    folder_names = folder_path.split('\\')
-    parent_folder_id = get_folder_id_by_name(space_id, folder_names[0], access_token)
-
-    # If the parent folder does not exist, create it
-    if not parent_folder_id:
-        parent_folder_id = create_folders(space_id, folder_names[0], access_token)
-        if not parent_folder_id:
-            print(f"Failed to create the parent folder '{folder_names[0]}' in space '{space_id}'")
-            return None
-
-    # Iterate over the subfolders and create them if necessary
-    for folder_name in folder_names[1:]:
-        parent_folder_id = get_or_create_subfolder(parent_folder_id, folder_name, access_token)
-        if not parent_folder_id:
-            print(f"Failed to create or find subfolder '{folder_name}' in space '{space_id}'")
-            return None
-
-    return parent_folder_id
+def create_folder_by_path(folder_path, space_id, access_token, path_separator='\\'):
+    # Top-level folders are created under the space's root folder, subfolders under their parent
+    create_folder = lambda parent_id, name: create_subfolder(parent_id, name, access_token)
+    folder_id = get_path_resolver(access_token).resolve(
+        folder_path,
+        space_id,
+        create_folder=create_folder,
+        create_top_level_folder=create_folder,
+        separator=path_separator
+    )
+    if not folder_id:
+        clone_log.error("Failed to create or find folder path '%s' in space '%s'", folder_path, space_id)
+    return folder_id
+
+# Function to find or create many folder paths in a space at once.
+# Existing prefixes are resolved through the path cache, the missing folders are
+# created level by level with up to max_workers concurrent requests per level.
+# Returns a dict of path -> folder ID (None for paths that could not be created).
+def create_folders_by_paths(folder_paths, space_id, access_token, path_separator='\\', max_workers=8):
+    resolver = get_path_resolver(access_token)
+    folder_ids = {'': space_id}
+    relative_paths = {}
+    for folder_path in folder_paths:
+        parts = resolver.split(folder_path, path_separator)
+        relative_paths[folder_path] = path_separator.join(parts)
+        for depth in range(1, len(parts) + 1):
+            prefix = path_separator.join(parts[:depth])
+            if prefix in folder_ids:
+                continue
+            folder_id = resolver.resolve(prefix, space_id, separator=path_separator)
+            if not folder_id:
+                break
+            folder_ids[prefix] = folder_id
+
+    # Top-level folders are created under the space's root folder, subfolders under their parent
+    create_folder_levels(
+        [path for path in relative_paths.values() if path],
+        folder_ids,
+        lambda parent_id, title, path: create_subfolder(parent_id, title, access_token),
+        separator=path_separator,
+        max_workers=max_workers
+    )
+    return {folder_path: folder_ids.get(path) if path else None for folder_path, path in relative_paths.items()}
 
 # Helper function to create a folder in a space
 def create_folders(space_id, folder_name, access_token):
-    url = f"https://www.wrike.com/api/v4/folders"
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json"
-    }
+    url = "/folders"
     data = {
         "title": folder_name,
         "spaceId": space_id
     }
-    response = requests.post(url, headers=headers, json=data)
+    response = get_client().post(url, access_token, json=data)
     if response.status_code == 201:
-        return response.json().get("data", {}).get("id")
+        folder_id = response.json().get("data", {}).get("id")
+        if folder_id:
+            # Top-level folder of the space
+            get_path_resolver(access_token).record(space_id, folder_name, folder_id)
+        return folder_id
     else:
-        print(f"Error creating folder '{folder_name}': {response.text}")
+        clone_log.error("Error creating folder '%s': %s", folder_name, truncated(response))
         return None
 
 # Function to create a folder or project
 def create_folder_or_project(title, parent_id, access_token, project_details=None):
-    url = f'https://www.wrike.com/api/v4/folders/{parent_id}/folders'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
+    url = f'/folders/{parent_id}/folders'
     
     # Common payload for folders
     payload = {
@@ -1654,28 +1448,19 @@ def create_folder_or_project(title, parent_id, access_token, project_details=Non
             'createdDate': project_details.get('createdDate')
         }
 
-    response = requests.post(url, headers=headers, json=payload)
+    response = get_client().post(url, access_token, json=payload)
     response.raise_for_status()
     
-    return response.json()['data'][0]['id']
+    folder_id = response.json()['data'][0]['id']
+    get_path_resolver(access_token).record(parent_id, title, folder_id)
+    return folder_id
 
 # Function to get details of subtasks
 def get_subtask_details(subtask_ids, access_token):
-    headers = {'Authorization': f'Bearer {access_token}'}
-    subtasks = []
-    for subtask_id in subtask_ids:
-        url = f'https://www.wrike.com/api/v4/tasks/{subtask_id}'
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            subtask_data = response.json()['data'][0]
-            subtasks.append(subtask_data)
-        else:
-            print(f"Failed to get subtask details for subtask {subtask_id}. Status Code: {response.status_code}")
-    return subtasks
+    return BatchFetcher(access_token).tasks(subtask_ids)
 
 # Function to get tasks in a folder
 def get_tasks_in_folder_json(folder_id, access_token):
-    headers = {'Authorization': f'Bearer {access_token}'}
     fields = [
         "subTaskIds", "authorIds", "customItemTypeId", "responsibleIds",
         "description", "hasAttachments", "dependencyIds", "superParentIds",
@@ -1685,43 +1470,35 @@ def get_tasks_in_folder_json(folder_id, access_token):
 
     # Convert the fields list to a JSON string
     fields_json = json.dumps(fields)
-    url = f'https://www.wrike.com/api/v4/folders/{folder_id}/tasks?fields={fields_json}'
-    response = requests.get(url, headers=headers)
+    url = f'/folders/{folder_id}/tasks?fields={fields_json}'
+    response = get_client().get(url, access_token)
     
     if response.status_code == 200:
         tasks = response.json()['data']
-        for task in tasks:
-            # Fetch details of subtasks recursively
-            if 'subTaskIds' in task and task['subTaskIds']:
-                task['subtasks'] = get_subtask_details_json(task['subTaskIds'], access_token)
-        return tasks
+        # Fetch details of subtasks recursively, one batch per level for the whole folder
+        return attach_subtask_tree(tasks, BatchFetcher(access_token))
     else:
-        print(f"Failed to get tasks for folder {folder_id}. Status Code: {response.status_code}")
+        export_log.error("Failed to get tasks for folder %s. Status Code: %s", folder_id, response.status_code)
         return []
 
+# Generator yielding the folders of a workspace one at a time, each with its tasks and subtasks
+def iter_folders_json(workspace_id, access_token):
+    url = f'/spaces/{workspace_id}/folders'
+    response = get_client().get(url, access_token)
+    if response.status_code != 200:
+        export_log.error("Failed to get folders for workspace %s. Status Code: %s", workspace_id, response.status_code)
+        return
+    for folder in response.json()['data']:
+        folder['tasks'] = get_tasks_in_folder_json(folder['id'], access_token)
+        yield folder
+
 # Function to get all folders in a workspace
 def get_all_folders_json(workspace_id, access_token):
-    headers = {'Authorization': f'Bearer {access_token}'}
-    url = f'https://www.wrike.com/api/v4/spaces/{workspace_id}/folders'
-    response = requests.get(url, headers=headers)
-    workspace_data = {'workspace_id': workspace_id, 'folders': []}
-    if response.status_code == 200:
-        folders = response.json()['data']
-        for folder in folders:
-            folder_data = folder
-            folder_data['tasks'] = get_tasks_in_folder_json(folder['id'], access_token)
-            workspace_data['folders'].append(folder_data)
-    else:
-        print(f"Failed to get folders for workspace {workspace_id}. Status Code: {response.status_code}")
-    return workspace_data
+    return {'workspace_id': workspace_id, 'folders': list(iter_folders_json(workspace_id, access_token))}
 
 
 def create_task_folder_propagate(folder_id, task_data, access_token, custom_field_mapping=None):
-    url = f'https://www.wrike.com/api/v4/folders/{folder_id}/tasks'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
+    url = f'/folders/{folder_id}/tasks'
         
     task_dates = task_data.get('dates', {})
     start_date = task_dates.get('start', "")
@@ -1771,7 +1548,7 @@ def create_task_folder_propagate(folder_id, task_data, access_token, custom_fiel
         payload["effortAllocation"] = effort_allocation_payload
             
     # Create task
-    response = requests.post(url, headers=headers, json=payload)
+    response = get_client().post(url, access_token, json=payload)
     response.raise_for_status()
     created_task = response.json()['data'][0]
     parent_task_id = created_task['id']
@@ -1792,7 +1569,7 @@ def create_task_folder_propagate(folder_id, task_data, access_token, custom_fiel
 
         subtask_data = get_task_detail(sub_task_id, access_token)
         if not subtask_data:
-            print(f"Failed to retrieve subtask data for ID {sub_task_id}")
+            clone_log.error("Failed to retrieve subtask data for ID %s", sub_task_id)
             continue
 
         create_subtask_propagate(
@@ -1806,11 +1583,7 @@ def create_task_folder_propagate(folder_id, task_data, access_token, custom_fiel
     return created_task
 
 def create_subtask_propagate(parent_task_id, space_id, subtask_data, access_token, custom_field_mapping, processed_subtasks):
-    endpoint = f'https://www.wrike.com/api/v4/tasks'
-    headers = {
-        'Authorization': f'Bearer {access_token}',
-        'Content-Type': 'application/json'
-    }
+    endpoint = '/tasks'
  
     subtask_dates = subtask_data.get('dates', {})
     start_date = subtask_dates.get('start', "")
@@ -1872,7 +1645,7 @@ def create_subtask_propagate(parent_task_id, space_id, subtask_data, access_toke
         payload["customFields"] = mapped_custom_fields  # Attach custom fields to the subtask
 
     # Create subtask
-    response = requests.post(endpoint, headers=headers, json=payload)
+    response = get_client().post(endpoint, access_token, json=payload)
     response.raise_for_status()
     created_subtask = response.json()['data'][0]
     subtask_id = created_subtask['id']
@@ -1881,7 +1654,7 @@ def create_subtask_propagate(parent_task_id, space_id, subtask_data, access_toke
     for nested_sub_task_id in subtask_data.get('subTaskIds', []):
         nested_subtask_data = get_task_detail(nested_sub_task_id, access_token)
         if not nested_subtask_data:
-            print(f"Warning: No data found for nested subtask ID {nested_sub_task_id}")
+            clone_log.warning("No data found for nested subtask ID %s", nested_sub_task_id)
             continue
         create_subtask_propagate(
             parent_task_id=subtask_id,
@@ -1904,21 +1677,32 @@ def get_unique_custom_field_titles(custom_fields):
 
 # Function to process subtasks recursively with duplicate checks
 def process_subtasks(task_id, task_key, space_name, folder_path, parent_title, access_token, 
-                     custom_status_mapping, custom_field_mapping, custom_field_names, ws, processed_subtasks, depth=1):
+                     custom_status_mapping, custom_field_mapping, custom_field_names, ws, processed_subtasks, depth=1,
+                     task_cache=None, user_cache=None, fetcher=None):
     """
     Recursively process subtasks and their nested subtasks.
+
+    `task_cache` maps task IDs to raw task data that was already fetched in a
+    batch; the subtasks of each task are prefetched into it together.
     """
-    user_cache = {}
+    if user_cache is None:
+        user_cache = {}
+    if task_cache is None:
+        task_cache = {}
+    fetcher = fetcher or BatchFetcher(access_token)
     try:
         if task_id in processed_subtasks:
-            print(f"Skipping already processed subtask {task_id}")
+            export_log.debug("Skipping already processed subtask %s", task_id)
             return
         processed_subtasks.add(task_id)
 
-        print(f"Processing task {task_id} at depth {depth}")
+        export_log.debug("Processing task %s at depth %s", task_id, depth)
 
-        # Fetch task details
-        task_details = get_tasks_details(task_id, access_token, custom_status_mapping, custom_field_mapping)
+        # Fetch task details, unless they were prefetched in a batch
+        if task_id in task_cache:
+            task_details = map_task_details(task_cache.pop(task_id), custom_status_mapping, custom_field_mapping)
+        else:
+            task_details = get_tasks_details(task_id, access_token, custom_status_mapping, custom_field_mapping)
 
         # Extract task data
         task_dates = task_details.get("dates", {})
@@ -1931,12 +1715,13 @@ def process_subtasks(task_id, task_key, space_name, folder_path, parent_title, a
         task_description_cleaned = clean_html(task_html)
 
         # Fetch responsible emails
+        prefetch_user_details(task_details.get("responsibleIds", []), access_token, user_cache, fetcher)
         task_responsible_emails = []
         for user_id in task_details.get("responsibleIds", []):
             try:
                 task_responsible_emails.append(get_user_details(user_id, access_token, user_cache))
             except Exception as e:
-                print(f"Error fetching user details for {user_id}: {e}")
+                export_log.error("Error fetching user details for %s: %s", user_id, e)
                 task_responsible_emails.append("Unknown")
         task_responsible_emails_str = ", ".join(task_responsible_emails)
 
@@ -1965,13 +1750,18 @@ def process_subtasks(task_id, task_key, space_name, folder_path, parent_title, a
 
         # Append the task data to the worksheet
         ws.append(task_data)
-        print(f"Task Data for ID {task_id}: {task_data}")
+        export_log.debug("Task Data for ID %s: %s", task_id, truncated(task_data))
 
 
         # Process nested subtasks
         if "subTaskIds" in task_details and task_details["subTaskIds"]:
+            # Fetch all not yet processed subtasks of this task in one batch
+            task_cache.update(fetcher.fetch_tasks(
+                subtask_id for subtask_id in task_details["subTaskIds"]
+                if subtask_id not in task_cache and subtask_id not in processed_subtasks
+            ))
             for subtask_id in task_details["subTaskIds"]:
-                print(f"Found nested subtask ID: {subtask_id}")
+                export_log.debug("Found nested subtask ID: %s", subtask_id)
                 process_subtasks(
                     subtask_id,
                     f"{task_key}.{depth}",
@@ -1984,41 +1774,47 @@ def process_subtasks(task_id, task_key, space_name, folder_path, parent_title, a
                     custom_field_names,
                     ws,
                     processed_subtasks,
-                    depth + 1
+                    depth + 1,
+                    task_cache=task_cache,
+                    user_cache=user_cache,
+                    fetcher=fetcher
                 )
         else:
-            print(f"No nested subtasks found")
+            export_log.debug("No nested subtasks found")
 
     except Exception as e:
-        print(f"Error processing task {task_id}: {e}")
+        export_log.error("Error processing task %s: %s", task_id, e)
 
 # Updated function to filter custom fields
 def get_filtered_custom_fields(access_token, space_id=None):
-    url = 'https://www.wrike.com/api/v4/customfields'
-    headers = {'Authorization': f'Bearer {access_token}'}
-    response = retry_request(url, headers=headers)
-    print("Fetching and filtering custom fields...")
-
-    try:
-        custom_fields = response.json()["data"]
-        # Filter custom fields for the specific space or applicable to all spaces
-        filtered_fields = [
-            field for field in custom_fields
-            if field.get('spaceId') == space_id or field.get('spaceId') is None
-        ]
-        return filtered_fields
-    except json.JSONDecodeError as e:
-        print(f"Error parsing JSON response: {e}")
-        print(f"Response content: {response.content}")
-        raise
-
-def process_space_data(space_id, space_name, access_token):
+    export_log.debug("Fetching and filtering custom fields...")
+    custom_fields = get_cached_metadata('customfields', access_token, raise_errors=True)
+    # Filter custom fields for the specific space or applicable to all spaces
+    filtered_fields = [
+        field for field in custom_fields
+        if field.get('spaceId') == space_id or field.get('spaceId') is None
+    ]
+    return filtered_fields
+
+# With incremental=True only tasks updated since the last run are fetched; the rest
+# comes from the sync state file next to the export (see delta.SpaceSync)
+# With clean_processes > 1, each folder's descriptions are cleaned up front in one pool of
+# that many worker processes, shared by all folders of the export
+@phase('process_space_data')
+def process_space_data(space_id, space_name, access_token, incremental=False, state_path=None, clean_processes=None):
     processed_subtasks = set()  # Track processed subtasks globally
-    folders_response = get_all_folders(space_id, access_token)
+    space_sync = None
+    if incremental:
+        space_sync = SpaceSync(space_id, access_token, state_path or default_state_path(space_name))
+        space_sync.sync()
+        folders_response = {"data": space_sync.folders}
+    else:
+        folders_response = get_all_folders(space_id, access_token)
+    folder_tree = FolderTree(folders_response["data"])
     all_paths = []
     for folder in folders_response["data"]:
         if "scope" in folder and folder["scope"] == "WsFolder":
-            paths = get_titles_hierarchy(folder["id"], folders_response["data"])
+            paths = folder_tree.titles_hierarchy(folder["id"])
             for path in paths:
                 path["path"] = path["path"].replace(f"/{space_name}", "", 1) if path["path"].startswith(f"/{space_name}/") else path["path"].replace(f"{space_name}", "")
             all_paths.extend(paths)
@@ -2030,47 +1826,68 @@ def process_space_data(space_id, space_name, access_token):
     custom_field_mapping = create_custom_field_mapping(custom_fields)
 
     # Extract tasks and subtasks
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Tasks and Subtasks"
+    # A write-only workbook streams each appended row to a temporary file, so memory
+    # stays bounded by the current folder instead of growing with the whole space
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Tasks and Subtasks")
 
     headers = ["Key", "Space Name", "Folder", "Parent Task", "Task Title", "Status", "Priority", "Assigned To", "Custom Status", "Start Date", "Duration", "Effort", "Time Spent", "End Date", "Description"]
     headers.extend(unique_field_list)
     ws.append(headers)
 
-    for folder in all_paths:
-        folder_id = folder["id"]
-        folder_path = folder["path"]
-        tasks = get_tasks_for_folder(folder_id, access_token)
-
-        for task in tasks:
-            task_key = f"T{tasks.index(task) + 1}"
-            process_subtasks(
-                task["id"],
-                task_key,
-                space_name,
-                folder_path,
-                "",
-                access_token,
-                custom_status_mapping,
-                custom_field_mapping,
-                unique_field_list,
-                ws,
-                processed_subtasks
-            )
+    fetcher = BatchFetcher(access_token)
+    user_cache = {}
+    synced_tasks = space_sync.task_details() if space_sync is not None else None
+    clean_pool = Pool(clean_processes) if clean_processes and clean_processes > 1 else None
+    try:
+        for folder in all_paths:
+            folder_id = folder["id"]
+            folder_path = folder["path"]
+            if space_sync is not None:
+                # Tasks and their subtasks are already in the synced store
+                tasks = space_sync.folder_tasks(folder_id)
+                task_cache = synced_tasks
+            else:
+                tasks = get_tasks_for_folder(folder_id, access_token)
+                # Fetch the details of all tasks in the folder in batches of 100
+                task_cache = fetcher.fetch_tasks(task["id"] for task in tasks if task["id"] not in processed_subtasks)
+            if clean_pool is not None:
+                # Fill the description memo for the whole folder in parallel
+                clean_descriptions(((task_cache.get(task["id"]) or task).get("description", "") for task in tasks), pool=clean_pool)
+
+            for task_number, task in enumerate(tasks, start=1):
+                task_key = f"T{task_number}"
+                process_subtasks(
+                    task["id"],
+                    task_key,
+                    space_name,
+                    folder_path,
+                    "",
+                    access_token,
+                    custom_status_mapping,
+                    custom_field_mapping,
+                    unique_field_list,
+                    ws,
+                    processed_subtasks,
+                    task_cache=task_cache,
+                    user_cache=user_cache,
+                    fetcher=fetcher
+                )
+    finally:
+        if clean_pool is not None:
+            clean_pool.close()
+            clean_pool.join()
 
     # Save workbook
     output_filename = f"export_{space_name.replace(' ', '_')}.xlsx"
     wb.save(output_filename)
-    print(f"Export completed: {output_filename}")
+    export_log.info("Export completed: %s", output_filename)
 
 # Function to get all custom fields for a specific space
 def get_custom_fields_json(access_token, space_id=None):
-    url = f'https://www.wrike.com/api/v4/customfields'
-    headers = {'Authorization': f'Bearer {access_token}'}
-    response = requests.get(url, headers=headers)
-    if response.status_code == 200:
-        custom_fields = response.json()['data']
+    custom_fields = get_cached_metadata('customfields', access_token)
+    if custom_fields is not None:
         # Filter for space-specific fields or global fields
         if space_id:
             custom_fields = [
@@ -2079,75 +1896,71 @@ def get_custom_fields_json(access_token, space_id=None):
             ]
         return custom_fields
     else:
-        print(f"Failed to get custom fields. Status Code: {response.status_code}")
         return []
 
 # Function to get all workflows
 def get_workflows(access_token):
-    url = f'https://www.wrike.com/api/v4/workflows'
-    headers = {'Authorization': f'Bearer {access_token}'}
-    response = requests.get(url, headers=headers)
-    if response.status_code == 200:
-        return response.json()['data']
-    else:
-        print(f"Failed to get workflows. Status Code: {response.status_code}")
-        return []
-
-def process_space(space, access_token):
+    workflows = get_cached_metadata('workflows', access_token)
+    return workflows if workflows is not None else []
+
+# Function to export a space to export_<title>.json, or to export_<title>.ndjson with output_format='ndjson'.
+# Folders are written as soon as their tasks are fetched, so the export never holds the whole space in memory.
+# With incremental=True only tasks updated since the last run are fetched and merged
+# into the sync state file; the export is then rewritten from that state.
+@phase('process_space')
+def process_space(space, access_token, output_format='json', filename=None, incremental=False, state_path=None):
     space_id = space["id"]
     space_title = space["title"]
-    print(f"Processing space: {space_title}")
+    export_log.info("Processing space: %s", space_title)
 
-    # Fetch all folders, tasks, custom fields, and workflows
-    workspace_data = get_all_folders_json(space_id, access_token)
+    # Custom fields and workflows are small; folders and tasks are streamed
     custom_fields = get_custom_fields_json(access_token, space_id)
     workflows = get_workflows(access_token)
+    if incremental:
+        space_sync = SpaceSync(space_id, access_token, state_path or default_state_path(space_title))
+        space_sync.sync()
+        folders = space_sync.iter_folders_json()
+    else:
+        folders = iter_folders_json(space_id, access_token)
+
+    if output_format == 'ndjson':
+        filename = filename or f"export_{space_title}.ndjson"
+        with open(filename, 'w') as f:
+            dump_ndjson(iter_space_records(space_id, folders, custom_fields, workflows), f)
+    elif output_format == 'json':
+        # Same layout as save_to_json(get_all_folders_json(...) + custom fields + workflows)
+        filename = filename or f"export_{space_title}.json"
+        with open(filename, 'w') as f:
+            dump_json_stream([
+                ("workspace_id", space_id),
+                ("folders", folders),
+                ("custom_fields", custom_fields),
+                ("workflows", workflows),
+            ], f)
+    else:
+        raise ValueError(f"Unsupported output format '{output_format}'")
 
-    # Add custom fields and workflows to workspace data
-    workspace_data["custom_fields"] = custom_fields
-    workspace_data["workflows"] = workflows
-     # Save workspace data to JSON
-    save_to_json(workspace_data, space_title)
-    
-    print(f"Data for space '{space_title}' saved")
+    export_log.info("Data for space '%s' saved", space_title)
 
 # Function to get details of subtasks recursively
 def get_subtask_details_json(subtask_ids, wrike_api_token):
-    headers = {'Authorization': f'Bearer {wrike_api_token}'}
-    subtasks = []
-    
-    for subtask_id in subtask_ids:
-        url = f'https://www.wrike.com/api/v4/tasks/{subtask_id}'
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code == 200:
-            subtask_data = response.json()['data'][0]
-            # Add subtask to the list
-            subtasks.append(subtask_data)
-            
-            # If the subtask has its own subtasks, fetch them recursively
-            if 'subTaskIds' in subtask_data and subtask_data['subTaskIds']:
-                subtask_data['subtasks'] = get_subtask_details_json(subtask_data['subTaskIds'], wrike_api_token)
-        else:
-            print(f"Failed to get subtask details for subtask {subtask_id}. Status Code: {response.status_code}")
-    
-    return subtasks
+    fetcher = BatchFetcher(wrike_api_token)
+    subtasks = fetcher.tasks(subtask_ids)
+    # If the subtasks have their own subtasks, fetch them level by level
+    return attach_subtask_tree(subtasks, fetcher)
 
 def delete_task(task_id, access_token):
     
-    api_url = f"https://www.wrike.com/api/v4/tasks/{task_id}"
-    headers = {
-        "Authorization": f"Bearer {access_token}"
-    }
+    api_url = f"/tasks/{task_id}"
 
     try:
-        response = requests.delete(api_url, headers=headers)
+        response = get_client().delete(api_url, access_token)
         if response.status_code == 200:
-            print(f"Task with ID '{task_id}' deleted successfully.")
+            http_log.info("Task with ID '%s' deleted successfully.", task_id)
             return True
         else:
-            print(f"Failed to delete task with ID '{task_id}'. Status code: {response.status_code}. Response: {response.text}")
+            http_log.error("Failed to delete task with ID '%s'. Status code: %s. Response: %s", task_id, response.status_code, truncated(response))
             return False
     except Exception as e:
-        print(f"An error occurred while trying to delete task '{task_id}': {e}")
+        http_log.error("An error occurred while trying to delete task '%s': %s", task_id, e)
         return False
\ No newline at end of file
@@ -20,6 +20,9 @@ setup(
         'Flask>=2.0'
         #'basegateway>=0,<1'
     ],
+    extras_require={
+        'aio': ['aiohttp>=3.8']
+    },
     #use_2to3=True,
     classifiers=[
         "Development Status :: 4 - Beta",
@@ -0,0 +1,78 @@
+import json
+from PyWrike.gateways.basegateway1 import APIGateway, compile_path
+
+
+class FakeResponse(object):
+    def __init__(self, data, status_code=200):
+        self.content = json.dumps(data).encode() if data is not None else b''
+        self.status_code = status_code
+
+
+class FakeSession(object):
+    def __init__(self):
+        self.requests = []
+
+    def request(self, method, url, headers=None, params=None, json=None):
+        self.requests.append((method, url, dict(params), json))
+        return FakeResponse({'data': [url]})
+
+
+class Gateway(APIGateway):
+    def __init__(self):
+        APIGateway.__init__(self)
+        self._host_url = 'https://www.wrike.com/api/v4'
+        self._common_params = {'fields': 'all'}
+        self._common_headers = {'Authorization': 'bearer token'}
+        self._api = {
+            'folder_tasks': {'method': 'GET', 'path': '/folders/{folderId}/tasks', 'params': {'descendants': 'true'}},
+            'create_task': {'method': 'POST', 'path': '/folders/{folderId}/tasks', 'valid_status': [200]},
+            'token': {'method': 'POST', 'path': '', 'url': 'https://login.example.com/token'},
+        }
+        self._session = FakeSession()
+
+
+def test_compile_path():
+    assert compile_path('/folders/{folderId}/tasks') == [('/folders/', 'folderId'), ('/tasks', None)]
+    assert compile_path('') == []
+
+
+def test_call_fills_the_path_and_merges_params():
+    gateway = Gateway()
+    result, status = gateway.call('folder_tasks', folderId='F1', params={'pageSize': 10})
+    assert status == 200
+    assert result == {'data': ['https://www.wrike.com/api/v4/folders/F1/tasks']}
+    assert gateway._session.requests[-1] == (
+        'GET', 'https://www.wrike.com/api/v4/folders/F1/tasks', {'fields': 'all', 'descendants': 'true', 'pageSize': 10}, None
+    )
+    # Per-call params do not leak into the compiled endpoint
+    gateway.call('folder_tasks', folderId='F2')
+    assert gateway._session.requests[-1][2] == {'fields': 'all', 'descendants': 'true'}
+
+    gateway.call('create_task', folderId='F1', data={'title': 'New'})
+    assert gateway._session.requests[-1][0::3] == ('POST', {'title': 'New'})
+    assert gateway.api_full_path('token') == 'https://login.example.com/token'
+    assert gateway.params('folder_tasks') == ['folderId']
+
+
+def test_endpoints_are_recompiled_when_host_or_common_params_change():
+    gateway = Gateway()
+    gateway.call('folder_tasks', folderId='F1')
+
+    gateway._host_url = 'https://app-eu.wrike.com/api/v4'
+    gateway.call('folder_tasks', folderId='F1')
+    assert gateway._session.requests[-1][1] == 'https://app-eu.wrike.com/api/v4/folders/F1/tasks'
+
+    gateway._common_params['fields'] = 'some'
+    gateway.call('folder_tasks', folderId='F1')
+    assert gateway._session.requests[-1][2] == {'fields': 'some', 'descendants': 'true'}
+
+    gateway._common_params = {'extra': '1'}
+    gateway.call('folder_tasks', folderId='F1')
+    assert gateway._session.requests[-1][2] == {'extra': '1', 'descendants': 'true'}
+
+
+def test_unexpected_status_is_logged(caplog):
+    gateway = Gateway()
+    gateway._session.request = lambda *args, **kwargs: FakeResponse({'error': 'invalid_request'}, status_code=400)
+    assert gateway.call('create_task', folderId='F1', data={}) == ({'error': 'invalid_request'}, 400)
+    assert 'Unexpected status 400 from create_task' in caplog.text
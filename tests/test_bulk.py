@@ -0,0 +1,88 @@
+import pytest
+
+pd = pytest.importorskip('pandas')
+
+from PyWrike import bulk
+from PyWrike.bulk import RESULT_COLUMNS, BulkImporter
+
+
+class FakeDirectory(object):
+    def find_id(self, first_name, last_name, email):
+        return {'ann@example.com': 'U1'}.get(email)
+
+
+# Replaces the Wrike helpers bulk.py calls with an in-memory space
+@pytest.fixture
+def space(monkeypatch):
+    state = {
+        'folders': {'Projects': 'F1', 'Projects\\Done': 'F2'},
+        'tasks': [{'id': 'OLD', 'title': 'Existing', 'parentIds': ['F1']},
+                  {'id': 'ELSEWHERE', 'title': 'Shared', 'parentIds': ['F9']}],
+        'created': [],
+        'tagged': [],
+    }
+
+    def create_task(folder_id, space_id, task_data, responsible_ids, access_token):
+        if task_data['title'] == 'Broken':
+            raise ValueError("bad date")
+        task = {'id': 'NEW%s' % (len(state['created']) + 1), 'title': task_data['title'], 'parentIds': [folder_id]}
+        state['created'].append((task_data['title'], folder_id, None, responsible_ids))
+        return task
+
+    def create_subtask(parent_task_id, space_id, task_data, responsible_ids, access_token):
+        task = {'id': 'NEW%s' % (len(state['created']) + 1), 'title': task_data['title'], 'superTaskIds': [parent_task_id]}
+        state['created'].append((task_data['title'], None, parent_task_id, responsible_ids))
+        return task
+
+    monkeypatch.setattr(bulk, 'create_folders_by_paths', lambda paths, *args, **kwargs: {path: state['folders'].get(path) for path in paths})
+    monkeypatch.setattr(bulk, 'get_custom_fields_by_space', lambda access_token, space_id: {})
+    monkeypatch.setattr(bulk, 'get_contact_directory', lambda access_token: FakeDirectory())
+    monkeypatch.setattr(bulk, 'iter_tasks_in_space', lambda space_id, access_token: list(state['tasks']))
+    monkeypatch.setattr(bulk, 'iter_tasks_by_folder_id', lambda folder_id, access_token: [task for task in state['tasks'] if folder_id in task.get('parentIds', [])])
+    monkeypatch.setattr(bulk, 'get_subtasks_by_task_id', lambda task_id, access_token: [])
+    monkeypatch.setattr(bulk, 'update_task_with_tags', lambda task_id, folder_id, access_token: state['tagged'].append((task_id, folder_id)))
+    monkeypatch.setattr(bulk, 'create_task', create_task)
+    monkeypatch.setattr(bulk, 'create_subtask', create_subtask)
+    return state
+
+
+def test_result_rows(space):
+    dataframe = pd.DataFrame([
+        {'Folder Path': 'Projects', 'Title': 'Launch', 'First Name': 'Ann', 'Last Name': 'Lee', 'Email': 'ann@example.com'},
+        {'Folder Path': 'Projects', 'Title': 'Kickoff', 'Parent Task': 'Launch'},
+        {'Folder Path': 'Projects', 'Title': 'existing '},
+        {'Folder Path': 'Projects\\Done', 'Title': 'Shared'},
+        {'Folder Path': 'Projects', 'Title': 'Orphan', 'Parent Task': 'Nowhere'},
+        {'Folder Path': 'Missing', 'Title': 'Lost'},
+        {'Folder Path': 'Projects', 'Title': 'Unknown', 'First Name': 'Bob', 'Last Name': 'Roe', 'Email': 'bob@example.com'},
+    ])
+    result = BulkImporter('SPACE', 'token', max_workers=2).run(dataframe)
+
+    assert list(result.columns) == RESULT_COLUMNS
+    assert list(result.index) == list(dataframe.index)
+    assert list(result['status']) == ['created', 'created', 'exists', 'linked', 'failed', 'failed', 'created']
+    assert list(result['folder_id'][result['folder_id'].notna()]) == ['F1', 'F1', 'F1', 'F2', 'F1', 'F1']
+    assert pd.isna(result.loc[5, 'folder_id'])
+
+    launch_id = result.loc[0, 'task_id']
+    assert result.loc[1, 'parent_task_id'] == launch_id
+    assert result.loc[2, 'task_id'] == 'OLD'
+    assert result.loc[3, 'task_id'] == 'ELSEWHERE'
+    assert space['tagged'] == [('ELSEWHERE', 'F2')]
+    assert result.loc[4, 'message'] == "Parent task 'Nowhere' not found"
+    assert result.loc[5, 'message'] == "Folder path 'Missing' could not be resolved"
+    assert result.loc[6, 'message'] == "Responsible users not found: bob@example.com"
+    assert ('Launch', 'F1', None, ['U1']) in space['created']
+    assert ('Kickoff', None, launch_id, []) in space['created']
+
+
+def test_failing_row_does_not_abort_the_import(space):
+    dataframe = pd.DataFrame([
+        {'Folder Path': 'Projects', 'Title': 'Broken'},
+        {'Folder Path': 'Projects', 'Title': 'Fine'},
+    ])
+    result = BulkImporter('SPACE', 'token').run(dataframe)
+
+    assert list(result['status']) == ['failed', 'created']
+    assert result.loc[0, 'message'] == 'bad date'
+    assert pd.isna(result.loc[0, 'task_id'])
@@ -0,0 +1,107 @@
+import threading
+from PyWrike import wrike
+from PyWrike.cache import MetadataCache
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_their_entity_ttl():
+    clock = FakeClock()
+    cache = MetadataCache(ttls={'spaces': 10}, default_ttl=5, clock=clock)
+    cache.set('spaces', 'token', ['space'])
+    cache.set('other', 'token', ['other'])
+    clock.now = 6
+    assert cache.get('spaces', 'token') == ['space']
+    assert cache.get('other', 'token') is None
+    clock.now = 10
+    assert cache.get('spaces', 'token') is None
+    assert cache.stats()['entities']['spaces'] == {'hits': 1, 'misses': 1}
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = MetadataCache(max_entries=2, clock=FakeClock())
+    cache.set('spaces', 'a', 1)
+    cache.set('spaces', 'b', 2)
+    cache.get('spaces', 'a')
+    cache.set('spaces', 'c', 3)
+    assert cache.get('spaces', 'a') == 1
+    assert cache.get('spaces', 'b') is None
+    assert cache.get('spaces', 'c') == 3
+
+
+def test_get_or_load_loads_once_and_does_not_cache_failures():
+    cache = MetadataCache(clock=FakeClock())
+    calls = []
+    assert cache.get_or_load('spaces', 'token', lambda: calls.append(1)) is None
+    assert cache.get_or_load('spaces', 'token', lambda: calls.append(2) or 'loaded') == 'loaded'
+    assert cache.get_or_load('spaces', 'token', lambda: calls.append(3) or 'again') == 'loaded'
+    assert calls == [1, 2]
+
+    cache.invalidate('spaces')
+    assert cache.get_or_load('spaces', 'token', lambda: 'reloaded') == 'reloaded'
+
+
+def test_concurrent_misses_share_one_load():
+    cache = MetadataCache(clock=FakeClock())
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'value'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load('spaces', 'token', loader))) for _ in range(4)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == ['value'] * 4
+    assert calls == [1]
+
+
+class FakeResponse(object):
+    status_code = 200
+
+    def __init__(self, data):
+        self._data = data
+
+    def json(self):
+        return {'data': self._data}
+
+
+class FakeClient(object):
+    def __init__(self):
+        self.requests = []
+
+    def get(self, path, access_token, params=None):
+        self.requests.append(path)
+        return FakeResponse([{'id': 'CF1', 'title': 'Budget', 'spaceId': ['S1']}])
+
+
+def test_cached_metadata_is_fetched_once_and_copied_on_read(monkeypatch):
+    client = FakeClient()
+    monkeypatch.setattr(wrike, 'metadata_cache', MetadataCache())
+    monkeypatch.setattr(wrike, 'get_client', lambda: client)
+
+    first = wrike.get_cached_metadata('customfields', 'token')
+    first[0]['title'] = 'Changed'
+    first[0]['spaceId'].append('S2')
+    assert wrike.get_cached_metadata('customfields', 'token') == [{'id': 'CF1', 'title': 'Budget', 'spaceId': ['S1']}]
+
+    fields = wrike.get_custom_fields_by_space('token', 'S1')
+    fields['Budget']['spaces'].append('S3')
+    assert wrike.get_custom_fields_by_space('token', 'S1') == {'Budget': {'id': 'CF1', 'spaces': ['S1']}}
+    assert client.requests == ['/customfields']
@@ -0,0 +1,147 @@
+import pytest
+from PyWrike import clone
+from PyWrike.clone import CloneEngine, FolderStep, SpaceSnapshot, TagStep, TaskStep, plan_clone
+
+FOLDERS = [
+    {'id': 'ROOT', 'title': 'Src', 'childIds': ['F1', 'F3']},
+    {'id': 'F1', 'title': 'A', 'childIds': ['F2']},
+    {'id': 'F2', 'title': 'B', 'childIds': []},
+    {'id': 'F3', 'title': 'C', 'childIds': [], 'project': {'status': 'Green'}},
+]
+
+PATHS = [
+    {'id': 'ROOT', 'path': 'Src', 'title': 'Src'},
+    {'id': 'F1', 'path': 'Src/A', 'title': 'A'},
+    {'id': 'F2', 'path': 'Src/A/B', 'title': 'B'},
+    {'id': 'F3', 'path': 'Src/C', 'title': 'C'},
+]
+
+
+def task(task_id, title, sub=(), parents=()):
+    return {'id': task_id, 'title': title, 'subTaskIds': list(sub), 'superTaskIds': list(parents)}
+
+
+def snapshot():
+    tasks = {
+        'T0': task('T0', 'Top'),
+        'T1': task('T1', 'Parent', sub=['T2', 'T6']),
+        'T2': task('T2', 'Child', parents=['T1']),
+        'T3': task('T3', 'Deep'),
+        'T4': task('T4', 'Sub of deep', parents=['T3']),
+        'T5': task('T5', 'Listed subtask', parents=['T4']),
+        'T6': task('T6', 'Moved', parents=['GONE']),
+    }
+    tasks['T3']['subTaskIds'] = ['T4']
+    folder_tasks = {'ROOT': ['T0'], 'F1': ['T1'], 'F2': ['T3'], 'F3': ['T1', 'T5']}
+    return SpaceSnapshot(PATHS, FOLDERS, folder_tasks, tasks)
+
+
+def test_plan_orders_folders_and_tasks():
+    plan = plan_clone(snapshot(), 'Src', 'Dst')
+
+    assert [step.path for step in plan.folders] == ['A', 'A/B', 'C']
+    assert plan.folders[2] == FolderStep('F3', 'C', 'Src/C', 'C', 'C', '', {'status': 'Green'})
+    assert plan.new_paths == {'A': 'Dst/A', 'A/B': 'Dst/A/B', 'C': 'Dst/C'}
+    assert plan.tasks == [
+        TaskStep('T0', 'Top|', '', None),
+        TaskStep('T1', 'Parent|', 'A', None),
+        TaskStep('T2', 'Child|', None, 'Parent|'),
+        # The first parent of T6 is not in the snapshot: it stays under the task it was reached from
+        TaskStep('T6', 'Moved|', None, 'Parent|'),
+        TaskStep('T3', 'Deep|', 'A/B', None),
+        TaskStep('T4', 'Sub of deep|', None, 'Deep|'),
+        TagStep('Parent|', 'C'),
+        # T5 is listed in C but is a subtask: it is created under its parent instead
+        TaskStep('T5', 'Listed subtask|', 'C', 'Sub of deep|'),
+    ]
+
+
+def test_plan_skips_subtasks_without_a_parent():
+    tasks = {'T1': task('T1', 'Orphan', parents=['GONE'])}
+    snap = SpaceSnapshot(PATHS[:2], FOLDERS, {'F1': []}, tasks)
+    plan = plan_clone(snap, 'Src', 'Dst')
+    assert plan.tasks == []
+
+
+class FakeResponse(object):
+    status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeClient(object):
+    def __init__(self):
+        self.puts = []
+
+    def put(self, path, access_token, json=None):
+        self.puts.append((path, json))
+        return FakeResponse()
+
+
+# Replaces the Wrike calls of the clone engine; folders and tasks whose title is in `failing` raise
+@pytest.fixture
+def wrike(monkeypatch):
+    state = {'failing': set(), 'folders': [], 'tasks': [], 'client': FakeClient()}
+
+    def create_folder_or_project(title, parent_id, access_token, project_details=None):
+        if title in state['failing']:
+            raise RuntimeError("403 Client Error")
+        state['folders'].append((parent_id, title, project_details))
+        return 'NEW_' + title
+
+    def create_tasks(new_folder_id=None, task_data=None, super_task_id=None, access_token=None, mapped_custom_fields=None):
+        if task_data['title'] in state['failing']:
+            raise RuntimeError("400 Client Error")
+        state['tasks'].append((task_data['title'], new_folder_id, super_task_id))
+        return [{'id': 'NEW_' + task_data['id'], 'title': task_data['title'], 'parentIds': [new_folder_id] if new_folder_id else []}]
+
+    monkeypatch.setattr(clone, 'create_folder_or_project', create_folder_or_project)
+    monkeypatch.setattr(clone, 'create_tasks', create_tasks)
+    monkeypatch.setattr(clone, 'get_client', lambda: state['client'])
+    return state
+
+
+def test_engine_runs_the_plan(wrike):
+    snap = snapshot()
+    engine = CloneEngine(snap, 'token', max_workers=2)
+    new_paths_info = engine.run(plan_clone(snap, 'Src', 'Dst'), 'DST_ROOT')
+
+    assert engine.folder_mapping == {'F1': 'NEW_A', 'F2': 'NEW_B', 'F3': 'NEW_C'}
+    assert [info['new_folder_path'] for info in new_paths_info] == ['Dst/A', 'Dst/A/B', 'Dst/C']
+    assert ('DST_ROOT', 'C', {'status': 'Green'}) in wrike['folders']
+    assert wrike['tasks'] == [
+        ('Top', 'DST_ROOT', None),
+        ('Parent', 'NEW_A', None),
+        ('Child', None, 'NEW_T1'),
+        ('Moved', None, 'NEW_T1'),
+        ('Deep', 'NEW_B', None),
+        ('Sub of deep', None, 'NEW_T3'),
+        ('Listed subtask', 'NEW_C', 'NEW_T4'),
+    ]
+    assert wrike['client'].puts == [('/tasks/NEW_T1', {'addParents': ['NEW_C']})]
+
+
+def test_failed_folder_skips_its_subtree_and_tasks(wrike):
+    wrike['failing'].add('A')
+    snap = snapshot()
+    engine = CloneEngine(snap, 'token')
+    new_paths_info = engine.run(plan_clone(snap, 'Src', 'Dst'), 'DST_ROOT')
+
+    assert engine.folder_mapping == {'F3': 'NEW_C'}
+    assert [info['original_folder_id'] for info in new_paths_info] == ['F3']
+    assert engine.folder_ids['A'] is None and engine.folder_ids['A/B'] is None
+    # Tasks in A and A/B and their subtasks are skipped; the rest of the plan still runs
+    assert wrike['tasks'] == [('Top', 'DST_ROOT', None)]
+    assert wrike['client'].puts == []
+
+
+def test_failed_task_skips_only_its_subtasks(wrike):
+    wrike['failing'].add('Parent')
+    snap = snapshot()
+    engine = CloneEngine(snap, 'token')
+    engine.run(plan_clone(snap, 'Src', 'Dst'), 'DST_ROOT')
+
+    assert 'Parent|' not in engine.task_map
+    assert [title for title, _, _ in wrike['tasks']] == ['Top', 'Deep', 'Sub of deep', 'Listed subtask']
+    assert wrike['client'].puts == []
@@ -0,0 +1,115 @@
+import json
+from PyWrike.client import WrikeClient
+from PyWrike.delta import SpaceSync
+from PyWrike.wrike import map_task_details
+
+FOLDERS = [
+    {'id': 'F1', 'title': 'Root', 'childIds': ['F2']},
+    {'id': 'F2', 'title': 'Child', 'childIds': []},
+]
+
+
+class FakeResponse(object):
+    def __init__(self, data):
+        self.status_code = 200
+        self._data = data
+        self.content = json.dumps({'data': data}).encode()
+
+    def json(self):
+        return {'data': self._data}
+
+    def raise_for_status(self):
+        pass
+
+
+# WrikeClient answering from an in-memory space instead of the API
+class FakeClient(WrikeClient):
+    def __init__(self):
+        WrikeClient.__init__(self)
+        self.tasks = {}
+        self.queries = []
+
+    def put(self, task_id, updated, parent_ids=('F1',), **fields):
+        self.tasks[task_id] = dict(fields, id=task_id, updatedDate=updated, parentIds=list(parent_ids))
+
+    def get(self, path, access_token=None, params=None):
+        if path == '/spaces/SPACE/folders':
+            return FakeResponse(FOLDERS)
+        if path == '/spaces/SPACE/tasks':
+            since = json.loads(params['updatedDate'])['start'] if 'updatedDate' in params else None
+            self.queries.append(since)
+            return FakeResponse([
+                {'id': task['id'], 'updatedDate': task['updatedDate']}
+                for task in self.tasks.values() if since is None or task['updatedDate'] >= since
+            ])
+        ids = path[len('/tasks/'):].split(',')
+        return FakeResponse([self.tasks[task_id] for task_id in ids if task_id in self.tasks])
+
+
+def test_incremental_sync_merges_updated_tasks(tmp_path):
+    client = FakeClient()
+    client.put('T1', '2024-01-01T00:00:00Z', title='One')
+    client.put('T2', '2024-01-02T00:00:00Z', parent_ids=['F2'], title='Two')
+    state_path = str(tmp_path / 'space.sync.json')
+
+    sync = SpaceSync('SPACE', 'token', state_path, client=client)
+    assert sync.sync() == {'updated': 2, 'deleted': 0, 'reconciled': True}
+    assert sync.cursor == '2024-01-02T00:00:00Z'
+
+    client.put('T2', '2024-01-03T00:00:00Z', parent_ids=['F2'], title='Two edited')
+    client.put('T3', '2024-01-04T00:00:00Z', title='Three')
+    assert sync.sync() == {'updated': 2, 'deleted': 0, 'reconciled': False}
+    assert client.queries == [None, '2024-01-02T00:00:00Z']
+    assert list(sync.tasks) == ['T1', 'T2', 'T3']
+    assert sync.tasks['T2']['title'] == 'Two edited'
+    assert sync.cursor == '2024-01-04T00:00:00Z'
+
+    reloaded = SpaceSync('SPACE', 'token', state_path, client=client)
+    assert reloaded.cursor == sync.cursor
+    assert reloaded.tasks == sync.tasks
+
+
+def test_reconcile_drops_deleted_tasks(tmp_path):
+    client = FakeClient()
+    client.put('T1', '2024-01-01T00:00:00Z', title='One')
+    client.put('T2', '2024-01-02T00:00:00Z', title='Two')
+    sync = SpaceSync('SPACE', 'token', str(tmp_path / 'space.sync.json'), client=client)
+    sync.sync()
+
+    del client.tasks['T1']
+    assert sync.sync()['deleted'] == 0
+    assert 'T1' in sync.tasks
+
+    assert sync.sync(full=True) == {'updated': 0, 'deleted': 1, 'reconciled': True}
+    assert list(sync.tasks) == ['T2']
+
+
+def test_folder_tasks_leave_out_subtasks(tmp_path):
+    client = FakeClient()
+    client.put('T1', '2024-01-01T00:00:00Z', title='Parent', subTaskIds=['T2'])
+    client.put('T2', '2024-01-01T00:00:00Z', title='Sub', superTaskIds=['T1'])
+    client.put('T3', '2024-01-01T00:00:00Z', parent_ids=['F2'], title='Nested')
+    sync = SpaceSync('SPACE', 'token', str(tmp_path / 'space.sync.json'), client=client)
+    sync.sync()
+
+    assert [task['id'] for task in sync.folder_tasks('F1')] == ['T1', 'T3']
+    assert [task['id'] for task in sync.folder_tasks('F1', descendants=False)] == ['T1']
+    folders = list(sync.iter_folders_json())
+    assert [task['id'] for task in folders[0]['tasks'][0]['subtasks']] == ['T2']
+
+
+def test_exporting_from_the_store_leaves_it_unchanged(tmp_path):
+    client = FakeClient()
+    client.put('T1', '2024-01-01T00:00:00Z', title='One', customStatusId='S1',
+               customFields=[{'id': 'CF1', 'value': '5'}])
+    sync = SpaceSync('SPACE', 'token', str(tmp_path / 'space.sync.json'), client=client)
+    sync.sync()
+
+    mapped = map_task_details(sync.task_details()['T1'], {'S1': 'Open'}, {'CF1': 'Budget'})
+    assert mapped['customStatus'] == 'Open'
+    assert mapped['customFields'] == {'Budget': '5'}
+    assert sync.tasks['T1']['customFields'] == [{'id': 'CF1', 'value': '5'}]
+    assert 'customStatus' not in sync.tasks['T1']
+
+    # The store can be mapped again, e.g. by the next export
+    assert map_task_details(sync.task_details()['T1'], {'S1': 'Open'}, {'CF1': 'Budget'}) == mapped
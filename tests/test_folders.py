@@ -0,0 +1,73 @@
+import threading
+from PyWrike.folders import FolderTree, create_folder_levels
+from PyWrike.wrike import get_folder_tree, get_titles_hierarchy
+
+FOLDERS = [
+    {'id': 'F1', 'title': 'Root', 'childIds': ['F2', 'F3']},
+    {'id': 'F2', 'title': 'A', 'childIds': ['F4']},
+    {'id': 'F3', 'title': 'B', 'childIds': []},
+    {'id': 'F4', 'title': 'Deep', 'childIds': []},
+]
+
+
+def test_paths_and_hierarchy():
+    tree = FolderTree(FOLDERS)
+    assert [entry['path'] for entry in tree.titles_hierarchy('F1')] == ['Root', 'Root/A', 'Root/A/Deep', 'Root/B']
+    assert [folder['id'] for folder in tree.iter_subtree('F2')] == ['F2', 'F4']
+    assert tree.titles_hierarchy('missing') == []
+
+
+# Folder creator recording its calls; creating a title in `failing` raises
+class Creator(object):
+    def __init__(self, failing=(), missing=()):
+        self.failing = failing
+        self.missing = missing
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, parent_id, title, path):
+        with self._lock:
+            self.calls.append((parent_id, title, path))
+        if title in self.failing:
+            raise RuntimeError("500 Server Error")
+        if title in self.missing:
+            return None
+        return 'id:' + path
+
+
+def test_creates_each_level_below_its_parent():
+    creator = Creator()
+    folder_ids = create_folder_levels(['a/b/c', 'a/d', 'e'], {'': 'ROOT', 'a': 'A'}, creator, max_workers=2)
+    assert folder_ids == {'': 'ROOT', 'a': 'A', 'e': 'id:e', 'a/b': 'id:a/b', 'a/d': 'id:a/d', 'a/b/c': 'id:a/b/c'}
+    assert ('id:a/b', 'c', 'a/b/c') in creator.calls
+    assert len(creator.calls) == 4
+
+
+def test_failed_sibling_does_not_stop_the_others():
+    creator = Creator(failing=('bad',), missing=('none',))
+    paths = ['bad/child', 'good/child/leaf', 'none/child', 'other']
+    folder_ids = create_folder_levels(paths, {'': 'ROOT'}, creator, max_workers=4)
+
+    assert folder_ids['bad'] is None
+    assert folder_ids['bad/child'] is None
+    assert folder_ids['none'] is None
+    assert folder_ids['none/child'] is None
+    assert folder_ids['good'] == 'id:good'
+    assert folder_ids['good/child'] == 'id:good/child'
+    assert folder_ids['good/child/leaf'] == 'id:good/child/leaf'
+    assert folder_ids['other'] == 'id:other'
+    assert not [call for call in creator.calls if call[2] in ('bad/child', 'none/child')]
+
+
+def test_titles_hierarchy_from_a_list_or_a_prebuilt_tree():
+    tree = get_folder_tree(FOLDERS)
+    assert get_folder_tree(tree) is tree
+    assert get_titles_hierarchy('F2', tree, 'Space') == [
+        {'id': 'F2', 'path': 'Space/A', 'title': 'A'},
+        {'id': 'F4', 'path': 'Space/A/Deep', 'title': 'Deep'},
+    ]
+
+    folders = [dict(folder) for folder in FOLDERS]
+    assert [entry['title'] for entry in get_titles_hierarchy('F2', folders)] == ['A', 'Deep']
+    folders[3]['title'] = 'Renamed'
+    assert [entry['title'] for entry in get_titles_hierarchy('F2', folders)] == ['A', 'Renamed']
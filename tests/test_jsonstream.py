@@ -0,0 +1,30 @@
+import io
+import json
+from collections import OrderedDict
+from PyWrike.jsonstream import dump_json_stream
+
+FOLDERS = [
+    {'id': 'F1', 'title': 'Folder', 'tasks': [{'id': 'T1', 'subtasks': [{'id': 'T2', 'tags': []}]}]},
+    {'id': 'F2', 'title': 'Empty', 'tasks': [], 'childIds': ['F3']},
+]
+
+
+def dumped(items, indent=4):
+    out = io.StringIO()
+    dump_json_stream(items, out, indent=indent)
+    return out.getvalue()
+
+
+def test_matches_json_dumps_with_indent():
+    expected = OrderedDict([('workspace_id', 'SPACE'), ('folders', FOLDERS), ('custom_fields', []), ('meta', {})])
+    items = [('workspace_id', 'SPACE'), ('folders', iter(FOLDERS)), ('custom_fields', iter([])), ('meta', {})]
+    assert dumped(items) == json.dumps(expected, indent=4)
+
+
+def test_matches_json_dumps_without_indent():
+    items = [('folders', iter(FOLDERS)), ('empty', iter([]))]
+    assert dumped(items, indent=None) == json.dumps({'folders': FOLDERS, 'empty': []})
+
+
+def test_empty_object():
+    assert dumped([]) == json.dumps({}, indent=4)
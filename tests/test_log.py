@@ -0,0 +1,33 @@
+import logging
+from PyWrike.log import MAX_PAYLOAD_CHARS, http_log, truncated
+
+
+class FakeResponse(object):
+    status_code = 200
+
+    def __init__(self, content):
+        self._content = content
+        self.reads = 0
+
+    @property
+    def content(self):
+        self.reads += 1
+        return self._content
+
+
+def test_values_are_rendered_and_cut():
+    assert str(truncated('short')) == 'short'
+    assert str(truncated('café'.encode('utf-8'))) == 'café'
+    assert str(truncated({'title': 'Task', 'ids': [1, 2]})) == '{"title": "Task", "ids": [1, 2]}'
+    assert str(truncated('x' * 15, limit=10)) == 'xxxxxxxxxx... (5 more characters)'
+    assert len(str(truncated('y' * (MAX_PAYLOAD_CHARS + 1)))) < MAX_PAYLOAD_CHARS + 30
+
+
+def test_response_body_is_read_only_when_the_record_is_emitted(caplog):
+    response = FakeResponse(b'{"error": "not_found"}')
+    with caplog.at_level(logging.ERROR, logger='pywrike'):
+        http_log.debug("Response: %s", truncated(response))
+        assert response.reads == 0
+        http_log.error("Response: %s", truncated(response))
+    assert response.reads > 0
+    assert 'Response: {"error": "not_found"}' in caplog.text
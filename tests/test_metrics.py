@@ -0,0 +1,103 @@
+from concurrent.futures import ThreadPoolExecutor
+from PyWrike.client import WrikeClient
+from PyWrike.metrics import RequestMetrics, bind_phase, current_phase, endpoint_template, metrics, phase
+from PyWrike.ratelimit import TokenBucket
+
+
+def test_endpoint_template_collapses_ids():
+    assert endpoint_template('/folders/IEAAAAAQI4AAAAAB/tasks') == '/folders/{id}/tasks'
+    assert endpoint_template('https://www.wrike.com/api/v4/tasks/IEAAAAA1,IEAAAAA2?fields=x') == '/tasks/{ids}'
+    assert endpoint_template('/spaces') == '/spaces'
+
+
+def test_phases_nest_and_follow_worker_threads():
+    assert current_phase() == 'none'
+    with phase('export'):
+        with phase('inner'):
+            assert current_phase() == 'inner'
+        assert current_phase() == 'export'
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            assert executor.submit(bind_phase(current_phase)).result() == 'export'
+            assert executor.submit(current_phase).result() == 'none'
+    assert current_phase() == 'none'
+
+
+def test_requests_are_aggregated_per_phase_and_endpoint():
+    stats = RequestMetrics()
+    with phase('import'):
+        stats.record_request('GET', '/folders/IEAAAAAQI4AAAAAB/tasks', 200, 0.07, 0, 300)
+        stats.record_request('GET', '/folders/IEAAAAAQI4AAAAAC/tasks', 429, 120.0, 0, 20)
+        stats.record_retry('GET', '/folders/IEAAAAAQI4AAAAAC/tasks')
+        stats.record_wait('GET', '/folders/IEAAAAAQI4AAAAAC/tasks', 1.5)
+        stats.record_error('POST', '/tasks')
+    stats.record_request('POST', '/tasks', 200, 0.2, 50, 10)
+
+    endpoint = stats.as_dict()['import']['GET /folders/{id}/tasks']
+    assert endpoint['requests'] == 2 and endpoint['statuses'] == {200: 1, 429: 1}
+    assert (endpoint['retries'], endpoint['rate_limited'], endpoint['wait_seconds']) == (1, 1, 1.5)
+    assert endpoint['latency_buckets'][0.05] == 0
+    assert endpoint['latency_buckets'][0.1] == 1
+    assert endpoint['latency_buckets'][60.0] == 1
+    assert endpoint['latency_buckets']['+Inf'] == 2
+    assert stats.as_dict()['import']['POST /tasks']['errors'] == 1
+    assert stats.totals()['none']['bytes_sent'] == 50
+    assert stats.totals()['import']['bytes_received'] == 320
+
+    stats.enabled = False
+    stats.record_request('GET', '/spaces', 200, 0.1)
+    assert 'GET /spaces' not in stats.as_dict().get('none', {})
+    stats.reset()
+    assert stats.as_dict() == {}
+
+
+def test_prometheus_output():
+    stats = RequestMetrics()
+    with phase('sync "x"'):
+        stats.record_request('GET', '/spaces', 200, 0.3, 0, 10)
+    text = stats.to_prometheus(prefix='wrike')
+    labels = 'phase="sync \\"x\\"",method="GET",endpoint="/spaces"'
+    assert '# TYPE wrike_requests_total counter' in text
+    assert 'wrike_requests_total{%s,status="200"} 1' % labels in text
+    assert 'wrike_response_bytes_total{%s} 10' % labels in text
+    assert '# TYPE wrike_request_duration_seconds histogram' in text
+    assert 'wrike_request_duration_seconds_bucket{%s,le="0.25"} 0' % labels in text
+    assert 'wrike_request_duration_seconds_bucket{%s,le="0.5"} 1' % labels in text
+    assert 'wrike_request_duration_seconds_bucket{%s,le="+Inf"} 1' % labels in text
+    assert 'wrike_request_duration_seconds_sum{%s} 0.3' % labels in text
+    assert 'wrike_request_duration_seconds_count{%s} 1' % labels in text
+    assert text.endswith('\n')
+
+
+class FakeResponse(object):
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = b'{"data": []}'
+        self.request = None
+
+    def close(self):
+        pass
+
+
+class FakeSession(object):
+    def __init__(self, responses):
+        self.responses = list(responses)
+
+    def request(self, method, url, **kwargs):
+        return self.responses.pop(0)
+
+
+def test_client_records_requests_and_retries():
+    client = WrikeClient(rate_limiter=TokenBucket(requests_per_minute=6000, burst=10))
+    client._session = FakeSession([FakeResponse(429, {'Retry-After': '0'}), FakeResponse(200)])
+    metrics.reset()
+    try:
+        with phase('client_test'):
+            assert client.get('/folders/IEAAAAAQI4AAAAAB/tasks', 'token').status_code == 200
+        stats = metrics.as_dict()['client_test']['GET /folders/{id}/tasks']
+        assert stats['requests'] == 2
+        assert stats['statuses'] == {429: 1, 200: 1}
+        assert stats['retries'] == 1 and stats['rate_limited'] == 1
+        assert stats['bytes_received'] == 2 * len(b'{"data": []}')
+    finally:
+        metrics.reset()
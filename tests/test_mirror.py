@@ -0,0 +1,122 @@
+import json
+import pytest
+from PyWrike import mirror
+from PyWrike.client import WrikeClient
+from PyWrike.mirror import WrikeMirror, sync_space
+
+FOLDERS = [
+    {'id': 'SPACE', 'title': 'Space', 'childIds': ['F1', 'F3']},
+    {'id': 'F1', 'title': 'Projects', 'childIds': ['F2']},
+    {'id': 'F2', 'title': '2024', 'childIds': [], 'project': {'status': 'Green'}},
+    {'id': 'F3', 'title': 'Archive', 'childIds': []},
+]
+CUSTOM_FIELDS = [{'id': 'CF1', 'title': 'Budget', 'type': 'Numeric', 'spaceId': 'SPACE'}]
+
+
+class FakeResponse(object):
+    status_code = 200
+
+    def __init__(self, data):
+        self._data = data
+
+    def json(self):
+        return {'data': self._data}
+
+    def raise_for_status(self):
+        pass
+
+
+# WrikeClient answering from an in-memory space instead of the API
+class FakeClient(WrikeClient):
+    def __init__(self):
+        WrikeClient.__init__(self)
+        self.tasks = {}
+        self.users = {'U1': {'id': 'U1', 'firstName': 'Ann', 'lastName': 'Lee', 'profiles': [{'email': 'ann@example.com'}]}}
+        self.requests = []
+
+    def put(self, task_id, updated, **fields):
+        self.tasks[task_id] = dict({'parentIds': ['F1']}, id=task_id, updatedDate=updated, **fields)
+
+    def get(self, path, access_token=None, params=None):
+        self.requests.append(path)
+        if path == '/spaces/SPACE':
+            return FakeResponse([{'id': 'SPACE', 'title': 'Space'}])
+        if path == '/spaces/SPACE/folders':
+            return FakeResponse(FOLDERS)
+        if path == '/spaces/SPACE/tasks':
+            since = json.loads(params['updatedDate'])['start'] if 'updatedDate' in params else None
+            return FakeResponse([
+                {'id': task['id'], 'updatedDate': task['updatedDate']}
+                for task in self.tasks.values() if since is None or task['updatedDate'] >= since
+            ])
+        resource, ids = path.strip('/').split('/')
+        items = self.tasks if resource == 'tasks' else self.users
+        return FakeResponse([items[item_id] for item_id in ids.split(',') if item_id in items])
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(mirror, 'get_cached_metadata', lambda entity, access_token: list(CUSTOM_FIELDS))
+    client = FakeClient()
+    client.put('T1', '2024-01-01T00:00:00Z', title='Launch', responsibleIds=['U1'], subTaskIds=['T2'],
+               customFields=[{'id': 'CF1', 'value': '100'}], dates={'due': '2024-02-01'})
+    client.put('T2', '2024-01-02T00:00:00Z', title='Kickoff', parentIds=[], superTaskIds=['T1'])
+    client.put('T3', '2024-01-03T00:00:00Z', title='Old report', parentIds=['F2'])
+    return client
+
+
+def test_schema_is_created_once(tmp_path):
+    path = str(tmp_path / 'mirror.sqlite3')
+    WrikeMirror(path).close()
+    with WrikeMirror(path) as reopened:
+        tables = set(row['name'] for row in reopened.query("SELECT name FROM sqlite_master WHERE type = 'table'"))
+    assert tables == {'spaces', 'folders', 'tasks', 'task_folders', 'subtasks', 'task_responsibles',
+                      'users', 'custom_fields', 'custom_field_values'}
+
+
+def test_sync_space_fills_the_read_helpers(tmp_path, client):
+    with WrikeMirror(str(tmp_path / 'mirror.sqlite3'), 'token', client=client) as db:
+        assert db.sync_space('SPACE') == {'updated': 3, 'deleted': 0, 'reconciled': True}
+
+        assert db.get_space_id_by_name('Space') == 'SPACE'
+        assert [folder['id'] for folder in db.get_folders_in_space('SPACE')] == ['SPACE', 'F1', 'F2', 'F3']
+        assert db.query("SELECT path, is_project FROM folders WHERE id = 'F2'") == [{'path': 'Space/Projects/2024', 'is_project': 1}]
+        assert db.get_folder_id_by_path(' Projects \\ 2024 ', 'SPACE') == 'F2'
+        assert db.get_folder_id_by_path('Projects\\Missing', 'SPACE') is None
+
+        assert [task['id'] for task in db.get_tasks_in_folder('F1')] == ['T1', 'T3']
+        assert [task['id'] for task in db.get_tasks_in_folder('F1', descendants=False)] == ['T1']
+        assert [task['id'] for task in db.get_subtasks('T1')] == ['T2']
+        assert [task['id'] for task in db.find_tasks_by_title(' launch ', 'SPACE')] == ['T1']
+        assert db.get_task('T1')['dates'] == {'due': '2024-02-01'}
+        assert db.get_user_email('U1') == 'ann@example.com'
+        assert db.get_custom_field_values('T1') == {'Budget': '100'}
+        assert [task['id'] for task in db.get_tasks_updated_since('2024-01-02T00:00:00Z')] == ['T2', 'T3']
+
+
+def test_incremental_sync_and_reconcile(tmp_path, client):
+    with WrikeMirror(str(tmp_path / 'mirror.sqlite3'), 'token', client=client) as db:
+        db.sync_space('SPACE')
+        client.put('T3', '2024-01-05T00:00:00Z', title='New report', parentIds=['F3'])
+        del client.tasks['T2']
+
+        assert db.sync_space('SPACE') == {'updated': 1, 'deleted': 0, 'reconciled': False}
+        assert [task['title'] for task in db.get_tasks_in_folder('F3')] == ['New report']
+        assert db.get_tasks_in_folder('F2') == []
+        assert db.get_task('T2') is not None
+        assert db.query("SELECT cursor FROM spaces WHERE id = 'SPACE'") == [{'cursor': '2024-01-05T00:00:00Z'}]
+        # Users already mirrored are not fetched again
+        assert not [path for path in client.requests if path.startswith('/contacts/')][1:]
+
+        assert db.sync_space('SPACE', full=True) == {'updated': 0, 'deleted': 1, 'reconciled': True}
+        assert db.get_task('T2') is None
+        assert db.get_subtasks('T1') == []
+
+
+def test_sync_space_opens_the_mirror(tmp_path, client, monkeypatch):
+    monkeypatch.setattr(mirror, 'get_client', lambda: client)
+    db = sync_space('SPACE', 'token', path=str(tmp_path / 'mirror.sqlite3'))
+    try:
+        assert len(db.query('SELECT id FROM tasks')) == 3
+    finally:
+        db.close()
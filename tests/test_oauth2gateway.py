@@ -0,0 +1,250 @@
+import gc
+import http.client
+import json
+import os
+import socket
+import threading
+import time
+import weakref
+from urllib.parse import parse_qs, urlsplit
+import pytest
+from PyWrike.gateways import oauth2gateway1
+from PyWrike.gateways.basegateway1 import APIGateway
+from PyWrike.gateways.oauth2gateway1 import REFRESH_MARGIN, OAuth2Gateway1, QuickSocketServer, ServerThread
+
+
+# Records refresh timers instead of starting threads
+class FakeTimer(object):
+    created = []
+
+    def __init__(self, interval, function, args=None, kwargs=None):
+        self.interval = interval
+        self.function = function
+        self.args = args or ()
+        self.cancelled = False
+        self.daemon = False
+        FakeTimer.created.append(self)
+
+    def start(self):
+        pass
+
+    def cancel(self):
+        self.cancelled = True
+
+    def fire(self):
+        self.function(*self.args)
+
+
+class FakeTokenEndpoint(object):
+    def __init__(self):
+        self.calls = []
+        self.counter = 0
+
+    def call(self, api, params=None):
+        self.calls.append((api, dict(params)))
+        self.counter += 1
+        return {'access_token': 'access%s' % self.counter, 'refresh_token': 'refresh%s' % self.counter, 'expires_in': 3600}, 200
+
+    def close(self):
+        pass
+
+
+class TokensUpdater(object):
+    def __init__(self):
+        self.tokens = []
+
+    def new_tokens(self, refresh_token, access_token):
+        self.tokens.append((refresh_token, access_token))
+
+
+@pytest.fixture
+def timers(monkeypatch):
+    FakeTimer.created = []
+    monkeypatch.setattr(threading, 'Timer', FakeTimer)
+    return FakeTimer.created
+
+
+def gateway(tmp_path, expires_in=3600, endpoint=None, updater=None):
+    gw = OAuth2Gateway1(
+        data_filepath=str(tmp_path / 'tokens.json'),
+        auth_info={'access_token': 'access0', 'refresh_token': 'refresh0', 'expires_in': expires_in},
+        tokens_updater=updater
+    )
+    gw._oauth2_client_id = 'client'
+    gw._oauth2_client_secret = 'secret'
+    gw._oauth2_gateway = endpoint or FakeTokenEndpoint()
+    return gw
+
+
+def test_tokens_are_kept_in_memory_and_written_once(tmp_path, timers):
+    gw = gateway(tmp_path)
+    with open(str(tmp_path / 'tokens.json')) as f:
+        stored = json.load(f)
+    assert stored['access_token'] == 'access0'
+    assert stored['expires_at'] == pytest.approx(time.time() + 3600, abs=5)
+    assert gw.get_auth_info() is gw._auth_info
+    assert gw._common_headers == {'Authorization': 'bearer access0'}
+    assert len(timers) == 1
+    assert timers[0].interval == pytest.approx(3600 - REFRESH_MARGIN, abs=5)
+
+
+def test_short_lived_tokens_are_refreshed_at_ninety_percent(tmp_path, timers):
+    gateway(tmp_path, expires_in=100)
+    assert timers[0].interval == pytest.approx(90, abs=2)
+
+
+def test_background_refresh_replaces_the_tokens(tmp_path, timers):
+    endpoint = FakeTokenEndpoint()
+    updater = TokensUpdater()
+    gw = gateway(tmp_path, endpoint=endpoint, updater=updater)
+    timers[0].fire()
+
+    assert endpoint.calls == [('refresh_token', {'client_id': 'client', 'client_secret': 'secret', 'refresh_token': 'refresh0'})]
+    assert gw._common_headers == {'Authorization': 'bearer access1'}
+    assert updater.tokens[-1] == ('refresh1', 'access1')
+    with open(str(tmp_path / 'tokens.json')) as f:
+        assert json.load(f)['access_token'] == 'access1'
+    # The refresh schedules the next one
+    assert len(timers) == 2 and timers[1].interval == pytest.approx(3600 - REFRESH_MARGIN, abs=5)
+
+
+def test_refresh_timer_does_not_keep_the_gateway_alive(tmp_path, timers):
+    endpoint = FakeTokenEndpoint()
+    gw = gateway(tmp_path, endpoint=endpoint)
+    gw_ref = weakref.ref(gw)
+    del gw
+    gc.collect()
+    assert gw_ref() is None
+
+    timers[0].fire()
+    assert endpoint.calls == []
+    assert len(timers) == 1
+
+
+def test_close_cancels_the_refresh(tmp_path, timers):
+    gw = gateway(tmp_path)
+    gw.close()
+    assert timers[0].cancelled
+
+
+def test_token_file_is_reread_only_when_it_changes(tmp_path, timers):
+    gw = gateway(tmp_path)
+    path = str(tmp_path / 'tokens.json')
+    first = gw.get_auth_info()
+    assert gw.get_auth_info() is first
+
+    with open(path, 'w') as f:
+        json.dump({'access_token': 'other', 'refresh_token': 'r', 'expires_in': 60}, f)
+    os.utime(path, (time.time() + 10, time.time() + 10))
+    data = gw.get_auth_info()
+    assert data['access_token'] == 'other'
+    # Files written without expires_at get one derived from the file's mtime
+    assert data['expires_at'] == pytest.approx(os.stat(path).st_mtime + 60)
+
+
+def test_expired_token_is_refreshed_before_the_call(tmp_path, timers, monkeypatch):
+    endpoint = FakeTokenEndpoint()
+    gw = gateway(tmp_path, endpoint=endpoint)
+    gw._set_auth_info(dict(gw._auth_info, expires_at=time.time() - 1))
+    sent = []
+
+    def call(self, api, **args):
+        sent.append(dict(self._common_headers))
+        return {'data': []}, 200
+
+    monkeypatch.setattr(APIGateway, 'call', call)
+    assert gw.call('anything') == ({'data': []}, 200)
+    assert [api for api, _ in endpoint.calls] == ['refresh_token']
+    assert sent == [{'Authorization': 'bearer access1'}]
+
+
+def get(port, path):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+    connection.request('GET', path)
+    response = connection.getresponse()
+    result = (response.status, response.getheader('Location'), response.read())
+    connection.close()
+    return result
+
+
+def test_callback_server_waits_for_the_code_on_an_ephemeral_port():
+    httpd = QuickSocketServer(port=0, host='127.0.0.1')
+    assert httpd.port != 0
+    thread = ServerThread(httpd)
+    thread.start()
+
+    assert get(httpd.port, '/favicon.ico')[0] == 404
+    assert not httpd.code_received.is_set()
+    status, _, body = get(httpd.port, '/callback?code=abc-123&state=x')
+    assert (status, body) == (200, b"Thank you, you can now close this window.")
+    assert httpd.wait_for_code(5) == 'abc-123'
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_callback_server_reports_errors_and_redirects():
+    httpd = QuickSocketServer(port=0, host='127.0.0.1')
+    thread = ServerThread(httpd)
+    thread.start()
+    assert get(httpd.port, '/callback?error=access_denied')[0] == 406
+    assert httpd.wait_for_code(5) == 0
+    thread.join(5)
+
+    httpd = QuickSocketServer(wait_for_redirect=True, port=0, host='127.0.0.1')
+    thread = ServerThread(httpd)
+    thread.start()
+    threading.Thread(target=lambda: httpd.wait_for_code(5) and httpd.set_redirect('https://example.com/done')).start()
+    assert get(httpd.port, '/?code=xyz')[:2] == (301, 'https://example.com/done')
+    thread.join(5)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+# Runs the authorization flow with a browser that immediately follows the redirect URI
+def authorize(monkeypatch, redirect_url, redirect_port):
+    opened = []
+
+    def open_browser(url):
+        opened.append(url)
+        redirect_uri = parse_qs(urlsplit(url).query)['redirect_uri'][0]
+        port = urlsplit(redirect_uri).port or oauth2gateway1.DEFAULT_REDIRECT_PORT
+        threading.Thread(target=get, args=(port, '/callback?code=granted')).start()
+
+    monkeypatch.setattr(oauth2gateway1.webbrowser, 'open', open_browser)
+    gw = OAuth2Gateway1(redirect_port=redirect_port, auth_timeout=5)
+    gw._oauth2_client_id = 'client'
+    gw._oauth2_client_secret = 'secret'
+    gw._oauth2_redirect_url = redirect_url
+    endpoint = FakeTokenEndpoint()
+    gw._oauth2_gateway = endpoint
+    auth_info = gw._create_auth_info()
+    return gw, endpoint, auth_info
+
+
+def test_registered_redirect_uri_is_sent_unchanged(monkeypatch):
+    redirect_url = 'http://localhost:%s/callback' % free_port()
+    gw, endpoint, auth_info = authorize(monkeypatch, redirect_url, None)
+    assert gw._oauth2_redirect_url == redirect_url
+    assert auth_info['access_token'] == 'access1'
+    assert endpoint.calls[0][1]['code'] == 'granted'
+    assert endpoint.calls[0][1]['redirect_uri'] == redirect_url
+
+
+def test_redirect_uri_without_a_port_is_not_rewritten(monkeypatch):
+    # The server listens on the default port, but the registered URI must still match exactly
+    monkeypatch.setattr(oauth2gateway1, 'DEFAULT_REDIRECT_PORT', free_port())
+    gw, endpoint, _ = authorize(monkeypatch, 'http://localhost/callback', None)
+    assert gw._oauth2_redirect_url == 'http://localhost/callback'
+    assert endpoint.calls[0][1]['redirect_uri'] == 'http://localhost/callback'
+
+
+def test_ephemeral_redirect_port_is_written_into_the_redirect_uri(monkeypatch):
+    gw, endpoint, _ = authorize(monkeypatch, 'http://localhost:1/callback', 0)
+    port = urlsplit(gw._oauth2_redirect_url).port
+    assert port not in (0, 1)
+    assert gw._oauth2_redirect_url == 'http://localhost:%s/callback' % port
+    assert endpoint.calls[0][1]['redirect_uri'] == gw._oauth2_redirect_url
@@ -0,0 +1,103 @@
+from PyWrike import wrike
+from PyWrike.paths import FolderPathResolver
+
+
+class FakeResponse(object):
+    def __init__(self, data, status_code=200):
+        self.status_code = status_code
+        self._data = data
+        self.content = b''
+
+    def json(self):
+        return {'data': self._data}
+
+
+class FakeClient(object):
+    def __init__(self, listings):
+        self.listings = listings
+        self.requests = []
+
+    def get(self, endpoint, access_token, params=None):
+        self.requests.append(endpoint)
+        if endpoint not in self.listings:
+            return FakeResponse([], status_code=404)
+        return FakeResponse([{'id': folder_id, 'title': title} for title, folder_id in self.listings[endpoint]])
+
+    def post(self, endpoint, access_token, json=None):
+        self.requests.append(('POST', endpoint))
+        return FakeResponse([{'id': 'F9', 'title': json['title']}])
+
+    def delete(self, endpoint, access_token):
+        self.requests.append(('DELETE', endpoint))
+        return FakeResponse([])
+
+
+LISTINGS = {
+    '/spaces/SPACE/folders': [('Projects', 'F1'), ('Archive', 'F2')],
+    '/folders/F1/folders': [('2024', 'F3'), (' Padded ', 'F5')],
+    '/folders/F3/folders': [('Q1', 'F4')],
+}
+
+
+def test_resolve_walks_the_path_and_reuses_listings():
+    client = FakeClient(LISTINGS)
+    resolver = FolderPathResolver('token', client=client)
+    assert resolver.resolve('Projects\\2024\\Q1', 'SPACE') == 'F4'
+    assert resolver.resolve(' Projects \\ 2024 ', 'SPACE') == 'F3'
+    assert resolver.resolve('Projects/2024', 'SPACE', separator='/') == 'F3'
+    assert resolver.lookups == 3
+    assert client.requests == ['/spaces/SPACE/folders', '/folders/F1/folders', '/folders/F3/folders']
+
+
+def test_resolve_returns_none_for_missing_folders():
+    resolver = FolderPathResolver('token', client=FakeClient(LISTINGS))
+    assert resolver.resolve('Projects\\Missing', 'SPACE') is None
+    assert resolver.resolve('', 'SPACE') is None
+
+
+def test_strip_false_keeps_titles_verbatim():
+    resolver = FolderPathResolver('token', client=FakeClient(LISTINGS))
+    assert resolver.resolve('Projects\\ Padded ', 'SPACE', strip=False) == 'F5'
+    assert resolver.resolve('Projects\\Padded', 'SPACE', strip=False) is None
+
+
+def test_resolve_creates_missing_folders_and_records_them():
+    client = FakeClient(LISTINGS)
+    resolver = FolderPathResolver('token', client=client)
+    created = []
+
+    def create_folder(parent_id, name):
+        created.append((parent_id, name))
+        return 'NEW%s' % len(created)
+
+    assert resolver.resolve('Archive\\2023\\Old', 'SPACE', create_folder=create_folder) == 'NEW2'
+    assert created == [('F2', '2023'), ('NEW1', 'Old')]
+    requests_made = len(client.requests)
+    assert resolver.resolve('Archive\\2023\\Old', 'SPACE', create_folder=create_folder) == 'NEW2'
+    assert len(client.requests) == requests_made
+
+
+def test_record_and_invalidate():
+    client = FakeClient(LISTINGS)
+    resolver = FolderPathResolver('token', client=client)
+    assert resolver.resolve('Projects', 'SPACE') == 'F1'
+    resolver.record('F1', 'Made', 'F9')
+    assert resolver.child_id('F1', 'Made') == 'F9'
+    resolver.invalidate()
+    assert resolver.child_id('F1', 'Made') is None
+
+
+def test_folder_helpers_keep_the_shared_resolver_in_sync(monkeypatch):
+    client = FakeClient(LISTINGS)
+    resolver = FolderPathResolver('token', client=client)
+    monkeypatch.setattr(wrike, 'get_client', lambda: client)
+    monkeypatch.setattr(wrike, 'get_path_resolver', lambda access_token: resolver)
+    assert resolver.resolve('Projects', 'SPACE') == 'F1'
+
+    wrike.create_wrike_folder('token', 'F1', 'New')
+    assert resolver.resolve('Projects\\New', 'SPACE') == 'F9'
+    assert resolver.lookups == 1
+
+    wrike.delete_wrike_folder_by_id('token', 'F9')
+    assert resolver.resolve('Projects\\New', 'SPACE') is None
+    assert resolver.lookups == 3
@@ -0,0 +1,44 @@
+import pytest
+from PyWrike.ratelimit import TokenBucket
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_burst_is_free_then_requests_wait_for_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(requests_per_minute=60, burst=3, clock=clock)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(1.0)
+    assert bucket.reserve() == pytest.approx(2.0)
+
+
+def test_tokens_refill_with_time_up_to_the_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(requests_per_minute=120, burst=2, clock=clock)
+    bucket.reserve()
+    bucket.reserve()
+    clock.now += 0.5
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.5)
+
+    clock.now += 60
+    assert [bucket.reserve() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.5)
+
+
+def test_429_pauses_the_bucket_and_lowers_the_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(requests_per_minute=60, burst=5, clock=clock)
+    bucket.update_from_response(429, {'Retry-After': '7'})
+    assert bucket.requests_per_minute == pytest.approx(48)
+    assert bucket.reserve() == pytest.approx(7 + 60 / 48.0)
+
+    for _ in range(100):
+        bucket.update_from_response(200, {})
+    assert bucket.requests_per_minute == pytest.approx(60)
@@ -0,0 +1,60 @@
+from PyWrike.taskindex import TaskIndex, get_task_index, normalize_title
+
+
+def task(task_id, title, folders=(), parents=()):
+    return {'id': task_id, 'title': title, 'parentIds': list(folders), 'superTaskIds': list(parents)}
+
+
+def test_normalize_title():
+    assert normalize_title('  Launch Plan ') == 'launch plan'
+    assert normalize_title(None) == ''
+
+
+def test_find_by_title_folder_and_parent():
+    index = TaskIndex([
+        task('T1', 'Launch', folders=['F1']),
+        task('T2', 'launch ', folders=['F2']),
+        task('T3', 'Review', parents=['T1']),
+    ])
+    assert len(index) == 3 and 'T2' in index
+    assert index.find(' LAUNCH')['id'] == 'T1'
+    assert index.find_in_folder('F2', 'Launch')['id'] == 'T2'
+    assert index.find_in_folder('F3', 'Launch') is None
+    assert index.find_in_parent('T1', 'review')['id'] == 'T3'
+    assert index.find_in_parent('T2', 'review') is None
+    assert index.find_outside_parent('T2', 'Review')['id'] == 'T3'
+    assert index.find_outside_parent('T1', 'Review') is None
+
+
+def test_adding_again_merges_folders_and_parents():
+    index = TaskIndex([task('T1', 'Launch', folders=['F1'])])
+    index.add(task('T1', 'Launch', folders=['F2']))
+    index.add_parent('T1', 'P1')
+    assert len(index) == 1
+    assert index.find_in_folder('F2', 'launch')['id'] == 'T1'
+    assert index.find_in_parent('P1', 'launch')['id'] == 'T1'
+    # Unknown tasks are ignored
+    index.add_folder('missing', 'F3')
+    assert index.find_in_folder('F3', '') is None
+
+
+def test_loaded_folders_and_parents():
+    index = TaskIndex()
+    assert not index.is_folder_loaded('F1')
+    index.load_folder('F1', [task('T1', 'Launch')])
+    index.load_parent('T1', [task('T2', 'Sub')])
+    assert index.is_folder_loaded('F1') and index.is_parent_loaded('T1')
+    assert index.find_in_folder('F1', 'launch')['id'] == 'T1'
+    assert index.find_in_parent('T1', 'sub')['id'] == 'T2'
+
+
+def test_index_of_a_cached_tasks_list_follows_appends():
+    cached_tasks = [task('T1', 'Launch', folders=['F1'])]
+    index = get_task_index(cached_tasks)
+    assert get_task_index(index) is index
+    assert index.find('launch')['id'] == 'T1'
+
+    cached_tasks.append(task('T2', 'Review', folders=['F1']))
+    assert get_task_index(cached_tasks) is index
+    assert index.find_in_folder('F1', 'review')['id'] == 'T2'
+    assert get_task_index([]) is not index
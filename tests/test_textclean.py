@@ -0,0 +1,49 @@
+import pytest
+from PyWrike.textclean import MIN_PARALLEL_BATCH, clean_cache, clean_descriptions, strip_html
+
+
+def test_empty_input():
+    assert strip_html(None) == ""
+    assert strip_html("") == ""
+
+
+def test_text_nodes_are_stripped_and_joined_by_lines():
+    assert strip_html("<p> First line </p><br/><div>Second <b>bold</b></div>") == "First line\nSecond\nbold"
+
+
+def test_entities_are_decoded():
+    assert strip_html("<p>Fish &amp; chips&nbsp;&lt;3</p>") == "Fish & chips\xa0<3"
+
+
+def test_comments_scripts_and_styles_are_dropped():
+    html = "<!DOCTYPE html><!-- note --><style>p {}</style><p>Kept</p><script>alert(1)</script>"
+    assert strip_html(html) == "Kept"
+
+
+def test_matches_beautifulsoup():
+    bs4 = pytest.importorskip('bs4')
+    html = "<ul><li>One</li><li> Two &amp; <i>three</i></li></ul>\n<p>\n</p><table><tr><td>Cell</td></tr></table>"
+    expected = "\n".join(bs4.BeautifulSoup(html, "html.parser").stripped_strings)
+    assert strip_html(html) == expected
+
+
+class FakePool(object):
+    def __init__(self):
+        self.batches = []
+
+    def map(self, fn, items, chunksize=1):
+        self.batches.append(len(items))
+        return [fn(item) for item in items]
+
+
+def test_clean_descriptions_reuses_the_given_pool_and_memo():
+    clean_cache.clear()
+    pool = FakePool()
+    small = ["<p>small %s</p>" % number for number in range(3)]
+    assert clean_descriptions(small + [small[0], None], pool=pool) == ["small 0", "small 1", "small 2", "small 0", ""]
+    assert pool.batches == []
+
+    large = ["<p>item %s</p>" % number for number in range(MIN_PARALLEL_BATCH)]
+    assert clean_descriptions(large, pool=pool)[-1] == "item %s" % (MIN_PARALLEL_BATCH - 1)
+    assert clean_descriptions(large + small, pool=pool)[0] == "item 0"
+    assert pool.batches == [MIN_PARALLEL_BATCH]